@@ -21,10 +21,6 @@ from cog.classes.utils import set_logger
 from exceptions.lobby_exceptions import DeletedLobby, LobbyNotFound, ServerConnectionException
 
 
-LOBBY_SERVER_ADDRESS = os.environ["LOBBY_SERVER_ADDRESS"]
-LOBBY_API_AUTH_KEY = os.environ["LOBBY_API_AUTH_KEY"]
-BASE_API_URL = f"http://{LOBBY_SERVER_ADDRESS}"
-
 T = TypeVar("T")
 
 ModelType = TypeVar(
@@ -40,6 +36,9 @@ class LobbyApi:
     def __init__(self, session_manager: ClientSessionManager):
         self.logger = set_logger(logger_name="lobby_api")
         self._session_manager = session_manager
+        # Read on construction rather than on import, so importing is side effect free.
+        self._base_api_url = f"http://{os.environ['LOBBY_SERVER_ADDRESS']}"
+        self._auth_key = os.environ["LOBBY_API_AUTH_KEY"]
 
     async def _request(  # type: ignore
         self,
@@ -59,12 +58,12 @@ class LobbyApi:
         ]:
         session = self._session_manager.session
         headers = {
-            "x-api-key": f"{LOBBY_API_AUTH_KEY}",
+            "x-api-key": f"{self._auth_key}",
             "Content-Type": "application/json",
         }
         try:
             async with session.request(
-                method, BASE_API_URL + endpoint, headers=headers, *args, **kwargs
+                method, self._base_api_url + endpoint, headers=headers, *args, **kwargs
             ) as response:
                 response.raise_for_status()  # Raise an error for non-2xx status codes
                 content_type = response.headers.get("Content-Type", "")
@@ -13,4 +13,6 @@ class ClientSessionManager:
         return self._session
     
     async def close(self) -> None:
-        await self.session.close_session()
\ No newline at end of file
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
\ No newline at end of file
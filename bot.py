@@ -10,6 +10,23 @@ from discord.ext import commands
 from discord.ext.commands import Context, Greedy
 from dotenv import load_dotenv
 
+from cog.classes.extension_loader import ExtensionLoader
+
+# Extensions in the same stage are loaded concurrently, a stage waits for the
+# previous one to finish.
+EXTENSION_STAGES = [
+    ["cog.scheduler"],
+    [
+        "cog.reminder",
+        "cog.lobby",
+        # "cog.soundboard",
+        "cog.utils",
+        # "cog.poll",
+        # "cog.timezone",
+        # "cog.piper",
+    ],
+]
+
 
 class MyClient(commands.Bot):
     def __init__(self, *, intents: discord.Intents):
@@ -20,14 +37,10 @@ class MyClient(commands.Bot):
         )
 
     async def setup_hook(self) -> None:
-        await self.load_extension("cog.scheduler")
-        await self.load_extension("cog.reminder")
-        await self.load_extension("cog.lobby")
-        # await self.load_extension("cog.soundboard")
-        await self.load_extension("cog.utils")
-        # await self.load_extension("cog.poll")
-        # await self.load_extension("cog.timezone")
-        # await self.load_extension("cog.piper")
+        loader = ExtensionLoader(
+            bot=self, profile=os.getenv("STARTUP_PROFILE", "0") == "1"
+        )
+        await loader.load(EXTENSION_STAGES)
 
     async def close(self) -> None:
         await super().close()
@@ -1,63 +1,162 @@
 import asyncio
+import os
 import time
 
 import discord
-import openai
+from cachetools import TTLCache
 from discord import app_commands
 from discord.ext import commands
 
+from cog.classes.ai_client import DEFAULT_MODEL, AiClient
+
 TITLE_FIELD_NAME_LIMIT = 256
 DESCRIPTION_LIMIT = 4096
 FIELD_VALUE_LIMIT = 1024
+# Seconds between followup edits while a response streams in, keeps well under
+# the message edit rate limit.
+EDIT_INTERVAL = 1.0
+RESPONSE_CACHE_SIZE = 256
+# Seconds a cached response is served before the prompt is asked again
+RESPONSE_CACHE_TTL = 60 * 60
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split()).casefold()
+
+
+def truncate(string: str, limit: int):
+    if len(string) > limit:
+        return string[:limit]
+    else:
+        return string
 
 
 class AiCog(commands.Cog):
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: commands.Bot, ai_client: AiClient):
         self.bot: commands.Bot = bot
+        self.ai_client = ai_client
+        # Normalised prompt to (response, model)
+        self.response_cache: TTLCache[str, tuple[str, str]] = TTLCache(
+            maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL
+        )
+        # Prompts being answered right now, identical queries wait on these
+        self._in_flight: dict[str, asyncio.Future[tuple[str, str]]] = {}
         print("AiCog loaded")
 
+    def create_embed(self, query: str, text: str, model: str) -> discord.Embed:
+        return discord.Embed(
+            title=truncate(query, TITLE_FIELD_NAME_LIMIT),
+            description=truncate(text.strip().replace("\n", " "), DESCRIPTION_LIMIT)
+            or "...",
+            colour=discord.Colour.dark_gold(),
+        ).set_footer(text="💾 AI-MODEL: " + model)
+
     @app_commands.command(description="Ask an AI about a general query", name="query")
-    async def query(self, interaction: discord.Interaction, query: str):
-        def truncate(string: str, limit: int):
-            if len(string) > limit:
-                return string[:limit]
-            else:
-                return string
+    @app_commands.describe(fresh="Ask again instead of using a recent answer")
+    async def query(
+        self, interaction: discord.Interaction, query: str, fresh: bool = False
+    ):
+        await interaction.response.defer()
+        key = normalize_prompt(query)
+        try:
+            if not fresh:
+                cached = self.response_cache.get(key)
+                in_flight = self._in_flight.get(key)
+                if cached is None and in_flight is not None:
+                    try:
+                        cached = await asyncio.shield(in_flight)
+                    except asyncio.CancelledError:
+                        if not in_flight.cancelled():
+                            raise
+                        # The query being waited on was cancelled, ask it here
+                if cached is not None:
+                    text, model = cached
+                    await interaction.followup.send(
+                        embed=self.create_embed(query, text, model)
+                    )
+                    return
 
-        def wait_for_response(response_query: str):
-            response_to_wait = openai.Completion.create(
-                model="text-davinci-003",
-                prompt=response_query,
-                temperature=0.6,
-                max_tokens=1028 - len(response_query),
-            )
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight.setdefault(key, future)
+            try:
+                text, model, message = await self.stream_response(interaction, query)
+                self.response_cache[key] = (text, model)
+                # Identical queries are answered without waiting on this one's edits
+                future.set_result((text, model))
+                await self.send_response(interaction, message, query, text, model)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                    # Retrieved so an error nobody waited on isn't logged again
+                    future.exception()
+                raise
+            finally:
+                if not future.done():
+                    future.cancel()
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+        except Exception as e:
+            print(e)
+            await interaction.followup.send(content=str(e))
 
-            while not response_to_wait:
-                time.sleep(1)
+    async def stream_response(
+        self, interaction: discord.Interaction, query: str
+    ) -> tuple[str, str, discord.WebhookMessage | None]:
+        """Streams the completion, showing partial responses as they arrive.
 
-            return response_to_wait
+        Returns the text, the model and the followup the partial response is
+        shown in, if one was sent yet.
+        """
+        text = ""
+        model = self.ai_client.model
+        message: discord.WebhookMessage | None = None
+        last_edit = 0.0
+        async for chunk in self.ai_client.stream_completion(
+            query, guild_id=interaction.guild_id
+        ):
+            text += chunk.text
+            model = chunk.model or model
+            # Partial responses are shown as they arrive, throttled
+            if time.monotonic() - last_edit < EDIT_INTERVAL:
+                continue
+            embed = self.create_embed(query, text, model)
+            if message is None:
+                message = await interaction.followup.send(embed=embed, wait=True)
+            else:
+                await message.edit(embed=embed)
+            last_edit = time.monotonic()
+        return text, model, message
 
-        try:
-            await interaction.response.defer()
-            response = await asyncio.to_thread(wait_for_response, response_query=query)
-            text: str = response["choices"][0]["text"]  # type: ignore
-            text_to_send = text.strip().replace("\n", " ")
-
-            model: str = response["model"]  # type: ignore
-            embed = discord.Embed(
-                title=truncate(query, TITLE_FIELD_NAME_LIMIT),
-                description=truncate(text_to_send, DESCRIPTION_LIMIT),
-                colour=discord.Colour.dark_gold(),
-            ).set_footer(text="💾 AI-MODEL: " + model)
+    async def send_response(
+        self,
+        interaction: discord.Interaction,
+        message: discord.WebhookMessage | None,
+        query: str,
+        text: str,
+        model: str,
+    ) -> None:
+        embed = self.create_embed(query, text, model)
+        if message is None:
             await interaction.followup.send(embed=embed)
-        except Exception as e:
-            print(e)
-            await interaction.followup.send(content=str(e))
+        else:
+            await message.edit(embed=embed)
+
+    async def cog_unload(self):
+        await self.ai_client.close()
+        await super().cog_unload()
 
 
 async def setup(bot):
-    await bot.add_cog(AiCog(bot))
+    ai_client = AiClient(
+        base_url=os.getenv("OPENAI_BASE_URL"),
+        model=os.getenv("OPENAI_MODEL", DEFAULT_MODEL),
+        timeout=float(os.getenv("OPENAI_TIMEOUT", "60")),
+        max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "4")),
+    )
+    await bot.add_cog(AiCog(bot, ai_client))
 
 
 async def teardown(bot):
-    await bot.remove_cog(AiCog(bot))
+    cog = bot.get_cog("AiCog")
+    if isinstance(cog, commands.Cog):
+        await bot.remove_cog(cog.__cog_name__)
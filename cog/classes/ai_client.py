@@ -0,0 +1,80 @@
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+DEFAULT_MODEL = "gpt-3.5-turbo-instruct"
+MAX_TOKENS = 1028
+
+
+@dataclass
+class CompletionChunk:
+    text: str
+    model: str
+
+
+class AiClient:
+    """Native async completion client.
+
+    Requests are bounded by a global semaphore and one per guild, so a single
+    guild can't take every slot, and nothing runs on the default executor.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 60.0,
+        max_concurrency: int = 4,
+        guild_concurrency: int = 1,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.guild_concurrency = guild_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._guild_semaphores: dict[int, asyncio.Semaphore] = {}
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            # Deferred until first use, openai is slow to import and optional.
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=1,
+            )
+        return self._client
+
+    def _get_guild_semaphore(self, guild_id: int | None) -> asyncio.Semaphore:
+        # Direct messages share one slot
+        key = guild_id or 0
+        semaphore = self._guild_semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.guild_concurrency)
+            self._guild_semaphores[key] = semaphore
+        return semaphore
+
+    async def stream_completion(
+        self, prompt: str, guild_id: int | None = None
+    ) -> AsyncIterator[CompletionChunk]:
+        """Yields the completion as it's generated."""
+        async with self._get_guild_semaphore(guild_id), self._semaphore:
+            stream = await self._get_client().completions.create(
+                model=self.model,
+                prompt=prompt,
+                temperature=0.6,
+                max_tokens=max(MAX_TOKENS - len(prompt), 16),
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices:
+                    yield CompletionChunk(text=chunk.choices[0].text, model=chunk.model)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
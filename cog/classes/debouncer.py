@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class KeyedDebouncer(Generic[K]):
+    """Coalesces repeated requests for the same key into one call per window.
+
+    The first request for a key starts a timer, everything requested before it
+    fires is served by that one call. Requests made while the call is running
+    schedule exactly one more. Different keys never wait on each other.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[K], Awaitable[Any]],
+        window: float,
+        logger: logging.Logger,
+    ) -> None:
+        self.callback = callback
+        self.window = window
+        self.logger = logger
+        self._tasks: dict[K, asyncio.Task] = {}
+        self._pending: set[K] = set()
+
+    def schedule(self, key: K) -> None:
+        if key in self._tasks:
+            self._pending.add(key)
+            return
+        self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key))
+
+    def is_scheduled(self, key: K) -> bool:
+        return key in self._tasks
+
+    async def _run(self, key: K) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                self._pending.discard(key)
+                try:
+                    await self.callback(key)
+                except Exception as e:
+                    self.logger.error(f"Debounced call for {key} failed: {e}")
+                if key not in self._pending:
+                    break
+        finally:
+            self._pending.discard(key)
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._pending.clear()
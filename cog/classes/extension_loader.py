@@ -0,0 +1,138 @@
+import asyncio
+import functools
+import time
+from dataclasses import dataclass
+from importlib.machinery import ModuleSpec
+from types import ModuleType
+
+from discord.ext import commands
+
+from cog.classes.utils import set_logger
+
+
+@dataclass
+class ExtensionTiming:
+    name: str
+    import_time: float = 0.0
+    setup_time: float = 0.0
+    error: BaseException | None = None
+
+    @property
+    def total_time(self) -> float:
+        return self.import_time + self.setup_time
+
+
+class TimedLoader:
+    """Stands in for an extension spec's loader, timing the module body and the
+    setup function it defines without executing the module a second time."""
+
+    def __init__(self, loader, timing: ExtensionTiming) -> None:
+        self.loader = loader
+        self.timing = timing
+
+    def create_module(self, spec: ModuleSpec) -> ModuleType | None:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        # The module keeps its real loader once it has been created
+        module.__loader__ = self.loader
+        started = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timing.import_time = time.perf_counter() - started
+
+        setup = getattr(module, "setup", None)
+        if setup is None:
+            return
+
+        @functools.wraps(setup)
+        async def timed_setup(bot: commands.Bot) -> None:
+            started = time.perf_counter()
+            try:
+                await setup(bot)
+            finally:
+                self.timing.setup_time = time.perf_counter() - started
+                module.setup = setup  # type: ignore
+
+        module.setup = timed_setup  # type: ignore
+
+
+class ExtensionLoader:
+    """Loads bot extensions stage by stage.
+
+    Extensions within a stage don't depend on each other, so their setup
+    functions are awaited concurrently. Each module body still runs once, on the
+    event loop, inside load_extension. A stage only starts once every extension
+    of the previous stage has loaded.
+    """
+
+    def __init__(self, bot: commands.Bot, profile: bool = False) -> None:
+        self.bot = bot
+        self.profile = profile
+        self.logger = set_logger(logger_name="startup")
+        self.timings: list[ExtensionTiming] = []
+        # Extensions being loaded right now, by module name
+        self._loading: dict[str, ExtensionTiming] = {}
+
+    async def load(self, stages: list[list[str]]) -> None:
+        started = time.perf_counter()
+        load_from_module_spec = self.bot._load_from_module_spec
+
+        async def timed_load_from_module_spec(spec: ModuleSpec, key: str) -> None:
+            timing = self._loading.get(key)
+            if timing is None or spec.loader is None:
+                return await load_from_module_spec(spec, key)
+            loader = spec.loader
+            spec.loader = TimedLoader(loader, timing)
+            try:
+                await load_from_module_spec(spec, key)
+            finally:
+                spec.loader = loader
+
+        # load_extension resolves and checks the name, the module is then executed
+        # and set up through this hook.
+        self.bot._load_from_module_spec = timed_load_from_module_spec  # type: ignore
+        try:
+            for stage in stages:
+                timings = await asyncio.gather(
+                    *(self._load_extension(name) for name in stage)
+                )
+                self.timings.extend(timings)
+                # Keep the previous fail fast behaviour once the stage has settled.
+                for timing in timings:
+                    if timing.error is not None:
+                        raise timing.error
+        finally:
+            del self.bot._load_from_module_spec
+        self.logger.info(
+            f"Loaded {len(self.timings)} extensions in "
+            f"{time.perf_counter() - started:.3f}s"
+        )
+        if self.profile:
+            self.logger.info(self.report())
+
+    async def _load_extension(self, name: str) -> ExtensionTiming:
+        timing = ExtensionTiming(name=name)
+        self._loading[name] = timing
+        try:
+            await self.bot.load_extension(name)
+        except Exception as e:
+            self.logger.error(f"Extension {name} failed to load: {e}")
+            timing.error = e
+        finally:
+            del self._loading[name]
+        return timing
+
+    def report(self) -> str:
+        lines = [
+            "=== Startup Profile ===",
+            f"{'Extension':<20}{'Import':>10}{'Setup':>10}{'Total':>10}",
+        ]
+        for timing in sorted(self.timings, key=lambda t: t.total_time, reverse=True):
+            lines.append(
+                f"{timing.name:<20}{timing.import_time:>9.3f}s"
+                f"{timing.setup_time:>9.3f}s{timing.total_time:>9.3f}s"
+            )
+        lines.append("======")
+        return "\n".join(lines)
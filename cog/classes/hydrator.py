@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class HydrationReport:
+    """Outcome of a single hydration step."""
+
+    name: str
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    errors: list[tuple[Any, BaseException]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"[{self.name}] {self.succeeded}/{self.total} hydrated, "
+            f"{self.failed} failed in {self.elapsed:.2f}s"
+        )
+
+
+class StartupHydrator:
+    """Runs per-entity startup work concurrently with a bounded fan-out.
+
+    Every step shares the same semaphore so the total number of in-flight
+    requests to Discord or the database never exceeds `concurrency`.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        concurrency: int = 8,
+        progress_interval: int = 25,
+    ) -> None:
+        self.logger = logger
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.reports: list[HydrationReport] = []
+
+    async def run(
+        self,
+        name: str,
+        items: Iterable[T],
+        step: Callable[[T], Awaitable[Any]],
+    ) -> HydrationReport:
+        """Apply `step` to every item concurrently and report on the outcome.
+
+        A failing item is logged and counted, it never cancels its siblings.
+        """
+        items = list(items)
+        report = HydrationReport(name=name, total=len(items))
+        started = time.perf_counter()
+        completed = 0
+
+        async def worker(item: T) -> None:
+            nonlocal completed
+            async with self._semaphore:
+                try:
+                    await step(item)
+                    report.succeeded += 1
+                except Exception as e:
+                    report.failed += 1
+                    report.errors.append((item, e))
+                    self.logger.warning(f"[{name}] Hydration failed for {item}: {e}")
+            completed += 1
+            if completed % self.progress_interval == 0 and completed != report.total:
+                self.logger.info(f"[{name}] Progress: {completed}/{report.total}")
+
+        await asyncio.gather(*(worker(item) for item in items))
+
+        report.elapsed = time.perf_counter() - started
+        self.reports.append(report)
+        self.logger.info(str(report))
+        return report
+
+    def summary(self) -> str:
+        total_elapsed = sum(report.elapsed for report in self.reports)
+        lines = [str(report) for report in self.reports]
+        lines.append(
+            f"Hydration finished in {total_elapsed:.2f}s "
+            f"with concurrency {self.concurrency}"
+        )
+        return "\n".join(lines)
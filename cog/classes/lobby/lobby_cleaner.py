@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Awaitable, Callable
+
+from api.models import LobbyModel
+from manager.lobby_service import LobbyManager
+
+# Deleting a lobby costs a clean up embed in the original channel and a channel delete.
+DISCORD_CALLS_PER_DELETION = 2
+# Most characters Discord accepts in an embed description
+DESCRIPTION_LIMIT = 4096
+
+
+class RateLimitBucket:
+    """Token bucket that refills `capacity` tokens every `per` seconds.
+
+    The clock and sleep can be swapped, e.g. for a fake clock in tests.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        per: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.capacity = capacity
+        self.per = per
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.capacity / self.per,
+        )
+        self._updated = now
+
+    async def acquire(self, tokens: int = 1) -> None:
+        # The lock keeps waiters in order, so a large burst drains at the refill rate.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await self.sleep((tokens - self._tokens) * self.per / self.capacity)
+
+
+@dataclass
+class CleanupAction:
+    lobby: LobbyModel
+    reason: str
+
+
+@dataclass
+class CleanupPlan:
+    actions: list[CleanupAction] = field(default_factory=list)
+
+    def by_guild(self) -> dict[int, list[CleanupAction]]:
+        guilds: dict[int, list[CleanupAction]] = defaultdict(list)
+        for action in self.actions:
+            guilds[action.lobby.guild_id].append(action)
+        return guilds
+
+    def describe(self, limit: int | None = DESCRIPTION_LIMIT) -> str:
+        """Lobby ids to delete per guild, cut off with a count of the rest once
+        the text would go over limit characters."""
+        if len(self.actions) == 0:
+            return "No lobbies to clean up."
+        description = f"{len(self.actions)} lobbies planned for deletion:"
+        shown = 0
+        for guild_id, actions in self.by_guild().items():
+            line = f"\n⠀⠀⤷ Guild {guild_id}: "
+            for index, action in enumerate(actions):
+                lobby_id = ("" if index == 0 else ", ") + str(action.lobby.id)
+                remaining = len(self.actions) - shown - 1
+                more = f"\n…and {remaining} more" if remaining > 0 else ""
+                if limit is not None and (
+                    len(description) + len(line) + len(lobby_id) + len(more) > limit
+                ):
+                    if index > 0:
+                        description += line
+                    return description + f"\n…and {len(self.actions) - shown} more"
+                line += lobby_id
+                shown += 1
+            description += line
+        return description
+
+
+@dataclass
+class CleanupReport:
+    planned: int
+    deleted: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    dry_run: bool = False
+
+    def __str__(self) -> str:
+        if self.dry_run:
+            return f"Dry run: {self.planned} lobbies would be deleted."
+        return (
+            f"Deleted {self.deleted}/{self.planned} lobbies, "
+            f"{self.failed} failed in {self.elapsed:.2f}s"
+        )
+
+
+class LobbyCleaner:
+    """Plans lobby deletions from a single lobby listing and executes them
+    concurrently, throttled by a rate limit bucket per guild."""
+
+    def __init__(
+        self,
+        lobby_manager: LobbyManager,
+        logger: logging.Logger,
+        concurrency: int = 5,
+        bucket_capacity: int = 5,
+        bucket_per: float = 5.0,
+    ) -> None:
+        self.lobby_manager = lobby_manager
+        self.logger = logger
+        self.concurrency = concurrency
+        self.bucket_capacity = bucket_capacity
+        self.bucket_per = bucket_per
+        self._buckets: dict[int, RateLimitBucket] = {}
+
+    def _get_bucket(self, guild_id: int) -> RateLimitBucket:
+        bucket = self._buckets.get(guild_id)
+        if bucket is None:
+            bucket = RateLimitBucket(self.bucket_capacity, self.bucket_per)
+            self._buckets[guild_id] = bucket
+        return bucket
+
+    @staticmethod
+    def last_activity(lobby: LobbyModel) -> datetime:
+        """Most recent of creation, promotion and member joins, in UTC."""
+        candidates = [lobby.created_datetime, lobby.last_promotion_datetime]
+        candidates += [member.join_datetime for member in lobby.member_lobbies]
+        candidates += [member.join_datetime for member in lobby.queue_member_lobbies]
+        # Database stores UTC datetime strings but with the timezone data truncated.
+        return max(
+            candidate if candidate.tzinfo else candidate.replace(tzinfo=UTC)
+            for candidate in candidates
+            if candidate is not None
+        )
+
+    def plan(
+        self,
+        lobbies: list[LobbyModel],
+        guild_id: int | None = None,
+        reason: str = "scheduled",
+        idle_for: timedelta | None = None,
+    ) -> CleanupPlan:
+        """Select the lobbies to delete, optionally only those idle for `idle_for`"""
+        now = datetime.now(UTC)
+        return CleanupPlan(
+            actions=[
+                CleanupAction(lobby=lobby, reason=reason)
+                for lobby in lobbies
+                if (guild_id is None or lobby.guild_id == guild_id)
+                and (idle_for is None or now - self.last_activity(lobby) >= idle_for)
+            ]
+        )
+
+    async def execute(self, plan: CleanupPlan, dry_run: bool = False) -> CleanupReport:
+        report = CleanupReport(planned=len(plan.actions), dry_run=dry_run)
+        if dry_run:
+            self.logger.info(plan.describe(limit=None))
+            return report
+
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def delete(action: CleanupAction) -> None:
+            async with semaphore:
+                await self._get_bucket(action.lobby.guild_id).acquire(
+                    DISCORD_CALLS_PER_DELETION
+                )
+                try:
+                    await self.lobby_manager.delete_lobby_model(
+                        action.lobby, clean_up=True
+                    )
+                    report.deleted += 1
+                except Exception as e:
+                    report.failed += 1
+                    self.logger.error(
+                        f"Failed to clean up lobby {action.lobby.id} "
+                        f"({action.reason}): {e}"
+                    )
+
+        await asyncio.gather(*(delete(action) for action in plan.actions))
+
+        report.elapsed = time.perf_counter() - started
+        self.logger.info(str(report))
+        return report
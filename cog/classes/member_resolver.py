@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+import discord
+from cachetools import TTLCache
+from discord import Guild, Member
+
+# Most user ids a gateway member request accepts
+QUERY_LIMIT = 100
+
+
+class MemberResolver:
+    """Looks members up in one guild at a time instead of scanning every member
+    the bot can see.
+
+    The gateway cache is tried first, then members fetched earlier, misses
+    included. Lookups still missing are collected for a moment and requested from
+    the gateway together, up to a hundred ids per request.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        ttl: float = 600.0,
+        maxsize: int = 4096,
+        batch_delay: float = 0.05,
+    ) -> None:
+        self.logger = logger
+        self.batch_delay = batch_delay
+        # (guild id, member id) to the member, None when not in the guild
+        self._cache: TTLCache[tuple[int, int], Member | None] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        self._waiting: dict[int, dict[int, asyncio.Future[Member | None]]] = {}
+        self._flushes: dict[int, asyncio.Task] = {}
+
+    async def get_member(self, guild: Guild, member_id: int) -> Member | None:
+        member = guild.get_member(member_id)
+        if member is not None:
+            return member
+        key = (guild.id, member_id)
+        if key in self._cache:
+            return self._cache[key]
+
+        waiting = self._waiting.setdefault(guild.id, {})
+        future = waiting.get(member_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            waiting[member_id] = future
+            if guild.id not in self._flushes:
+                self._flushes[guild.id] = asyncio.create_task(self._flush(guild))
+        return await asyncio.shield(future)
+
+    async def get_members(
+        self, guild: Guild, member_ids: list[int]
+    ) -> dict[int, Member | None]:
+        members = await asyncio.gather(
+            *(self.get_member(guild, member_id) for member_id in member_ids)
+        )
+        return dict(zip(member_ids, members))
+
+    async def _flush(self, guild: Guild) -> None:
+        # Lookups made in the meantime join this request
+        await asyncio.sleep(self.batch_delay)
+        del self._flushes[guild.id]
+        waiting = self._waiting.pop(guild.id, {})
+        member_ids = list(waiting)
+        for start in range(0, len(member_ids), QUERY_LIMIT):
+            batch = member_ids[start : start + QUERY_LIMIT]
+            try:
+                members = await self._query(guild, batch)
+            except Exception as e:
+                self.logger.error(f"Could not look up members in {guild.id}: {e}")
+                # Not cached, the next lookup tries again
+                for member_id in batch:
+                    waiting[member_id].set_result(None)
+                continue
+            for member_id in batch:
+                member = members.get(member_id)
+                self._cache[(guild.id, member_id)] = member
+                waiting[member_id].set_result(member)
+
+    async def _query(self, guild: Guild, member_ids: list[int]) -> dict[int, Member]:
+        try:
+            members = await guild.query_members(
+                user_ids=member_ids, limit=len(member_ids), cache=True
+            )
+            return {member.id: member for member in members}
+        except (asyncio.TimeoutError, discord.ClientException) as e:
+            self.logger.warning(
+                f"Member query in {guild.id} failed ({e}), fetching one by one"
+            )
+
+        members: dict[int, Member] = {}
+        for member_id in member_ids:
+            try:
+                members[member_id] = await guild.fetch_member(member_id)
+            except discord.NotFound:
+                pass
+        return members
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from discord import AudioSource
+
+from cog.classes.soundboard.hot_audio_cache import HotAudioCache, MemoryOpusAudio
+from cog.classes.soundboard.opus_cache import read_audio_packets
+from cog.classes.soundboard.transcoder import Transcoder
+from cog.classes.utils import set_logger
+
+PHRASE_CACHE_DIRECTORY = Path("data/tts_cache")
+DEFAULT_DISK_BUDGET = 256 * 1024 * 1024
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024
+# The volume the cog used to apply per play with PCMVolumeTransformer
+AUDIO_FILTER = "volume=0.55"
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+@dataclass
+class PhraseCacheStats:
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    entries: int
+    disk_size: int
+    disk_budget: int
+    memory_size: int
+    memory_budget: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / total if total else 0.0
+
+
+class PhraseCache:
+    """Synthesised phrases stored as Ogg Opus, addressed by a hash of the
+    normalised text and the voice that spoke it.
+
+    Phrases are kept on disk up to a byte budget, least recently played first out,
+    with the most recent ones also held in memory. The files on disk are tracked
+    in memory, so neither eviction nor stats scan the directory.
+    """
+
+    def __init__(
+        self,
+        transcoder: Transcoder,
+        directory: Path = PHRASE_CACHE_DIRECTORY,
+        disk_budget: int = DEFAULT_DISK_BUDGET,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    ) -> None:
+        self.transcoder = transcoder
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.disk_budget = disk_budget
+        self.logger = set_logger("phrase_cache")
+        self._memory = HotAudioCache(budget=memory_budget, admission_play_count=0)
+        # Phrase sizes on disk, least recently played first. Played times survive
+        # restarts as the files' modification times.
+        files = [(path, path.stat()) for path in self.directory.glob("*.ogg")]
+        files.sort(key=lambda file: file[1].st_mtime)
+        self._entries: OrderedDict[str, int] = OrderedDict(
+            (path.stem, stat.st_size) for path, stat in files
+        )
+        self._disk_size = sum(self._entries.values())
+        self._locks: dict[str, asyncio.Lock] = {}
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\0{normalize_text(text)}".encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.ogg"
+
+    async def get_source(self, key: str) -> AudioSource | None:
+        source = self._memory.get(key)
+        if source is not None:
+            self._touch(key)
+            return source
+
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        try:
+            packets = await asyncio.to_thread(read_audio_packets, self.path(key))
+        except FileNotFoundError:
+            # Deleted from outside the cache
+            self._disk_size -= self._entries.pop(key, 0)
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._touch(key)
+        self._memory.put(key, packets)
+        return MemoryOpusAudio(packets)
+
+    def _touch(self, key: str) -> None:
+        if key not in self._entries:
+            return
+        self._entries.move_to_end(key)
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    async def store(self, key: str, audio: list[bytes]) -> None:
+        """Encodes the synthesised audio and evicts old phrases over budget."""
+        # Concurrent requests for a new phrase encode it once
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._entries:
+                return
+
+            async def chunks():
+                for chunk in audio:
+                    yield chunk
+
+            try:
+                path = await self.transcoder.stream_to_opus(
+                    chunks(), self.path(key), audio_filter=AUDIO_FILTER
+                )
+            except Exception as e:
+                self.logger.error(f"Could not cache phrase {key}: {e}")
+                return
+            size = path.stat().st_size
+            self._entries[key] = size
+            self._disk_size += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._disk_size > self.disk_budget and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._disk_size -= size
+            self.path(key).unlink(missing_ok=True)
+            self._memory.evict(key)
+            self._locks.pop(key, None)
+
+    def stats(self) -> PhraseCacheStats:
+        memory = self._memory.stats()
+        return PhraseCacheStats(
+            memory_hits=memory.hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            entries=len(self._entries),
+            disk_size=self._disk_size,
+            disk_budget=self.disk_budget,
+            memory_size=memory.size,
+            memory_budget=memory.budget,
+        )
@@ -0,0 +1,56 @@
+import queue
+from typing import AsyncIterator
+
+
+class StreamReader:
+    """Blocking file-like reader fed with chunks from the event loop.
+
+    FFmpegPCMAudio(pipe=True) reads its source from a writer thread, so ffmpeg can
+    start decoding as soon as the first chunk of a response arrives instead of
+    after the whole body has been buffered.
+
+    If the producer fails the stream ends early with the error kept on `error`,
+    raising in the writer thread would leave ffmpeg waiting on its stdin.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: queue.SimpleQueue[bytes] = queue.SimpleQueue()
+        self._buffer = b""
+        self._closed = False
+        self.error: BaseException | None = None
+
+    def feed(self, chunk: bytes) -> None:
+        if chunk:
+            self._chunks.put(chunk)
+
+    def close(self) -> None:
+        # Empty chunk marks the end of the stream
+        self._chunks.put(b"")
+
+    async def feed_from(self, chunks: AsyncIterator[bytes]) -> None:
+        try:
+            async for chunk in chunks:
+                self.feed(chunk)
+        except BaseException as e:
+            self.error = e
+            raise
+        finally:
+            self.close()
+
+    def read(self, size: int = -1) -> bytes:
+        """Blocks until data is available, b"" once the stream has ended."""
+        while not self._closed and (size < 0 or len(self._buffer) < size):
+            chunk = self._chunks.get()
+            if not chunk:
+                self._closed = True
+                break
+            self._buffer += chunk
+            if size >= 0:
+                # Hand over what's there rather than waiting to fill size
+                break
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
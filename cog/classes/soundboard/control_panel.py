@@ -39,12 +39,27 @@ class DisconnectButton(Button):
         self.bot.dispatch("soundboard_disconnect", interaction)
 
 
+class StatsButton(Button):
+    def __init__(self, bot: Bot, view: "ControlPanelView"):
+        super().__init__(
+            style=ButtonStyle.grey,
+            label="Stats",
+            custom_id="sb_stats_button",
+        )
+        self.bot = bot
+        self.parent_view = view
+
+    async def callback(self, interaction: Interaction):
+        self.bot.dispatch("soundboard_stats", interaction)
+
+
 class ControlPanelView(View):
     def __init__(self, bot: Bot):
         super().__init__(timeout=None)
         self.bot = bot
         self.add_item(StopButton(bot, self))
         self.add_item(DisconnectButton(bot, self))
+        self.add_item(StatsButton(bot, self))
 
 
 class SoundButton(Button):
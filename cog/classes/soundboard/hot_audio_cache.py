@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+
+from cachetools import LRUCache
+from discord import AudioSource
+
+# Plays a soundbite needs before it's kept in memory, one off plays shouldn't
+# push out the soundbites everyone spams.
+ADMISSION_PLAY_COUNT = 3
+DEFAULT_BYTE_BUDGET = 64 * 1024 * 1024
+
+
+class MemoryOpusAudio(AudioSource):
+    """Plays Opus packets already held in memory."""
+
+    def __init__(self, packets: list[bytes]) -> None:
+        self._packets = iter(packets)
+
+    def read(self) -> bytes:
+        return next(self._packets, b"")
+
+    def is_opus(self) -> bool:
+        return True
+
+
+@dataclass
+class HotAudioStats:
+    hits: int
+    misses: int
+    entries: int
+    size: int
+    budget: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class HotAudioCache:
+    """LRU of Opus packets for the most played soundbites, bounded by bytes
+    rather than entries."""
+
+    def __init__(
+        self,
+        budget: int = DEFAULT_BYTE_BUDGET,
+        admission_play_count: int = ADMISSION_PLAY_COUNT,
+    ) -> None:
+        self.admission_play_count = admission_play_count
+        self._cache: LRUCache[str, list[bytes]] = LRUCache(
+            maxsize=budget,
+            getsizeof=lambda packets: sum(len(packet) for packet in packets),
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str) -> AudioSource | None:
+        packets = self._cache.get(name)
+        if packets is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return MemoryOpusAudio(packets)
+
+    def should_admit(self, play_count: int) -> bool:
+        return play_count >= self.admission_play_count
+
+    def put(self, name: str, packets: list[bytes]) -> None:
+        try:
+            self._cache[name] = packets
+        except ValueError:
+            # Larger than the whole budget
+            pass
+
+    def evict(self, name: str) -> None:
+        self._cache.pop(name, None)
+
+    def stats(self) -> HotAudioStats:
+        return HotAudioStats(
+            hits=self.hits,
+            misses=self.misses,
+            entries=len(self._cache),
+            size=int(self._cache.currsize),
+            budget=int(self._cache.maxsize),
+        )
@@ -0,0 +1,136 @@
+import asyncio
+import mmap
+from pathlib import Path
+from typing import Iterator
+
+from discord import AudioSource
+from discord.oggparse import OggStream
+
+from cog.classes.soundboard.hot_audio_cache import HotAudioCache, MemoryOpusAudio
+from cog.classes.soundboard.transcoder import Transcoder
+from cog.classes.utils import set_logger
+
+OPUS_CACHE_DIRECTORY = Path("data/opus_cache")
+# Loudness normalised first so every soundbite plays at the same level, then the
+# volume the soundboard used to apply per play with PCMVolumeTransformer.
+AUDIO_FILTER = "loudnorm=I=-16:TP=-1.5:LRA=11,volume=0.55"
+# Ogg Opus header packets, the voice client only expects audio packets
+OPUS_HEADER_PREFIXES = (b"OpusHead", b"OpusTags")
+
+
+def iter_audio_packets(stream) -> Iterator[bytes]:
+    return (
+        packet
+        for packet in OggStream(stream).iter_packets()
+        if not packet.startswith(OPUS_HEADER_PREFIXES)
+    )
+
+
+def read_audio_packets(path: Path) -> list[bytes]:
+    with open(path, "rb") as file:
+        return list(iter_audio_packets(file))
+
+
+class MmapOpusAudio(AudioSource):
+    """Plays a pre-encoded Ogg Opus file from a memory mapped file.
+
+    Packets are sent as they are, so a play costs neither an ffmpeg process nor
+    Python side volume scaling and Opus encoding.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._packets = iter_audio_packets(self._mmap)
+
+    def read(self) -> bytes:
+        return next(self._packets, b"")
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+
+class OpusCache:
+    """Soundbites transcoded once to Ogg Opus, keyed by soundbite name.
+
+    Transcodes go through the shared transcoder, so they count towards the same
+    ffmpeg limit as imports and use the same Opus settings as every other clip.
+    """
+
+    def __init__(
+        self,
+        transcoder: Transcoder,
+        directory: Path = OPUS_CACHE_DIRECTORY,
+        hot_cache: HotAudioCache | None = None,
+    ) -> None:
+        self.transcoder = transcoder
+        self.directory = directory
+        self.hot_cache = hot_cache or HotAudioCache()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.logger = set_logger("opus_cache")
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def cache_path(self, source: Path) -> Path:
+        return self.directory / f"{source.stem}.ogg"
+
+    def is_cached(self, source: Path) -> bool:
+        cached = self.cache_path(source)
+        try:
+            # Stale if the soundbite was replaced after it was transcoded
+            return cached.stat().st_mtime >= source.stat().st_mtime
+        except FileNotFoundError:
+            return False
+
+    async def ensure(self, source: Path) -> Path | None:
+        """Transcodes the soundbite if it isn't cached, None if that failed."""
+        lock = self._locks.setdefault(source.stem, asyncio.Lock())
+        async with lock:
+            if self.is_cached(source):
+                return self.cache_path(source)
+            try:
+                # Written to a temp file and swapped in, a play never sees a
+                # partial file
+                await self.transcoder.file_to_opus(
+                    source, self.cache_path(source), audio_filter=AUDIO_FILTER
+                )
+            except Exception as e:
+                self.logger.error(f"Could not transcode {source} to opus: {e}")
+                return None
+            self.hot_cache.evict(source.stem)
+            return self.cache_path(source)
+
+    async def warm(self, sources: list[Path]) -> None:
+        """Transcodes the soundbites missing from the cache one at a time, so the
+        rest of the transcoder's slots stay free for uploads and TTS."""
+        for source in sources:
+            await self.ensure(source)
+        self.logger.info(f"Opus cache warmed for {len(sources)} soundbites.")
+
+    def evict(self, source: Path) -> None:
+        self.cache_path(source).unlink(missing_ok=True)
+        self.hot_cache.evict(source.stem)
+        self._locks.pop(source.stem, None)
+
+    async def get_source(self, source: Path, play_count: int = 0) -> AudioSource | None:
+        """The cached audio source, None if the soundbite isn't transcoded yet.
+
+        Soundbites played often enough are kept in memory after their next play.
+        """
+        hot_source = self.hot_cache.get(source.stem)
+        if hot_source is not None:
+            return hot_source
+        if not self.is_cached(source):
+            return None
+        if self.hot_cache.should_admit(play_count):
+            # Reading and parsing the whole file is kept off the event loop
+            packets = await asyncio.to_thread(
+                read_audio_packets, self.cache_path(source)
+            )
+            self.hot_cache.put(source.stem, packets)
+            return MemoryOpusAudio(packets)
+        return MmapOpusAudio(self.cache_path(source))
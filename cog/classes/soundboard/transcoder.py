@@ -0,0 +1,352 @@
+import asyncio
+import json
+import os
+import re
+import struct
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator
+
+from discord.ext import commands
+
+from cog.classes.utils import set_logger
+from exceptions.soundboard_exceptions import TranscodeError, UploadTooLarge
+
+TEMP_DIRECTORY = Path("data/temp")
+MEAN_VOLUME_PATTERN = re.compile(r"mean_volume:\s*(-?[\d.]+) dB")
+# Enough of the body to find whether the moov box comes before the media data
+FASTSTART_PEEK_SIZE = 64 * 1024
+MP3_OUTPUT_ARGS = ["-vn", "-acodec", "libmp3lame", "-q:a", "2", "-f", "mp3"]
+# 48kHz stereo in 20ms frames, what the voice client expects from opus sources.
+# Every pre-encoded clip, soundbites and TTS phrases alike, uses these settings.
+OPUS_OUTPUT_ARGS = [
+    "-vn",
+    "-acodec",
+    "libopus",
+    "-b:a",
+    "96k",
+    "-application",
+    "audio",
+    "-ar",
+    "48000",
+    "-ac",
+    "2",
+    "-frame_duration",
+    "20",
+    "-f",
+    "ogg",
+]
+
+
+def is_faststart(head: bytes) -> bool | None:
+    """Whether an mp4 can be decoded from a pipe, which needs the moov box
+    before mdat. None if head isn't an mp4 or doesn't reach either box."""
+    offset = 0
+    while offset + 8 <= len(head):
+        size, box_type = struct.unpack(">I4s", head[offset : offset + 8])
+        if offset == 0 and box_type != b"ftyp":
+            return None
+        if box_type == b"moov":
+            return True
+        if box_type == b"mdat":
+            return False
+        if size == 1 and offset + 16 <= len(head):
+            size = struct.unpack(">Q", head[offset + 8 : offset + 16])[0]
+        if size < 8:
+            return None
+        offset += size
+    return None
+
+
+async def limit_size(
+    chunks: AsyncIterator[bytes], max_size: int
+) -> AsyncIterator[bytes]:
+    """Passes chunks through until more than max_size bytes have been read, then
+    raises UploadTooLarge so the download and ffmpeg are stopped."""
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_size:
+            raise UploadTooLarge(max_size)
+        yield chunk
+
+
+def trim_args(start: float, end: float | None) -> list[str]:
+    # Output side seeking, pipes can't be seeked so ffmpeg decodes up to start
+    # either way, and -to stops the process once the end has been written.
+    args = ["-ss", f"{start:.3f}"]
+    if end is not None:
+        args += ["-to", f"{end:.3f}"]
+    return args
+
+
+class Transcoder:
+    """Runs ffmpeg and ffprobe as asyncio subprocesses, at most `concurrency` at
+    a time so concurrent imports can't saturate the host."""
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        ffmpeg_path: str = "ffmpeg",
+        ffprobe_path: str = "ffprobe",
+        temp_directory: Path = TEMP_DIRECTORY,
+    ) -> None:
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+        self.temp_directory = temp_directory
+        self.temp_directory.mkdir(parents=True, exist_ok=True)
+        self.logger = set_logger("transcoder")
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def temp_file(self, suffix: str) -> Path:
+        """A unique temp file, so concurrent imports never share a path."""
+        handle, path = tempfile.mkstemp(suffix=suffix, dir=self.temp_directory)
+        os.close(handle)
+        return Path(path)
+
+    async def _run(
+        self,
+        args: list[str],
+        chunks: AsyncIterator[bytes] | None = None,
+    ) -> tuple[bytes, bytes]:
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.PIPE if chunks else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                if chunks is None:
+                    stdout, stderr = await process.communicate()
+                else:
+                    _, (stdout, stderr) = await asyncio.gather(
+                        self._feed(process, chunks),
+                        self._collect(process),
+                    )
+                    await process.wait()
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        if process.returncode != 0:
+            raise TranscodeError(
+                Path(args[0]).name, process.returncode, stderr.decode()
+            )
+        return stdout, stderr
+
+    @staticmethod
+    async def _feed(
+        process: asyncio.subprocess.Process, chunks: AsyncIterator[bytes]
+    ) -> None:
+        assert process.stdin is not None
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg stops reading once it has written up to the end trim
+            pass
+        finally:
+            if not process.stdin.is_closing():
+                process.stdin.close()
+
+    @staticmethod
+    async def _collect(process: asyncio.subprocess.Process) -> tuple[bytes, bytes]:
+        assert process.stdout is not None and process.stderr is not None
+        return await asyncio.gather(process.stdout.read(), process.stderr.read())
+
+    async def probe(self, source: Path | str) -> dict:
+        """ffprobe format and stream info, source can be a file or URL."""
+        stdout, _ = await self._run(
+            [
+                self.ffprobe_path,
+                "-v",
+                "error",
+                "-print_format",
+                "json",
+                "-show_format",
+                "-show_streams",
+                str(source),
+            ]
+        )
+        return json.loads(stdout)
+
+    async def probe_duration(self, source: Path | str) -> float | None:
+        """Duration in seconds, None if the container doesn't report one."""
+        probe = await self.probe(source)
+        duration = probe.get("format", {}).get("duration")
+        return float(duration) if duration is not None else None
+
+    async def mean_volume(self, source: Path | str) -> float | None:
+        _, stderr = await self._run(
+            [
+                self.ffmpeg_path,
+                "-hide_banner",
+                "-nostats",
+                "-i",
+                str(source),
+                "-af",
+                "volumedetect",
+                "-f",
+                "null",
+                "-",
+            ]
+        )
+        match = MEAN_VOLUME_PATTERN.search(stderr.decode(errors="ignore"))
+        return float(match.group(1)) if match else None
+
+    async def stream_to_mp3(
+        self,
+        chunks: AsyncIterator[bytes],
+        output: Path,
+        start: float = 0.0,
+        end: float | None = None,
+    ) -> Path:
+        """Decodes, trims and encodes a streamed body to mp3 in a single ffmpeg
+        pass. The output only appears once it's complete.
+
+        Mp4s with the moov box at the end can't be decoded from a pipe, those are
+        spooled to a temp file first.
+        """
+        head = b""
+        async for chunk in chunks:
+            head += chunk
+            if len(head) >= FASTSTART_PEEK_SIZE:
+                break
+
+        async def body() -> AsyncIterator[bytes]:
+            yield head
+            async for chunk in chunks:
+                yield chunk
+
+        if is_faststart(head) is False:
+            spool = self.temp_file(".mp4")
+            try:
+                with open(spool, "wb") as file:
+                    async for chunk in body():
+                        await asyncio.to_thread(file.write, chunk)
+                return await self.file_to_mp3(spool, output, start, end)
+            finally:
+                spool.unlink(missing_ok=True)
+
+        temp_output = self.temp_file(".mp3")
+        try:
+            await self._run(
+                [
+                    self.ffmpeg_path,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-i",
+                    "pipe:0",
+                    *trim_args(start, end),
+                    *MP3_OUTPUT_ARGS,
+                    str(temp_output),
+                ],
+                chunks=body(),
+            )
+            os.replace(temp_output, output)
+        finally:
+            temp_output.unlink(missing_ok=True)
+        return output
+
+    async def file_to_mp3(
+        self,
+        source: Path | str,
+        output: Path,
+        start: float = 0.0,
+        end: float | None = None,
+    ) -> Path:
+        temp_output = self.temp_file(".mp3")
+        try:
+            await self._run(
+                [
+                    self.ffmpeg_path,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-i",
+                    str(source),
+                    *trim_args(start, end),
+                    *MP3_OUTPUT_ARGS,
+                    str(temp_output),
+                ]
+            )
+            os.replace(temp_output, output)
+        finally:
+            temp_output.unlink(missing_ok=True)
+        return output
+
+    async def stream_to_opus(
+        self,
+        chunks: AsyncIterator[bytes],
+        output: Path,
+        audio_filter: str | None = None,
+    ) -> Path:
+        """Encodes a streamed body to Ogg Opus in the format the voice client
+        sends, so it can be played without ffmpeg."""
+        filter_args = ["-af", audio_filter] if audio_filter else []
+        temp_output = self.temp_file(".ogg")
+        try:
+            await self._run(
+                [
+                    self.ffmpeg_path,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-i",
+                    "pipe:0",
+                    *filter_args,
+                    *OPUS_OUTPUT_ARGS,
+                    str(temp_output),
+                ],
+                chunks=chunks,
+            )
+            os.replace(temp_output, output)
+        finally:
+            temp_output.unlink(missing_ok=True)
+        return output
+
+    async def file_to_opus(
+        self,
+        source: Path | str,
+        output: Path,
+        audio_filter: str | None = None,
+    ) -> Path:
+        """Encodes a file to Ogg Opus in the format the voice client sends."""
+        filter_args = ["-af", audio_filter] if audio_filter else []
+        temp_output = self.temp_file(".ogg")
+        try:
+            await self._run(
+                [
+                    self.ffmpeg_path,
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-y",
+                    "-i",
+                    str(source),
+                    *filter_args,
+                    *OPUS_OUTPUT_ARGS,
+                    str(temp_output),
+                ]
+            )
+            os.replace(temp_output, output)
+        finally:
+            temp_output.unlink(missing_ok=True)
+        return output
+
+
+def get_transcoder(bot: commands.Bot) -> Transcoder:
+    """The bot's transcoder, shared by the soundboard and piper so their ffmpeg
+    processes count against the same limit."""
+    transcoder = getattr(bot, "transcoder", None)
+    if transcoder is None:
+        transcoder = Transcoder()
+        setattr(bot, "transcoder", transcoder)
+    return transcoder
@@ -6,6 +6,10 @@ from pathlib import Path
 def set_logger(logger_name: str) -> logging.Logger:
     logger = logging.getLogger(logger_name)
     logger.setLevel(level=logging.INFO)
+    # Modules can be executed more than once (e.g. extension reloads), only attach
+    # the file handler the first time.
+    if logger.handlers:
+        return logger
 
     log_dir = Path("logs")
     handler = handlers.RotatingFileHandler(
@@ -0,0 +1,196 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Literal
+
+import discord
+from discord import AudioSource, Guild, VoiceChannel, VoiceClient
+from discord.ext import commands
+
+from cog.classes.utils import set_logger
+
+PlaybackMode = Literal["interrupt", "queue"]
+
+
+class VoiceSession:
+    """A guild's voice connection and playback queue.
+
+    The connection is reused between plays and only moved when the requester is in
+    another channel, so rapid presses never trigger another voice handshake.
+    """
+
+    def __init__(
+        self,
+        guild: Guild,
+        idle_timeout: float,
+        max_attempts: int,
+        base_delay: float,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.guild = guild
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.sleep = sleep
+        self.mode: PlaybackMode = "interrupt"
+        self.logger = set_logger("voice_session")
+        self._lock = asyncio.Lock()
+        self._queue: deque[AudioSource] = deque()
+        self._idle_task: asyncio.Task | None = None
+        self._loop = asyncio.get_running_loop()
+
+    @property
+    def voice_client(self) -> VoiceClient | None:
+        return self.guild.voice_client  # type: ignore
+
+    async def connect(self, channel: VoiceChannel) -> VoiceClient:
+        # Concurrent plays wait on the same handshake instead of starting their own
+        async with self._lock:
+            voice_client = self.voice_client
+            if voice_client is not None and voice_client.is_connected():
+                if voice_client.channel != channel:
+                    await voice_client.move_to(channel)
+                return voice_client
+
+            for attempt in range(self.max_attempts):
+                try:
+                    if voice_client is not None:
+                        # Stale client left over from a dropped connection
+                        await voice_client.disconnect(force=True)
+                    return await channel.connect(reconnect=True)
+                except (asyncio.TimeoutError, discord.ClientException) as e:
+                    delay = self.base_delay * 2**attempt
+                    self.logger.warning(
+                        f"Voice connect to {channel.id} failed ({e}), "
+                        f"retrying in {delay:.1f}s"
+                    )
+                    voice_client = self.voice_client
+                    await self.sleep(delay)
+            raise discord.ClientException(
+                f"Could not connect to {channel.id} after {self.max_attempts} attempts"
+            )
+
+    async def play(
+        self,
+        channel: VoiceChannel,
+        source: AudioSource,
+        mode: PlaybackMode | None = None,
+    ) -> None:
+        voice_client = await self.connect(channel)
+        self._cancel_idle()
+        if (mode or self.mode) == "interrupt":
+            self._clear_queue()
+        self._queue.append(source)
+
+        if voice_client.is_playing() or voice_client.is_paused():
+            if (mode or self.mode) == "interrupt":
+                # The after callback of the stopped source starts the new one
+                voice_client.stop()
+            return
+        self._play_next()
+
+    def _play_next(self) -> None:
+        voice_client = self.voice_client
+        if voice_client is None or not voice_client.is_connected():
+            self._clear_queue()
+            return
+        if voice_client.is_playing():
+            return
+        if not self._queue:
+            self._start_idle()
+            return
+        voice_client.play(self._queue.popleft(), after=self._after)
+
+    def _after(self, error: Exception | None) -> None:
+        # Called from the audio player thread
+        if error is not None:
+            self.logger.error(f"Playback error in guild {self.guild.id}: {error}")
+        self._loop.call_soon_threadsafe(self._play_next)
+
+    def stop(self) -> None:
+        self._clear_queue()
+        voice_client = self.voice_client
+        if voice_client is not None and voice_client.is_playing():
+            voice_client.stop()
+
+    async def disconnect(self, force: bool = False) -> None:
+        self._cancel_idle()
+        self._clear_queue()
+        voice_client = self.voice_client
+        if voice_client is not None:
+            await voice_client.disconnect(force=force)
+
+    def _clear_queue(self) -> None:
+        while self._queue:
+            self._queue.popleft().cleanup()
+
+    def _start_idle(self) -> None:
+        self._cancel_idle()
+        self._idle_task = self._loop.create_task(self._idle_disconnect())
+
+    def _cancel_idle(self) -> None:
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+
+    async def _idle_disconnect(self) -> None:
+        await self.sleep(self.idle_timeout)
+        voice_client = self.voice_client
+        if voice_client is not None and not voice_client.is_playing():
+            self.logger.info(f"Disconnecting idle voice client in {self.guild.id}")
+            self._idle_task = None
+            await voice_client.disconnect(force=False)
+
+
+class VoiceSessionManager:
+    """One voice session per guild, shared by every cog that plays audio."""
+
+    def __init__(
+        self,
+        idle_timeout: float = 300.0,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        # Retry back off and the idle timeout wait on this, swappable in tests
+        self.sleep = sleep
+        self._sessions: dict[int, VoiceSession] = {}
+
+    def get_session(self, guild: Guild) -> VoiceSession:
+        session = self._sessions.get(guild.id)
+        if session is None:
+            session = VoiceSession(
+                guild,
+                idle_timeout=self.idle_timeout,
+                max_attempts=self.max_attempts,
+                base_delay=self.base_delay,
+                sleep=self.sleep,
+            )
+            self._sessions[guild.id] = session
+        return session
+
+    async def play(
+        self,
+        channel: VoiceChannel,
+        source: AudioSource,
+        mode: PlaybackMode | None = None,
+    ) -> None:
+        await self.get_session(channel.guild).play(channel, source, mode)
+
+    def stop(self, guild: Guild) -> None:
+        self.get_session(guild).stop()
+
+    async def disconnect(self, guild: Guild, force: bool = False) -> None:
+        await self.get_session(guild).disconnect(force=force)
+
+
+def get_voice_session_manager(bot: commands.Bot) -> VoiceSessionManager:
+    """The bot's voice session manager, created by whichever cog asks first so
+    every cog playing audio shares the same connections."""
+    manager = getattr(bot, "voice_session_manager", None)
+    if manager is None:
+        manager = VoiceSessionManager()
+        setattr(bot, "voice_session_manager", manager)
+    return manager
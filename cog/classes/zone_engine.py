@@ -0,0 +1,131 @@
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from zoneinfo import ZoneInfo, available_timezones
+
+# Days of offsets precomputed per zone, rebuilt once they run out
+DEFAULT_HORIZON_DAYS = 90
+DAY = 24 * 60 * 60
+
+
+@dataclass
+class OffsetTable:
+    """UTC offsets of a zone over a window, one entry per transition."""
+
+    # UTC timestamps each offset applies from, the first is the window start
+    starts: list[float]
+    offsets: list[int]
+    valid_until: float
+
+    def index(self, timestamp: float) -> int:
+        return bisect_right(self.starts, timestamp) - 1
+
+    def covers(self, timestamp: float) -> bool:
+        return self.starts[0] <= timestamp < self.valid_until
+
+
+def utc_offset(zone: ZoneInfo, timestamp: float) -> int:
+    offset = datetime.fromtimestamp(timestamp, zone).utcoffset()
+    return int(offset.total_seconds()) if offset is not None else 0
+
+
+def build_offset_table(zone: ZoneInfo, start: float, days: int) -> OffsetTable:
+    """Samples the zone once a day and narrows each change down to the second.
+
+    Zones change offset at most a few times a year, so this costs about one
+    lookup per day plus a short binary search per transition.
+    """
+    starts = [start]
+    offsets = [utc_offset(zone, start)]
+    previous = start
+    for day in range(1, days + 1):
+        current = start + day * DAY
+        offset = utc_offset(zone, current)
+        if offset == offsets[-1]:
+            previous = current
+            continue
+        low, high = previous, current
+        while high - low > 1:
+            middle = (low + high) // 2
+            if utc_offset(zone, middle) == offsets[-1]:
+                low = middle
+            else:
+                high = middle
+        starts.append(high)
+        offsets.append(offset)
+        previous = current
+    return OffsetTable(starts=starts, offsets=offsets, valid_until=start + days * DAY)
+
+
+class ZoneEngine:
+    """Timezone conversions from cached zones and precomputed offset tables.
+
+    Zones are resolved once, and offsets between zones are a table lookup rather
+    than a localised datetime per zone.
+    """
+
+    def __init__(self, horizon_days: int = DEFAULT_HORIZON_DAYS) -> None:
+        self.horizon_days = horizon_days
+        self._zones: dict[str, ZoneInfo] = {}
+        self._tables: dict[str, OffsetTable] = {}
+        self._available: list[str] | None = None
+
+    def available_zones(self) -> list[str]:
+        if self._available is None:
+            self._available = sorted(available_timezones())
+        return self._available
+
+    def get_zone(self, name: str) -> ZoneInfo:
+        zone = self._zones.get(name)
+        if zone is None:
+            zone = ZoneInfo(name)
+            self._zones[name] = zone
+        return zone
+
+    def _get_table(self, name: str, timestamp: float) -> OffsetTable:
+        table = self._tables.get(name)
+        if table is None or not table.covers(timestamp):
+            # Starts a day early so times just before now are covered too
+            table = build_offset_table(
+                self.get_zone(name), timestamp - DAY, self.horizon_days + 1
+            )
+            self._tables[name] = table
+        return table
+
+    def offset(self, name: str, timestamp: float | None = None) -> int:
+        """UTC offset of the zone in seconds."""
+        if timestamp is None:
+            timestamp = time.time()
+        table = self._get_table(name, timestamp)
+        return table.offsets[table.index(timestamp)]
+
+    def offsets(
+        self, names: Iterable[str], timestamp: float | None = None
+    ) -> dict[str, int]:
+        if timestamp is None:
+            timestamp = time.time()
+        return {name: self.offset(name, timestamp) for name in names}
+
+    def difference(
+        self, name: str, other: str, timestamp: float | None = None
+    ) -> timedelta:
+        """How far the first zone is ahead of the other."""
+        if timestamp is None:
+            timestamp = time.time()
+        return timedelta(
+            seconds=self.offset(name, timestamp) - self.offset(other, timestamp)
+        )
+
+    def now_in(
+        self, names: Iterable[str], now: datetime | None = None
+    ) -> dict[str, datetime]:
+        """The same instant, now unless given, in every zone."""
+        now = now or datetime.now(timezone.utc)
+        # With the zone already resolved, zoneinfo's C conversion is quicker than
+        # building the datetime from the offset table in Python
+        return {name: now.astimezone(self.get_zone(name)) for name in names}
+
+
+zone_engine = ZoneEngine()
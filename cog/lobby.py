@@ -1,7 +1,8 @@
 import asyncio
-from datetime import datetime, time, timedelta
+import os
+from datetime import datetime
 from datetime import UTC as UTC
-from zoneinfo import ZoneInfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from discord import (
     AllowedMentions,
@@ -9,6 +10,7 @@ from discord import (
     CategoryChannel,
     Color,
     Embed,
+    Guild,
     Interaction,
     Member,
     NotFound,
@@ -23,13 +25,16 @@ from discord import (
     utils,
 )
 from discord.ext import commands, tasks
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from discord.ui import Button, Modal, Select, TextInput, View, button
 
-from api.api_exceptions import GamesNotFound
+from api.api_exceptions import GamesNotFound, LobbiesNotFound
 from api.lobby_api import LobbyApi
 from api.models import LobbyModel, LobbyStates
 from api.session_manager import ClientSessionManager
+from cog.classes.hydrator import StartupHydrator
 from cog.classes.lobby.lobby_cache import LobbyCache
+from cog.classes.lobby.lobby_cleaner import CleanupPlan, CleanupReport, LobbyCleaner
 from cog.classes.lobby.transformer_error import GameTransformError, NumberTransformError
 from cog.classes.lobby.transformer_cache import TransformerCache
 from cog.classes.utils import set_logger
@@ -45,11 +50,23 @@ from exceptions.lobby_exceptions import (
     ServerConnectionException,
     ThreadChannelNotFound,
 )
+from manager.lobby_schedule_service import LobbyScheduleManager
 from manager.lobby_service import LobbyManager
+from repository.db_config import DatabaseManager
+from repository.lobby_schedule_repo import (
+    LobbyScheduleRepository,
+    MemoryLobbyScheduleRepository,
+)
+from repository.table.lobby_schedule_table import LobbyScheduleModel
 
 transformer_cache = TransformerCache()
 lobby_cache = LobbyCache()
-scheduled_clean_up_time = time(5, 0, 0, 0, tzinfo=ZoneInfo("Pacific/Auckland"))
+# The engine and session factory are created in setup(), they only hold the
+# clean up schedules as lobbies themselves live behind the lobby API.
+engine: AsyncEngine | None = None
+async_session: async_sessionmaker[AsyncSession] | None = None
+# Maximum number of guilds/lobbies hydrated at the same time on startup
+HYDRATION_CONCURRENCY = 8
 
 
 # Predicate for commands
@@ -616,16 +633,22 @@ class ButtonView(View):
 
 
 class LobbyCog(commands.GroupCog, group_name="lobby"):
-    def __init__(self, bot: commands.Bot, lobby_manager: LobbyManager):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        lobby_manager: LobbyManager,
+        lobby_cleaner: LobbyCleaner,
+        lobby_schedule_manager: LobbyScheduleManager,
+    ):
         self.bot = bot
         self.lobby_manager = lobby_manager
+        self.lobby_cleaner = lobby_cleaner
+        self.lobby_schedule_manager = lobby_schedule_manager
         self.logger = set_logger("lobby_cog")
-        self.scheduled_clean_up_time = scheduled_clean_up_time
         print("LobbyCog loaded")
         # Start tasks
-        self.lobby_cleanup.start()
+        self.populate_cleanup_schedules.start()
         self.hydrate_cache.start()
-        print(self.get_lobby_cleanup_status())
 
     async def cog_app_command_error(self, interaction: Interaction, error: Exception):
         embed = None
@@ -658,38 +681,31 @@ class LobbyCog(commands.GroupCog, group_name="lobby"):
         else:
             self.logger.error(error)
 
-    @tasks.loop(
-        count=None,
-        reconnect=True,
-        time=scheduled_clean_up_time,
-    )
-    async def lobby_cleanup(self):
-        """Cleans up lobbies every 5am NZT"""
-        lobbies = await self.lobby_manager.get_all_lobbies()
-        for lobby in lobbies:
-            await self.lobby_manager.get_channel(
-                lobby.guild_id, lobby.lobby_channel_id
-            )
-            await self.lobby_manager.delete_lobby(lobby_id=lobby.id, clean_up=True)
+    @tasks.loop(count=1, reconnect=True)
+    async def populate_cleanup_schedules(self):
+        """Schedules every guild's clean up, replacing the single 5am NZT sweep"""
+        await self.lobby_schedule_manager.populate_scheduler()
+        print(self.get_lobby_cleanup_status())
 
-    @lobby_cleanup.before_loop
-    async def before_lobby_cleanup(self):
-        await self.bot.wait_until_ready()
+    async def run_lobby_cleanup(
+        self, guild_id: int | None = None, dry_run: bool = False
+    ) -> tuple[CleanupPlan, CleanupReport]:
+        """Plans deletions from a single lobby listing and executes them"""
+        try:
+            lobbies = await self.lobby_manager.get_all_lobbies()
+        except LobbiesNotFound:
+            lobbies = []
+        plan = self.lobby_cleaner.plan(lobbies or [], guild_id=guild_id)
+        report = await self.lobby_cleaner.execute(plan, dry_run=dry_run)
+        return plan, report
 
     def get_lobby_cleanup_status(self):
-        running_status = self.lobby_cleanup.is_running()
-        next_run_time = datetime.combine(datetime.now(tz=ZoneInfo("Pacific/Auckland")).date(), self.scheduled_clean_up_time)
-
-        if next_run_time < datetime.now(tz=ZoneInfo("Pacific/Auckland")):
-            next_run_time += timedelta(days=1)
+        return self.lobby_schedule_manager.get_status()
 
-        status_message = (
-            f"=== Lobby Clean Up Task Status ===\n"
-            f"Lobby cleanup task is {'running' if running_status else 'not running'}.\n"
-            f"Next scheduled run time: {next_run_time.strftime('%Y-%m-%d %H:%M:%S %Z')}\n"
-            f"======\n"
-        )
-        return status_message
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: Guild):
+        schedule = await self.lobby_schedule_manager.get_schedule(guild.id, guild.name)
+        self.lobby_schedule_manager.schedule_guild(schedule)
 
     # Custom listeners for tasks
     @tasks.loop(count=1, reconnect=True)
@@ -760,46 +776,54 @@ class LobbyCog(commands.GroupCog, group_name="lobby"):
     @tasks.loop(count=1, reconnect=True)
     async def hydrate_cache(self):
         await self.bot.wait_until_ready()
-        for guild in self.bot.guilds:
-            try:
-                # Hydrate game cache. Function implicitly caches.
-                await self.lobby_manager.get_games_by_guild_id(guild.id)
-            except GamesNotFound:
-                self.logger.info(f"Guild with ID: {guild.id} has no games, skipping...")
-                continue
+        hydrator = StartupHydrator(
+            logger=self.logger, concurrency=HYDRATION_CONCURRENCY
+        )
+        # Hydrate game cache. Function implicitly caches.
+        await hydrator.run("games", self.bot.guilds, self._hydrate_guild_games)
         # Hydrate lobby cache
         lobbies = await self.lobby_manager.get_all_lobbies()
         # Register persistent views per lobby on restart
-        for lobby in lobbies:
-            # Construct button view
-            self.bot.add_view(
-                view=ButtonView(
-                    lobby_id=lobby.id,
-                    lobby_manager=self.lobby_manager,
-                ),
-                message_id=lobby.embed_message_id,
-            )
-            if lobby.last_deletion_message_id is not None:
-                lobby.last_deletion_datetime = datetime.now(UTC)
-                message = await self.lobby_manager.get_message(
-                    guild_id=lobby.guild_id,
-                    channel_id=lobby.history_thread_id,
-                    message_id=lobby.last_deletion_message_id,
-                )
-                if message is None:
-                    continue
-                try:
-                    await message.delete()
-                except NotFound:
-                    pass
-                await self.lobby_manager.send_deletion_message(
-                    lobby_id=lobby.id,
-                    view=DeletionButtonView(
-                        lobby_id=lobby.id,
-                        lobby_manager=self.lobby_manager,
-                        bot=self.bot,
-                    ),
-                )
+        await hydrator.run("lobbies", lobbies or [], self._hydrate_lobby)
+        self.logger.info(hydrator.summary())
+
+    async def _hydrate_guild_games(self, guild: Guild) -> None:
+        try:
+            await self.lobby_manager.get_games_by_guild_id(guild.id)
+        except GamesNotFound:
+            self.logger.info(f"Guild with ID: {guild.id} has no games, skipping...")
+
+    async def _hydrate_lobby(self, lobby: LobbyModel) -> None:
+        # Construct button view
+        self.bot.add_view(
+            view=ButtonView(
+                lobby_id=lobby.id,
+                lobby_manager=self.lobby_manager,
+            ),
+            message_id=lobby.embed_message_id,
+        )
+        if lobby.last_deletion_message_id is None:
+            return
+        lobby.last_deletion_datetime = datetime.now(UTC)
+        message = await self.lobby_manager.get_message(
+            guild_id=lobby.guild_id,
+            channel_id=lobby.history_thread_id,
+            message_id=lobby.last_deletion_message_id,
+        )
+        if message is None:
+            return
+        try:
+            await message.delete()
+        except NotFound:
+            pass
+        await self.lobby_manager.send_deletion_message(
+            lobby_id=lobby.id,
+            view=DeletionButtonView(
+                lobby_id=lobby.id,
+                lobby_manager=self.lobby_manager,
+                bot=self.bot,
+            ),
+        )
 
     @commands.Cog.listener()
     async def on_voice_state_update(
@@ -1048,6 +1072,86 @@ class LobbyCog(commands.GroupCog, group_name="lobby"):
         # Send message to the user
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(
+        description="Admin: Clean up all lobbies on this server", name="cleanup"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def clean_up_lobbies(self, interaction: Interaction, dry_run: bool = True):
+        """Deletes every lobby on the server, dry run only reports the plan"""
+        assert interaction.guild is not None
+        await interaction.response.defer(ephemeral=True)
+
+        plan, report = await self.run_lobby_cleanup(
+            guild_id=interaction.guild.id, dry_run=dry_run
+        )
+
+        embed = Embed(
+            title="Lobby Clean Up" + (" (Dry Run)" if dry_run else ""),
+            description=plan.describe(),
+            color=Color.yellow() if dry_run else Color.red(),
+        ).set_footer(text=str(report))
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(
+        description="Admin: Set when lobbies on this server are cleaned up",
+        name="cleanupschedule",
+    )
+    @app_commands.describe(
+        time="Daily clean up time as HH:MM (24 hour)",
+        timezone="IANA timezone e.g. Pacific/Auckland",
+        idle_minutes="Also clean up lobbies idle for this many minutes",
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def set_clean_up_schedule(
+        self,
+        interaction: Interaction,
+        time: str,
+        timezone: str = "Pacific/Auckland",
+        idle_minutes: app_commands.Range[int, 5, 10080] | None = None,
+    ):
+        """Sets the daily clean up time and optional idle threshold of the server"""
+        assert interaction.guild is not None
+        try:
+            cleanup_time = datetime.strptime(time, "%H:%M").time()
+            ZoneInfo(timezone)
+        except (ValueError, ZoneInfoNotFoundError):
+            await interaction.response.send_message(
+                embed=Embed(
+                    title="Error",
+                    description=(
+                        "Time must be HH:MM and timezone a valid IANA timezone."
+                    ),
+                    color=Color.red(),
+                ),
+                ephemeral=True,
+            )
+            return
+
+        schedule = await self.lobby_schedule_manager.set_schedule(
+            guild_id=interaction.guild.id,
+            guild_name=interaction.guild.name,
+            cleanup_time=cleanup_time,
+            timezone=timezone,
+            idle_minutes=idle_minutes,
+        )
+        next_run = LobbyScheduleManager.next_run_time(schedule)
+        description = (
+            f"Lobbies will be cleaned up daily at {cleanup_time.strftime('%H:%M')} "
+            f"{timezone}, next clean up <t:{int(next_run.timestamp())}:R>."
+        )
+        if idle_minutes is not None:
+            description += (
+                f"\nLobbies idle for {idle_minutes} minutes are cleaned up early."
+            )
+        await interaction.response.send_message(
+            embed=Embed(
+                title="Lobby Clean Up Schedule",
+                description=description,
+                color=Color.green(),
+            ),
+            ephemeral=True,
+        )
+
     @app_commands.command(
         description="Lobby Owner: Add user to the lobby", name="userjoin"
     )
@@ -1194,7 +1298,33 @@ class LobbyCog(commands.GroupCog, group_name="lobby"):
 
 
 async def setup(bot: commands.Bot):
+    global engine, async_session
+
+    # Schedules are only persisted when a database is configured for them
+    settings = {
+        key: os.getenv(f"LOBBY_PG_{key}") or os.getenv(f"PG_{key}")
+        for key in ("USER", "PASSWORD", "HOST", "PORT", "DATABASE")
+    }
+    schedule_repository: LobbyScheduleRepository | MemoryLobbyScheduleRepository
+    if all(settings.values()):
+        engine = DatabaseManager.create_engine(
+            username=settings["USER"],  # type: ignore
+            password=settings["PASSWORD"],  # type: ignore
+            host=settings["HOST"],  # type: ignore
+            port=settings["PORT"],  # type: ignore
+            database_name=settings["DATABASE"],  # type: ignore
+        )
+        async_session = DatabaseManager.create_async_session_maker(engine=engine)
 
+        # Create tables
+        await DatabaseManager.create_tables(engine=engine, tables=[LobbyScheduleModel])
+        schedule_repository = LobbyScheduleRepository(async_session)
+    else:
+        set_logger("lobby_cog").warning(
+            "No database configured for the lobby module, clean up schedules "
+            "are kept in memory and reset on restart."
+        )
+        schedule_repository = MemoryLobbyScheduleRepository()
 
     lobby_embed_manager = LobbyEmbedManager()
     session_manager = ClientSessionManager()
@@ -1208,7 +1338,19 @@ async def setup(bot: commands.Bot):
         lobby_cache=lobby_cache,
     )
 
-    await bot.add_cog(LobbyCog(bot, lobby_manager))
+    lobby_cleaner = LobbyCleaner(
+        lobby_manager=lobby_manager, logger=set_logger("lobby_cleaner")
+    )
+    lobby_schedule_manager = LobbyScheduleManager(
+        bot=bot,
+        repository=schedule_repository,
+        lobby_manager=lobby_manager,
+        lobby_cleaner=lobby_cleaner,
+    )
+
+    await bot.add_cog(
+        LobbyCog(bot, lobby_manager, lobby_cleaner, lobby_schedule_manager)
+    )
 
 
 async def teardown(bot: commands.Bot):
@@ -1,60 +1,56 @@
-import io
+import asyncio
 import os
 import urllib.parse
 
 import aiohttp
-from discord import (DMChannel, FFmpegPCMAudio, Interaction, Member,
-                     PCMVolumeTransformer, VoiceChannel, VoiceClient,
+from discord import (AudioSource, Colour, DMChannel, Embed, FFmpegPCMAudio,
+                     Interaction, Member, PCMVolumeTransformer, VoiceChannel,
                      VoiceState, app_commands)
 from discord.ext import commands
 
+from api.session_manager import ClientSessionManager
+from cog.classes.piper.phrase_cache import PhraseCache
+from cog.classes.piper.stream_reader import StreamReader
+from cog.classes.soundboard.transcoder import get_transcoder
+from cog.classes.utils import set_logger
+from cog.classes.voice_session import (VoiceSessionManager,
+                                        get_voice_session_manager)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class PiperCog(commands.GroupCog, name="piper"):
-    def __init__(self, bot: commands.Bot, webserver_url: str):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        webserver_url: str,
+        session_manager: ClientSessionManager,
+        phrase_cache: PhraseCache,
+        voice_session_manager: VoiceSessionManager,
+    ):
         self.bot = bot
         self.webserver_url = webserver_url
+        self.session_manager = session_manager
+        self.phrase_cache = phrase_cache
+        self.voice_session_manager = voice_session_manager
+        self.logger = set_logger("piper")
+        self._stream_tasks: set[asyncio.Task] = set()
         print(f"{self.__cog_name__} loaded")
 
     @commands.Cog.listener()
-    async def on_tts_play(self, interaction: Interaction, audio: io.BytesIO):
+    async def on_tts_play(self, interaction: Interaction, source: AudioSource):
         """Custom listener for when bot is going to play audio."""
 
-        # Fetch voice client
         if not interaction.guild:
             raise ValueError("Interaction does not have a guild.")
 
-        voice_client = interaction.guild.voice_client
-
         assert isinstance(interaction.user, Member)
         assert isinstance(interaction.user.voice, VoiceState)
         assert isinstance(interaction.user.voice.channel, VoiceChannel)
 
-        # Check if bot is connected to a voice channel
-        if not voice_client:
-            voice_client = await interaction.user.voice.channel.connect()
-
-        # Check if bot is in the same voice channel as the user
-        if self.bot.user not in interaction.channel.members:  # type: ignore
-            voice_client = await interaction.user.voice.channel.connect()
-
-        if not voice_client:
-            return ValueError("Voice client could not be connected.")
-
-        assert isinstance(voice_client, VoiceClient)
-
-        if voice_client.is_playing():
-            voice_client.stop()
-
-        # Prepare audio source
-        source = PCMVolumeTransformer(
-            FFmpegPCMAudio(source=audio, pipe=True),
-            volume=0.55,
-        )
-
-        assert interaction.channel is not None
-
-        voice_client.play(  # type: ignore
-            source=source,
+        # Shares the soundboard's connection, speech queues instead of cutting off
+        await self.voice_session_manager.play(
+            interaction.user.voice.channel, source, mode="queue"
         )
 
     @app_commands.command(description="Use custom text-to-speech server", name="speak")
@@ -82,34 +78,121 @@ class PiperCog(commands.GroupCog, name="piper"):
 
         await interaction.response.defer()
 
-        # Fetch audio clip
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
+        # Cached phrases play straight from their pre-encoded opus packets
+        key = self.phrase_cache.key(text, voice=self.webserver_url)
+        source = await self.phrase_cache.get_source(key)
+        if source is not None:
+            self.bot.dispatch("tts_play", interaction, source)
+            await interaction.followup.send(
+                content=f"### {interaction.user.display_name} says: \n    {text}",
+            )
+            return
+
+        # Fetch audio clip, playback starts from the first chunk while the rest of
+        # the response is still being synthesised.
+        try:
+            resp = await self.session_manager.session.get(
                 f"{self.webserver_url}/voice/?script={urllib.parse.quote(text)}"
-            ) as resp:
-                if resp.status == 200:
-                    buffer = (
-                        io.BytesIO()
-                    )  # Create a BytesIO buffer to store the response data
-                    async for chunk in resp.content.iter_chunked(1024):
-                        buffer.write(chunk)
-
-                    buffer.seek(0)
-                    self.bot.dispatch("tts_play", interaction, buffer)
-                    await interaction.followup.send(
-                        content=f"### {interaction.user.display_name} says: \n    {text}",
-                    )
-
-                else:
-                    await interaction.followup.send(
-                        content=f"Connection Issue to TTS server. Error code: {resp.status}",
-                    )
+            )
+        except aiohttp.ClientError as e:
+            await interaction.followup.send(
+                content=f"Connection Issue to TTS server. Error: {e}",
+            )
+            return
+
+        if resp.status != 200:
+            resp.release()
+            await interaction.followup.send(
+                content=f"Connection Issue to TTS server. Error code: {resp.status}",
+            )
+            return
+
+        reader = StreamReader()
+        task = self.bot.loop.create_task(self._stream_response(resp, reader, key))
+        self._stream_tasks.add(task)
+        task.add_done_callback(self._on_stream_done)
+
+        # Prepare audio source
+        source = PCMVolumeTransformer(
+            FFmpegPCMAudio(source=reader, pipe=True),  # type: ignore
+            volume=0.55,
+        )
+        self.bot.dispatch("tts_play", interaction, source)
+        await interaction.followup.send(
+            content=f"### {interaction.user.display_name} says: \n    {text}",
+        )
+
+    def _on_stream_done(self, task: asyncio.Task) -> None:
+        self._stream_tasks.discard(task)
+        if task.cancelled():
+            return
+        # Playback has already ended early on the reader's side, the error is
+        # retrieved here so it's logged instead of lost with the task.
+        error = task.exception()
+        if error is not None:
+            self.logger.error(f"TTS stream failed: {error!r}")
+
+    async def _stream_response(
+        self, resp: aiohttp.ClientResponse, reader: StreamReader, key: str
+    ) -> None:
+        audio: list[bytes] = []
+
+        async def chunks():
+            async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                # Kept to be encoded for the phrase cache once playback has its copy
+                audio.append(chunk)
+                yield chunk
+
+        async with resp:
+            await reader.feed_from(chunks())
+        await self.phrase_cache.store(key, audio)
+
+    @app_commands.command(description="Text-to-speech cache stats", name="stats")
+    async def stats(self, interaction: Interaction):
+        stats = self.phrase_cache.stats()
+        embed = Embed(title="Piper Phrase Cache", color=Colour.blurple())
+        embed.add_field(name="Hit Rate", value=f"{stats.hit_rate:.1%}")
+        embed.add_field(
+            name="Memory / Disk Hits / Misses",
+            value=f"{stats.memory_hits} / {stats.disk_hits} / {stats.misses}",
+        )
+        embed.add_field(name="Phrases", value=str(stats.entries))
+        embed.add_field(
+            name="Disk",
+            value=(
+                f"{stats.disk_size / 2**20:.1f} / "
+                f"{stats.disk_budget / 2**20:.0f} MiB"
+            ),
+        )
+        embed.add_field(
+            name="Memory",
+            value=(
+                f"{stats.memory_size / 2**20:.1f} / "
+                f"{stats.memory_budget / 2**20:.0f} MiB"
+            ),
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def cog_unload(self):
+        for task in self._stream_tasks:
+            task.cancel()
+        await self.session_manager.close()
+        await super().cog_unload()
 
 
 async def setup(bot):
     WEBSERVER_URL = os.getenv("PIPER_WEBSERVER_URL")
     if WEBSERVER_URL:
-        await bot.add_cog(PiperCog(bot, WEBSERVER_URL))
+        phrase_cache = PhraseCache(get_transcoder(bot))
+        await bot.add_cog(
+            PiperCog(
+                bot,
+                WEBSERVER_URL,
+                ClientSessionManager(),
+                phrase_cache,
+                get_voice_session_manager(bot),
+            )
+        )
 
 
 async def teardown(bot: commands.Bot):
@@ -1,29 +1,35 @@
-import asyncio
 import os
 
 from discord import (ButtonStyle, Color, Embed, Guild, Interaction, Member,
-                     TextChannel, app_commands, utils)
-from discord.ext import commands, tasks
+                     TextChannel, app_commands)
+from discord.ext import commands
 from discord.ui import Button, Modal, TextInput, View
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
+from cog.classes.debouncer import KeyedDebouncer
+from cog.classes.hydrator import StartupHydrator
+from cog.classes.member_resolver import MemberResolver
+from cog.classes.utils import set_logger
 from manager.poll_service import PollManager
 from repository.db_config import DatabaseManager
+from repository.migrations import poll_migrations
 from repository.poll_repo import PollRepository
+from repository.read_model import PollAnswerRow
 from repository.table.poll_table import (PollAnswerModel, PollGuildModel,
                                          PollMemberAnswerModel, PollModel,
                                          VoteType)
 
-# Construct database url from environment variables
-engine = DatabaseManager.create_engine(
-    username=os.environ["P_PG_USER"],
-    password=os.environ["P_PG_PASSWORD"],
-    host=os.environ["P_PG_HOST"],
-    port=os.environ["P_PG_PORT"],
-    database_name=os.environ["P_PG_DATABASE"],
-)
-
+# The engine and session factory are created in setup() so importing this
+# extension stays cheap.
+engine: AsyncEngine | None = None
 # This is the database session factory, invoking this variable creates a new session
-async_session = DatabaseManager.create_async_session_maker(engine=engine)
+async_session: async_sessionmaker[AsyncSession] | None = None
+
+# Maximum number of poll views rebuilt at the same time on startup, bounded by the
+# connection pool size of the engine.
+HYDRATION_CONCURRENCY = 3
+# Seconds a poll message waits for more votes before it's edited
+REFRESH_WINDOW = 3.0
 
 
 class PollTransformError(app_commands.AppCommandError):
@@ -293,7 +299,7 @@ class AnswerButton(Button):
 class EditModalModal(Modal):
     def __init__(
         self,
-        answers: list[PollAnswerModel],
+        answers: list[PollAnswerRow],
         bot: commands.Bot,
         poll_id: int,
         poll_manager: PollManager,
@@ -345,7 +351,7 @@ class PollView(View):
         bot: commands.Bot,
         poll_id: int,
         question: str,
-        owner: Member,
+        owner: Member | None,
         poll_manager: PollManager,
         vote_type: VoteType,
         colour: str,
@@ -383,9 +389,13 @@ class PollView(View):
         embed = Embed(title=self.question, color=Color.from_str(self.colour))
         url = None
 
-        if self.owner.avatar is not None:
-            url = self.owner.avatar.url
-        embed.set_author(name=self.owner.name, icon_url=url)
+        if self.owner is None:
+            # Left the guild or couldn't be looked up
+            embed.set_author(name="Unknown member")
+        else:
+            if self.owner.avatar is not None:
+                url = self.owner.avatar.url
+            embed.set_author(name=self.owner.name, icon_url=url)
 
         for option in self.options:
             url_value = ""
@@ -406,13 +416,31 @@ class PollCog(commands.GroupCog, group_name="poll"):
         self,
         bot: commands.Bot,
         poll_manager: PollManager,
+        member_resolver: MemberResolver,
     ) -> None:
         self.bot = bot
         self.poll_manager = poll_manager
+        self.member_resolver = member_resolver
+        self.logger = set_logger(logger_name="poll")
+        # Votes arriving in bursts result in one message edit per poll per window
+        self.refresher: KeyedDebouncer[int] = KeyedDebouncer(
+            callback=self.refresh_poll_message,
+            window=REFRESH_WINDOW,
+            logger=self.logger,
+        )
         print("Poll Cog Loaded")
 
-    @tasks.loop(count=1, reconnect=True)
-    async def poll_button_update(self, poll_id: int):
+    async def cog_unload(self) -> None:
+        await self.refresher.close()
+        await super().cog_unload()
+
+    async def get_owner(self, poll_model: PollModel) -> Member | None:
+        guild = self.bot.get_guild(poll_model.guild_id)
+        if guild is None:
+            return None
+        return await self.member_resolver.get_member(guild, poll_model.owner_id)
+
+    async def refresh_poll_message(self, poll_id: int):
         # Reconstruct View with buttons.
         poll_model = await self.poll_manager.get_poll(poll_id)
 
@@ -420,9 +448,7 @@ class PollCog(commands.GroupCog, group_name="poll"):
             bot=self.bot,
             poll_id=poll_id,
             question=poll_model.question,
-            owner=utils.get(
-                self.bot.get_all_members(), id=poll_model.owner_id
-            ),  # type: ignore
+            owner=await self.get_owner(poll_model),
             poll_manager=self.poll_manager,
             vote_type=poll_model.vote_type,
             colour=poll_model.colour,
@@ -440,14 +466,9 @@ class PollCog(commands.GroupCog, group_name="poll"):
 
         await message.edit(embed=embed, view=poll_view)
 
-    @poll_button_update.before_loop
-    async def before_poll_button_update(self):
-        await asyncio.sleep(3)
-
     @commands.Cog.listener()
     async def on_poll_button_update(self, poll_id: int):
-        if not self.poll_button_update.is_running():
-            self.poll_button_update.start(poll_id)
+        self.refresher.schedule(poll_id)
 
     @app_commands.command(
         description="Create a poll, separate options with a comma", name="create"
@@ -476,21 +497,13 @@ class PollCog(commands.GroupCog, group_name="poll"):
             guild=interaction.guild,
             vote_type=VoteType(vote_type),
             colour=colour,
+            answers=cleaned_options,
         )
 
-        for option in cleaned_options:
-            await self.poll_manager.add_answer(
-                answer=option,
-                owner_id=interaction.user.id,
-                poll_id=poll_id,
-            )
-
         poll_view = PollView(
             bot=self.bot,
             poll_id=poll_id,
-            owner=utils.get(
-                self.bot.get_all_members(), id=interaction.user.id
-            ),  # type: ignore
+            owner=interaction.user,  # type: ignore
             question=question,
             vote_type=VoteType(vote_type),
             poll_manager=self.poll_manager,
@@ -566,7 +579,7 @@ class PollCog(commands.GroupCog, group_name="poll"):
         interaction: Interaction,
         poll_id: app_commands.Transform[int, ActivePollTransformer],
     ):
-        is_owner = self.poll_manager.get_owner_id(poll_id) == interaction.user.id
+        is_owner = await self.poll_manager.get_owner_id(poll_id) == interaction.user.id
         is_admin = interaction.guild.owner_id == interaction.user.id  # type: ignore
         if is_owner or is_admin:
             await self.poll_manager.end_poll(poll_id)
@@ -647,6 +660,18 @@ class PollCog(commands.GroupCog, group_name="poll"):
 
 
 async def setup(bot: commands.Bot):
+    global engine, async_session
+
+    # Construct database url from environment variables
+    engine = DatabaseManager.create_engine(
+        username=os.environ["P_PG_USER"],
+        password=os.environ["P_PG_PASSWORD"],
+        host=os.environ["P_PG_HOST"],
+        port=os.environ["P_PG_PORT"],
+        database_name=os.environ["P_PG_DATABASE"],
+    )
+    async_session = DatabaseManager.create_async_session_maker(engine=engine)
+
     # Create all tables if they don't exist
     await DatabaseManager.create_tables(
         engine=engine,
@@ -657,17 +682,19 @@ async def setup(bot: commands.Bot):
             PollModel,
         ],
     )
+    await poll_migrations.run(engine)
 
     poll_repository = PollRepository(async_session)
     poll_manager = PollManager(bot, poll_repository)
 
-    active_polls = await poll_repository.get_all_active_polls()
-    for poll in active_polls:
+    async def hydrate_poll_view(poll: PollModel) -> None:
         poll_view = PollView(
             bot=bot,
             poll_id=poll.id,
             question=poll.question,
-            owner=utils.get(bot.get_all_members(), id=poll.owner_id),  # type: ignore
+            # Only the buttons are registered here, the owner is looked up when
+            # the message is next refreshed
+            owner=None,
             poll_manager=poll_manager,
             vote_type=VoteType(poll.vote_type.value),
             colour=poll.colour,
@@ -676,7 +703,16 @@ async def setup(bot: commands.Bot):
         await poll_view.create_buttons()
         bot.add_view(view=poll_view, message_id=poll.message_id)
 
-    await bot.add_cog(PollCog(bot, poll_manager))
+    # Rebuild persistent views concurrently, each view needs its own answer query
+    hydrator = StartupHydrator(
+        logger=set_logger(logger_name="poll"),
+        concurrency=HYDRATION_CONCURRENCY,
+    )
+    active_polls = await poll_repository.get_all_active_polls()
+    await hydrator.run("polls", active_polls, hydrate_poll_view)
+
+    member_resolver = MemberResolver(logger=set_logger(logger_name="member_resolver"))
+    await bot.add_cog(PollCog(bot, poll_manager, member_resolver))
 
 
 async def teardown(bot: commands.Bot):
@@ -5,24 +5,20 @@ import human_readable
 from dateutil.relativedelta import relativedelta
 from discord import Interaction, app_commands
 from discord.ext import commands
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from cog.classes.utils import set_logger
 from manager.reminder_service import ReminderManager
 from repository.db_config import DatabaseManager
+from repository.migrations import reminder_migrations
 from repository.reminder_repo import ReminderRepository
 from repository.table.reminder_table import ReminderGuildModel, ReminderModel
 
-# Construct database url from environment variables
-engine = DatabaseManager.create_engine(
-    username=os.environ["R_PG_USER"],
-    password=os.environ["R_PG_PASSWORD"],
-    host=os.environ["R_PG_HOST"],
-    port=os.environ["R_PG_PORT"],
-    database_name=os.environ["R_PG_DATABASE"],
-)
-
+# The engine and session factory are created in setup() so importing this
+# extension stays cheap.
+engine: AsyncEngine | None = None
 # This is the database session factory, invoking this variable creates a new session
-async_session = DatabaseManager.create_async_session_maker(engine=engine)
+async_session: async_sessionmaker[AsyncSession] | None = None
 
 
 class ReminderCog(commands.GroupCog, group_name="reminder"):
@@ -105,6 +101,18 @@ class ReminderCog(commands.GroupCog, group_name="reminder"):
 
 
 async def setup(bot: commands.Bot) -> None:
+    global engine, async_session
+
+    # Construct database url from environment variables
+    engine = DatabaseManager.create_engine(
+        username=os.environ["R_PG_USER"],
+        password=os.environ["R_PG_PASSWORD"],
+        host=os.environ["R_PG_HOST"],
+        port=os.environ["R_PG_PORT"],
+        database_name=os.environ["R_PG_DATABASE"],
+    )
+    async_session = DatabaseManager.create_async_session_maker(engine=engine)
+
     # Create tables
     await DatabaseManager.create_tables(
         engine=engine,
@@ -113,6 +121,7 @@ async def setup(bot: commands.Bot) -> None:
             ReminderGuildModel,
         ],
     )
+    await reminder_migrations.run(engine)
 
     # Create dependencies
     reminder_repository = ReminderRepository(async_session)
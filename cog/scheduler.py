@@ -50,23 +50,33 @@ class SchedulerCog(commands.Cog):
         return min(self.schedules, key=lambda i: i.expires_at)
 
     def schedule_item(self, item: SchedulerTask) -> None:
-        if len(self.schedules) == 0:
-            self.schedules.append(item)
-            # Resume the function that gets blocked by self.has_schedule event
-            self.has_schedule.set()
-            self.logger.info(
-                f"Scheduler has now resumed as an item with ID: {item.id} has been added."
-            )
-            return
+        self.schedule_items([item])
 
-        # If replace attribute is True, find old id and replace it.
-        if item.replace is True:
-            self.remove_schedule(item=item)
-
-        self.schedules.append(item)
-        self.logger.info(f"Item with ID: {item.id} has been added.")
+    def schedule_items(self, items: list[SchedulerTask]) -> None:
+        """Adds every item at once, restarting the scheduler at most one time."""
+        if len(items) == 0:
+            return
+        was_empty = len(self.schedules) == 0
+
+        for item in items:
+            # If replace attribute is True, find old id and replace it.
+            if item.replace is True:
+                self.remove_schedule(item=item)
+        self.schedules.extend(items)
+        # Resume the function that gets blocked by self.has_schedule event
+        self.has_schedule.set()
+
+        added = (
+            f"Item with ID: {items[0].id} has been added."
+            if len(items) == 1
+            else f"{len(items)} items have been added."
+        )
+        if was_empty:
+            self.logger.info(f"Scheduler has now resumed. {added}")
+            return
+        self.logger.info(added)
 
-        if self.current_schedule is not None and item < self.current_schedule:
+        if self.current_schedule is not None and min(items) < self.current_schedule:
             # Restart scheduler if theres a task with a closer expiry time.
             self.task.cancel()
             self.logger.info(f"Current task has been canceled, restarting schduler.")
@@ -1,32 +1,62 @@
+import os
 from pathlib import Path
+from typing import Literal
 
 import aiohttp
 import discord
-from discord import (CategoryChannel, FFmpegPCMAudio, Interaction, Member,
+from discord import (FFmpegPCMAudio, Interaction, Member,
                      PCMVolumeTransformer, VoiceChannel, VoiceClient,
                      VoiceState, app_commands)
 from discord.ext import commands
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from cog.classes.soundboard.control_panel import ControlPanelView
-from view.soundboard.sound_board import SoundBoardView, SoundButton
+from cog.classes.soundboard.opus_cache import OpusCache
+from cog.classes.soundboard.transcoder import get_transcoder
+from cog.classes.voice_session import (VoiceSessionManager,
+                                        get_voice_session_manager)
+from manager.soundboard_page_service import SoundboardPageManager
+from manager.soundboard_service import SoundboardManager
+from repository.db_config import DatabaseManager
+from repository.soundboard_repo import SoundboardRepository
+from repository.table.soundboard_table import SoundbiteModel, SoundboardPageModel
 from view.soundboard.streamable_submission import StreamableSubmission
-from view.soundboard.upload_submission import UploadSubmission
+from view.soundboard.upload_submission import (DEFAULT_MAX_UPLOAD_SIZE,
+                                               UploadSubmission)
+
+# The engine and session factory are created in setup() so importing this
+# extension stays cheap.
+engine: AsyncEngine | None = None
+# This is the database session factory, invoking this variable creates a new session
+async_session: async_sessionmaker[AsyncSession] | None = None
 
 
 class SoundBoardCog(commands.GroupCog, name="soundboard"):
-    def __init__(self, bot: commands.Bot):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        soundboard_manager: SoundboardManager,
+        page_manager: SoundboardPageManager,
+        voice_session_manager: VoiceSessionManager,
+        max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+    ):
         self.bot: commands.Bot = bot
-        self.soundboard_channel: discord.TextChannel | None = None
+        self.soundboard_manager = soundboard_manager
+        self.page_manager = page_manager
+        self.voice_session_manager = voice_session_manager
+        self.max_upload_size = max_upload_size
         self.ffmpeg_path = Path("ffmpeg.exe")
 
         # Creates partially persistent view when cog is loaded
         self.bot.add_view(view=ControlPanelView(bot=self.bot))
 
-        # Creates partially persistent view when cog is loaded
-        for view in self.create_soundboard_view():
-            # Will only add view if it already exist
-            # TODO: Use db to store differences to determine if view needs to be updated
-            self.bot.add_view(view=view)
+        # Transcode soundbites missing from the opus cache in the background,
+        # they play through ffmpeg until then.
+        self.warm_task = self.bot.loop.create_task(
+            self.soundboard_manager.opus_cache.warm(
+                self.soundboard_manager.get_paths()
+            )
+        )
 
         print("SoundBoardCog loaded")
 
@@ -53,46 +83,33 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
     async def on_soundboard_play(self, interaction: Interaction, custom_id: str):
         """Custom listener for when bot is going to play audio."""
 
-        # Fetch voice client
         if not interaction.guild:
             raise ValueError("Interaction does not have a guild.")
 
-        voice_client = interaction.guild.voice_client
-
         assert isinstance(interaction.user, Member)
         assert isinstance(interaction.user.voice, VoiceState)
         assert isinstance(interaction.user.voice.channel, VoiceChannel)
 
-        # Check if bot is connected to a voice channel
-        if not voice_client:
-            voice_client = await interaction.user.voice.channel.connect()
-
-        # Check if bot is in the same voice channel as the user
-        if self.bot.user not in interaction.channel.members:  # type: ignore
-            voice_client = await interaction.user.voice.channel.connect()
-
-        if not voice_client:
-            return ValueError("Voice client could not be connected.")
-
-        assert isinstance(voice_client, VoiceClient)
-
-        if voice_client.is_playing():
-            voice_client.stop()
+        soundbite = self.soundboard_manager.get_soundbite(custom_id)
+        if soundbite is None:
+            return
 
-        # Prepare audio source
-        file_path = Path(f"data/sound_bites/{custom_id}.mp3")
-        source = PCMVolumeTransformer(
-            FFmpegPCMAudio(
-                source=file_path,  # type: ignore
-            ),
-            volume=0.55,
+        # Prepare audio source, pre-encoded opus frames skip ffmpeg entirely
+        file_path = Path(soundbite.path)
+        source = await self.soundboard_manager.opus_cache.get_source(
+            file_path, play_count=soundbite.play_count
         )
+        if source is None:
+            source = PCMVolumeTransformer(
+                FFmpegPCMAudio(
+                    source=file_path,  # type: ignore
+                ),
+                volume=0.55,
+            )
 
-        assert interaction.channel is not None
-
-        voice_client.play(  # type: ignore
-            source=source,
-        )
+        # Connection is reused, or moved if the user is in another channel
+        await self.voice_session_manager.play(interaction.user.voice.channel, source)
+        await self.soundboard_manager.record_play(custom_id)
 
     @commands.Cog.listener()
     async def on_soundboard_disconnect(self, interaction: Interaction):
@@ -101,18 +118,7 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
         if not interaction.guild:
             raise ValueError("Interaction does not have a guild.")
 
-        voice_client = interaction.guild.voice_client
-
-        if not voice_client:
-            return
-
-        assert isinstance(voice_client, VoiceClient)
-
-        if voice_client.is_playing():
-            voice_client.stop()
-
-        await voice_client.disconnect(force=False)
-        voice_client.cleanup()
+        await self.voice_session_manager.disconnect(interaction.guild)
 
     @commands.Cog.listener()
     async def on_soundboard_stop(self, interaction: Interaction):
@@ -121,72 +127,34 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
         if not interaction.guild:
             raise ValueError("Interaction does not have a guild.")
 
-        if interaction.guild.voice_client is None:
-            return
-
-        if voice_client.is_playing():  # type: ignore
-            voice_client.stop()  # type: ignore
-
-    def create_soundboard_view(self) -> list[SoundBoardView]:
-        soundboard_view_list = []
-        view = SoundBoardView()
-        count = 1
-        file_generator = Path("data/sound_bites").iterdir()
-
-        # Sort all at once for now. TODO: Use database later.
-        sorted_files = sorted(file_generator, key=lambda a: a.name)
-
-        for file in sorted_files:
-            view.add_item(SoundButton(self.bot, file.stem))
-            count += 1
-            # If there are more than 25 buttons, create a new view
-            if count == 25:
-                soundboard_view_list.append(view)
-                view = SoundBoardView()
-                count = 0
-        else:  # Send the last view
-            soundboard_view_list.append(view)
-        return soundboard_view_list
+        self.voice_session_manager.stop(interaction.guild)
 
     @commands.Cog.listener()
-    async def on_soundboard_update(self, interaction: Interaction):
-        if not interaction.guild:
-            raise ValueError("Interaction does not have a guild.")
-
-        # Find if category channel exists
-        category: CategoryChannel | None = discord.utils.find(  # type: ignore
-            lambda c: c.name == "soundboard" and isinstance(c, discord.CategoryChannel),
-            interaction.guild.channels,
+    async def on_soundboard_stats(self, interaction: Interaction):
+        """Custom listener for when the audio cache stats are requested."""
+        stats = self.soundboard_manager.opus_cache.hot_cache.stats()
+        embed = discord.Embed(
+            title="Soundboard Cache",
+            color=discord.Colour.blurple(),
         )
-
-        if category is None:
-            category = await interaction.guild.create_category("soundboard")
-
-        # Clone channel to delete old views
-        channel = discord.utils.find(
-            lambda c: c.name == "page-1" and isinstance(c, discord.TextChannel),
-            interaction.guild.channels,
+        embed.add_field(name="Hit Rate", value=f"{stats.hit_rate:.1%}")
+        embed.add_field(name="Hits / Misses", value=f"{stats.hits} / {stats.misses}")
+        embed.add_field(name="Soundbites", value=str(stats.entries))
+        embed.add_field(
+            name="Memory",
+            value=f"{stats.size / 2**20:.1f} / {stats.budget / 2**20:.0f} MiB",
         )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
-        if channel is None:
-            new_channel = await interaction.guild.create_text_channel(
-                name="page-1", category=category
-            )
-            self.soundboard_channel = new_channel
-        else:
-            new_channel = await channel.clone()
-            await channel.delete()
-
-        control_panel_view = ControlPanelView(self.bot)
-        soundboard_view_list = self.create_soundboard_view()
-
-        await new_channel.send(view=control_panel_view)
+    @commands.Cog.listener()
+    async def on_soundboard_update(
+        self, interaction: Interaction, rebuild: bool = False
+    ):
+        if not interaction.guild:
+            raise ValueError("Interaction does not have a guild.")
 
-        for view in soundboard_view_list:
-            if isinstance(new_channel, discord.TextChannel):
-                await new_channel.send(
-                    view=view,
-                )
+        # Only page messages whose buttons changed are edited
+        await self.page_manager.update(interaction.guild, rebuild=rebuild)
 
         # Confirmation message
         if interaction is not None:
@@ -205,8 +173,18 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
             )
             return
 
+        # Rejected from the attachment metadata before anything is downloaded
+        if file.size > self.max_upload_size:
+            size_limit = self.max_upload_size // 2**20
+            await interaction.response.send_message(
+                content=f"File is larger than {size_limit}mb.", ephemeral=True
+            )
+            return
+
         await interaction.response.send_modal(
-            UploadSubmission(self.bot, file),
+            UploadSubmission(
+                self.bot, file, self.soundboard_manager, self.max_upload_size
+            ),
         )
 
     @app_commands.command(description="Manually update soundboard", name="update")
@@ -216,30 +194,24 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
     async def file_search(
         self, interaction: Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
-        list_of_files = []
-        count = 0
-        for file in Path("data/sound_bites").iterdir():
-            if file.stem.startswith(current):
-                list_of_files.append(
-                    app_commands.Choice(name=file.stem, value=file.stem)
-                )
-                count += 1
-                # Autocomplete only works with 25 choices
-                if count == 25:
-                    break
-        return list_of_files
+        # Autocomplete only works with 25 choices
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.soundboard_manager.search(current, limit=25)
+        ]
 
     @app_commands.command(description="Play soundbite", name="play")
     @app_commands.autocomplete(name=file_search)
     async def play(self, interaction: Interaction, name: str):
-        self.bot.dispatch("play", interaction, name)
+        await interaction.response.send_message(
+            content=f"Playing {name}.", ephemeral=True
+        )
+        self.bot.dispatch("soundboard_play", interaction, name)
 
     @app_commands.command(description="Delete soundbite", name="delete")
     @app_commands.autocomplete(name=file_search)
     async def delete(self, interaction: Interaction, name: str):
-        filename = Path(f"data/sound_bites/{name}.mp3")
-        if filename.is_file():
-            filename.unlink()
+        if await self.soundboard_manager.remove_soundbite(name):
             self.bot.dispatch("soundboard_update", interaction)
         else:
             await interaction.response.send_message(
@@ -262,7 +234,7 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
                 if not interaction.guild:
                     raise ValueError("Interaction does not have a guild.")
                 try:
-                    await interaction.guild.voice_client.disconnect()  # type: ignore
+                    await self.voice_session_manager.disconnect(interaction.guild)
                 except Exception as e:
                     print(e)
                 await interaction.response.send_message(
@@ -273,6 +245,20 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
                 content="Bearbot is not connected to a voice channel.", ephemeral=True
             )
 
+    @app_commands.command(
+        description="Interrupt the current soundbite or queue after it", name="mode"
+    )
+    async def mode(
+        self, interaction: Interaction, mode: Literal["interrupt", "queue"]
+    ):
+        if not interaction.guild:
+            raise ValueError("Interaction does not have a guild.")
+
+        self.voice_session_manager.get_session(interaction.guild).mode = mode
+        await interaction.response.send_message(
+            content=f"Soundboard will now {mode} playback.", ephemeral=True
+        )
+
     @app_commands.command(
         description="Create soundbite from Streamable URL", name="streamable"
     )
@@ -301,7 +287,9 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
             )
         else:
             await interaction.response.send_modal(
-                StreamableSubmission(self.bot, video_url, file_name),
+                StreamableSubmission(
+                    self.bot, video_url, file_name, self.soundboard_manager
+                ),
             )
 
     @app_commands.command(
@@ -309,17 +297,59 @@ class SoundBoardCog(commands.GroupCog, name="soundboard"):
         name="createsoundboardchannel",
     )
     async def create_soundboard_channel(self, interaction: Interaction):
-        self.bot.dispatch("soundboard_update", interaction)
+        self.bot.dispatch("soundboard_update", interaction, True)
 
     async def cog_unload(self):
-        if self.soundboard_channel is not None:
-            await self.soundboard_channel.delete()
+        self.warm_task.cancel()
         await super().cog_unload()
 
 
 async def setup(bot):
-    await bot.add_cog(SoundBoardCog(bot))
+    global engine, async_session
+
+    # Construct database url from environment variables
+    engine = DatabaseManager.create_engine(
+        username=os.getenv("SB_PG_USER") or os.environ["PG_USER"],
+        password=os.getenv("SB_PG_PASSWORD") or os.environ["PG_PASSWORD"],
+        host=os.getenv("SB_PG_HOST") or os.environ["PG_HOST"],
+        port=os.getenv("SB_PG_PORT") or os.environ["PG_PORT"],
+        database_name=os.getenv("SB_PG_DATABASE") or os.environ["PG_DATABASE"],
+    )
+    async_session = DatabaseManager.create_async_session_maker(engine=engine)
+
+    # Create tables
+    await DatabaseManager.create_tables(
+        engine=engine, tables=[SoundbiteModel, SoundboardPageModel]
+    )
+
+    # Create dependencies, the index has to be loaded before views are created
+    soundboard_repository = SoundboardRepository(async_session)
+    transcoder = get_transcoder(bot)
+    soundboard_manager = SoundboardManager(
+        soundboard_repository, OpusCache(transcoder), transcoder
+    )
+    await soundboard_manager.load()
+    page_manager = SoundboardPageManager(
+        bot=bot, repository=soundboard_repository, soundboard_manager=soundboard_manager
+    )
+    # Page buttons stay persistent across restarts
+    await page_manager.register_views()
+    max_upload_mb = os.getenv("SB_MAX_UPLOAD_MB")
+    max_upload_size = (
+        int(max_upload_mb) * 2**20 if max_upload_mb else DEFAULT_MAX_UPLOAD_SIZE
+    )
+    await bot.add_cog(
+        SoundBoardCog(
+            bot,
+            soundboard_manager,
+            page_manager,
+            get_voice_session_manager(bot),
+            max_upload_size,
+        )
+    )
 
 
 async def teardown(bot):
-    await bot.remove_cog(SoundBoardCog(bot))
+    cog = bot.get_cog("soundboard")
+    if isinstance(cog, commands.Cog):
+        await bot.remove_cog(cog.__cog_name__)
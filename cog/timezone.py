@@ -1,34 +1,32 @@
-from datetime import datetime
 import os
 from discord.ext import commands
 from discord import Colour, Embed, Interaction, User, app_commands
-import pytz
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from cog.classes.utils import set_logger
+from cog.classes.zone_engine import zone_engine
 
-from manager.timezone_service import TimezoneManager
+from manager.timezone_service import TimezoneGroup, TimezoneManager
 from repository.db_config import DatabaseManager
+from repository.migrations import timezone_migrations
 from repository.table.timezone_table import TimezoneGuildModel, TimezoneUserModel
 from repository.timezone_repo import TimezoneRepository
 
-# Construct database url from environment variables
-engine = DatabaseManager.create_engine(
-    username=os.getenv("TZ_PG_USER") or os.environ["PG_USER"],
-    password=os.getenv("TZ_PG_PASSWORD") or os.environ["PG_PASSWORD"],
-    host=os.getenv("TZ_PG_HOST") or os.environ["PG_HOST"],
-    port=os.getenv("TZ_PG_PORT") or os.environ["PG_PORT"],
-    database_name=os.environ["TZ_PG_DATABASE"],
-)
-
+# The engine and session factory are created in setup() so importing this
+# extension stays cheap.
+engine: AsyncEngine | None = None
 # This is the database session factory, invoking this variable creates a new session
-async_session = DatabaseManager.create_async_session_maker(engine=engine)
+async_session: async_sessionmaker[AsyncSession] | None = None
+
+FIELD_VALUE_LIMIT = 1024
+FIELD_COUNT_LIMIT = 25
+EMBEDS_PER_MESSAGE = 10
+# Total characters across every embed of a message
+EMBED_LIMIT = 6000
 
 
 def get_available_timezones() -> list[str]:
     """Function that returns the cached list of timezones from the zoneinfo module."""
-    if not hasattr(get_available_timezones, "cached_timezones"):
-        get_available_timezones.cached_timezones = list(
-            pytz.all_timezones)
-    return get_available_timezones.cached_timezones
+    return zone_engine.available_zones()
 
 
 class TimezoneTransformer(app_commands.Transformer):
@@ -43,8 +41,8 @@ class TimezoneTransformer(app_commands.Transformer):
     async def autocomplete(
         self, interaction: Interaction, value: int | float | str, /
     ) -> list[app_commands.Choice[int | float | str]]:
-        # Get all available timezone info, from tzdata package (Windows) or system timezones data (mac/linux).
-        # This is all handled by Python's zoneinfo module.
+        # Get all available timezone info, from tzdata package (Windows) or system
+        # timezones data (mac/linux). This is all handled by Python's zoneinfo module.
         list_of_time = get_available_timezones()
         # Treat value given as substring and not just a prefix
         substring = str(value).lower()
@@ -57,6 +55,54 @@ class TimezoneTransformerError(app_commands.AppCommandError):
     pass
 
 
+def format_offset(offset: int) -> str:
+    sign = "+" if offset >= 0 else "-"
+    hours, minutes = divmod(abs(offset) // 60, 60)
+    return f"UTC{sign}{hours:02}:{minutes:02}"
+
+
+def create_roster_messages(roster: list[TimezoneGroup]) -> list[list[Embed]]:
+    """Packs one field per UTC offset into as few embeds and messages as Discord's
+    limits allow."""
+    times = zone_engine.now_in([group.timezones[0][0] for group in roster])
+    title = "All Timezones Registered in Server"
+    messages: list[list[Embed]] = []
+    # Characters used by the embeds of the last message
+    size = 0
+
+    for group in roster:
+        timezone = group.timezones[0][0]
+        local_time = times[timezone].strftime("%#I:%M %p %d/%m/%Y")
+        name = f"{format_offset(group.offset)} | {local_time}"
+        value = ""
+        for index, (timezone, count) in enumerate(group.timezones):
+            line = f"{timezone} ({count})\n"
+            remaining = len(group.timezones) - index
+            if len(value) + len(line) > FIELD_VALUE_LIMIT - 24:
+                value += f"...and {remaining} more"
+                break
+            value += line
+
+        # Room is kept for the title and the footer added at the end
+        if not messages or size + len(name) + len(value) > EMBED_LIMIT - 100:
+            messages.append([Embed(title=title, colour=Colour.dark_gold())])
+            size = len(title)
+        elif len(messages[-1][-1].fields) == FIELD_COUNT_LIMIT:
+            if len(messages[-1]) == EMBEDS_PER_MESSAGE:
+                messages.append([])
+                size = 0
+            messages[-1].append(Embed(colour=Colour.dark_gold()))
+        messages[-1][-1].add_field(name=name, value=value, inline=False)
+        size += len(name) + len(value)
+
+    if messages:
+        members = sum(group.member_count for group in roster)
+        timezones = sum(len(group.timezones) for group in roster)
+        messages[-1][-1].set_footer(
+            text=f"{members} members across {timezones} timezones")
+    return messages
+
+
 class TimezoneCog(commands.GroupCog, group_name="timezone"):
     def __init__(self, bot: commands.Bot, timezone_manager: TimezoneManager):
         self.bot: commands.Bot = bot
@@ -85,7 +131,9 @@ class TimezoneCog(commands.GroupCog, group_name="timezone"):
             await interaction.response.send_message(
                 embed=Embed(
                     title="Timezone Registered",
-                    description=f"{interaction.user.display_name.capitalize()} is now registered with timezone: {timezone}",
+                    description=(
+                        f"{interaction.user.display_name.capitalize()} is now "
+                        f"registered with timezone: {timezone}"),
                     color=Colour.dark_gold()
                 ).set_footer(text=f"[ID: {id}]")
             )
@@ -105,7 +153,8 @@ class TimezoneCog(commands.GroupCog, group_name="timezone"):
                 user_id=interaction.user.id,
             )
             self.logger.info(
-                f"{interaction.user.display_name} has requested their timezone of {timezone}")
+                f"{interaction.user.display_name} has requested their timezone "
+                f"of {timezone}")
             await interaction.response.send_message(
                 embed=Embed(
                     title=f"{interaction.user.display_name.capitalize()}'s Timezone",
@@ -131,21 +180,25 @@ class TimezoneCog(commands.GroupCog, group_name="timezone"):
                 timezone=timezone
             )
 
-            datetime_now = datetime.now(pytz.timezone('UTC'))
-            old_datetime = self.timezone_manager.convert_datetime(
-                datetime=datetime_now, timezone=change_tuple[0])
-            new_datetime = self.timezone_manager.convert_datetime(
-                datetime=datetime_now, timezone=change_tuple[1])
+            times = zone_engine.now_in(change_tuple)
+            old_datetime = times[change_tuple[0]]
+            new_datetime = times[change_tuple[1]]
 
             self.logger.info(
-                f"{interaction.user.display_name} has changed timezones from {change_tuple[0]} to {change_tuple[1]}")
-            
-            formatted_timedelta, _, descriptor = self.timezone_manager.get_datetime_difference(old_datetime, new_datetime)
+                f"{interaction.user.display_name} has changed timezones from "
+                f"{change_tuple[0]} to {change_tuple[1]}")
+
+            formatted_timedelta, _, descriptor = (
+                self.timezone_manager.get_datetime_difference(
+                    old_datetime, new_datetime))
 
             await interaction.response.send_message(
                 embed=Embed(
                     title="Timezone Changed",
-                    description=f"{interaction.user.display_name.capitalize()} has changed registered timezone from: {change_tuple[0]} to {change_tuple[1]}",
+                    description=(
+                        f"{interaction.user.display_name.capitalize()} has changed "
+                        f"registered timezone from: {change_tuple[0]} to "
+                        f"{change_tuple[1]}"),
                     color=Colour.dark_gold()
                 ).set_footer(text=f"Difference: {formatted_timedelta} {descriptor}")
             )
@@ -157,60 +210,42 @@ class TimezoneCog(commands.GroupCog, group_name="timezone"):
         description="Show all times across registered timezones"
     )
     async def show_all_times(self, interaction: Interaction) -> None:
-        list_of_timezones = await self.timezone_manager.get_all_registered_timezones(interaction.guild_id)
+        roster = await self.timezone_manager.get_roster(interaction.guild_id)
         self.logger.info(
-            f"{interaction.user.display_name} has requested all {list_of_timezones=}")
-        datetime_now = datetime.now(pytz.timezone('UTC'))
-
-        page = 1
-        title = f"All Timezones Registered in Server | #{page}"
-        count = 0
+            f"{interaction.user.display_name} has requested all {len(roster)} "
+            "timezone groups")
 
         try:
-            embed = Embed(title=title, colour=Colour.dark_gold())
-            for timezone in list_of_timezones:
-                if count == 25:
-                    if interaction.response.is_done():
-                        await interaction.channel.send(
-                            embed=embed
-                        )
-                    else:
-                        await interaction.response.send_message(embed=embed)
-                    count = 0
-                    page += 1
-                    self.logger.info(
-                        f"25 field limit has been reached, creating new embed with page number {page}")
-                    embed = Embed(title=title, colour=Colour.dark_gold())
-
-                embed.add_field(
-                    name=timezone,
-                    value=self.timezone_manager.convert_datetime(
-                        datetime_now, timezone).strftime('%#I:%M %p %d/%m/%Y'),
-                    inline=False,
-                )
-                count += 1
-            else:
-                if interaction.response.is_done():
-                    await interaction.channel.send(
-                        embed=embed
-                    )
-                else:
-                    await interaction.response.send_message(embed=embed)
-
+            messages = create_roster_messages(roster)
+            if not messages:
+                await interaction.response.send_message(
+                    "No timezones are registered in this server")
+                return
+            await interaction.response.send_message(embeds=messages[0])
+            for embeds in messages[1:]:
+                await interaction.followup.send(embeds=embeds)
         except Exception as e:
-            await interaction.response.send_message(e.args[0])
+            if interaction.response.is_done():
+                await interaction.followup.send(e.args[0])
+            else:
+                await interaction.response.send_message(e.args[0])
 
     @app_commands.command(
         name="compare",
         description="Compare times with another person"
     )
     async def show_time(self, interaction: Interaction, user: User) -> None:
-        comparer_tz, comparer_dt, comparee_tz, comparee_dt = await self.timezone_manager.compare_timezones(comparer_id=interaction.user.id, comparee_id=user.id)
-        formatted_timedelta, _, descriptor = self.timezone_manager.get_datetime_difference(comparer_dt, comparee_dt)
-        footer = f"{user.display_name.capitalize()}'s time is {formatted_timedelta} {descriptor}"
+        comparer_tz, comparer_dt, comparee_tz, comparee_dt = (
+            await self.timezone_manager.compare_timezones(
+                comparer_id=interaction.user.id, comparee_id=user.id))
+        formatted_timedelta, _, descriptor = (
+            self.timezone_manager.get_datetime_difference(comparer_dt, comparee_dt))
+        footer = (f"{user.display_name.capitalize()}'s time is "
+                  f"{formatted_timedelta} {descriptor}")
 
         self.logger.info(
-            f"{interaction.user.display_name} is comparing time with {user.display_name}")
+            f"{interaction.user.display_name} is comparing time with "
+            f"{user.display_name}")
         self.logger.info(
             f"{comparer_tz=}| {comparer_dt=}, {comparee_tz=}| {comparee_dt}=")
         self.logger.info(f"Footer constructed: {footer}")
@@ -220,7 +255,8 @@ class TimezoneCog(commands.GroupCog, group_name="timezone"):
                 title="Comparing Times",
                 color=Colour.dark_gold()
             ).add_field(
-                name=f"{interaction.user.display_name.capitalize()}'s Timezone is {comparer_tz}",
+                name=(f"{interaction.user.display_name.capitalize()}'s Timezone "
+                      f"is {comparer_tz}"),
                 value=f"{comparer_dt.strftime('%#I:%M %p')}"
             ).add_field(
                 name=f"{user.display_name.capitalize()}'s Timezone is {comparee_tz}",
@@ -233,6 +269,18 @@ class TimezoneCog(commands.GroupCog, group_name="timezone"):
 
 
 async def setup(bot: commands.Bot):
+    global engine, async_session
+
+    # Construct database url from environment variables
+    engine = DatabaseManager.create_engine(
+        username=os.getenv("TZ_PG_USER") or os.environ["PG_USER"],
+        password=os.getenv("TZ_PG_PASSWORD") or os.environ["PG_PASSWORD"],
+        host=os.getenv("TZ_PG_HOST") or os.environ["PG_HOST"],
+        port=os.getenv("TZ_PG_PORT") or os.environ["PG_PORT"],
+        database_name=os.environ["TZ_PG_DATABASE"],
+    )
+    async_session = DatabaseManager.create_async_session_maker(engine=engine)
+
     # Create tables
     await DatabaseManager.create_tables(
         engine=engine,
@@ -241,6 +289,7 @@ async def setup(bot: commands.Bot):
             TimezoneUserModel
         ]
     )
+    await timezone_migrations.run(engine)
     # Create dependencies
     timezone_repository = TimezoneRepository(async_session)
     timezone_manager = TimezoneManager(bot=bot, repository=timezone_repository)
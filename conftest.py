@@ -1,13 +1,19 @@
 import asyncio
 import os
+from typing import Awaitable, Callable
 
 import pytest
 import pytest_asyncio
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import (AsyncSession, async_sessionmaker,
+                                    create_async_engine)
 from sqlalchemy.orm import sessionmaker
 
 from repository.db_config import Base
+from repository.migrations import (game_migrations, poll_migrations,
+                                   reminder_migrations, timezone_migrations)
+from repository.poll_repo import PollRepository
+from repository.table.poll_table import PollGuildModel, VoteType
 
 """These fixtures are used to create a database for testing purposes. For now it tests
     the lobby cog feature. Change these to make the fixures more generalised for other 
@@ -55,3 +61,65 @@ async def session(engine):
         )
         yield async_session
         await conn.rollback()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def database(engine) -> async_sessionmaker[AsyncSession]:
+    """Sessions checking their own connections out of the engine pool, for tests
+    that commit, race each other or count connections. The tables are created and
+    migrated to the latest version."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    for runner in [
+        reminder_migrations,
+        poll_migrations,
+        game_migrations,
+        timezone_migrations,
+    ]:
+        await runner.run(engine)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture(scope="session")
+def create_poll_guild(database) -> Callable[..., Awaitable[int]]:
+    """Factory for poll guilds, an existing guild is reused."""
+
+    async def create(guild_id: int = 1, name: str = "test_guild") -> int:
+        async with database() as session:
+            if await session.get(PollGuildModel, guild_id) is None:
+                session.add(PollGuildModel(id=guild_id, name=name))
+                await session.commit()
+        return guild_id
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def create_poll(
+    database, create_poll_guild
+) -> Callable[..., Awaitable[tuple[int, list[int]]]]:
+    """Factory for polls with answers, returns the poll id and the answer ids."""
+
+    async def create(
+        vote_type: VoteType = VoteType.SINGLE_VOTE,
+        guild_id: int = 1,
+        question: str = "test_question",
+        answers: tuple[str, ...] = ("first", "second", "third"),
+    ) -> tuple[int, list[int]]:
+        await create_poll_guild(guild_id)
+        repository = PollRepository(database)
+        poll_id = await repository.create_poll(
+            colour="blue",
+            guild_id=guild_id,
+            owner_id=1,
+            question=question,
+            vote_type=vote_type,
+        )
+        answer_ids = [
+            await repository.add_poll_answer(answer=answer, poll_id=poll_id, owner_id=1)
+            for answer in answers
+        ]
+        return poll_id, answer_ids
+
+    return create
+
@@ -0,0 +1,19 @@
+class TranscodeError(Exception):
+    """Occurs when ffmpeg or ffprobe exits with an error."""
+
+    def __init__(self, command: str, returncode: int | None, stderr: str):
+        self.message = f"{command} exited with {returncode}: {stderr.strip()[-500:]}"
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class UploadTooLarge(Exception):
+    """Occurs when a download goes over the maximum upload size."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.message = f"Download is larger than {max_size} bytes"
+
+    def __str__(self) -> str:
+        return self.message
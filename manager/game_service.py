@@ -1,9 +1,8 @@
-from collections.abc import Sequence
-
 import discord
 
 from embeds.game_embed import GameEmbedManager
 from repository.game_repo import GamePostgresRepository
+from repository.read_model import GameRow
 from repository.table.game_lobby_tables import GameModel
 
 
@@ -61,7 +60,7 @@ class GameManager:
         """Get game from list"""
         return await self._get_repository().get_game(game_id)
 
-    async def get_all_games_by_guild_id(self, guild_id: int) -> Sequence[GameModel]:
+    async def get_all_games_by_guild_id(self, guild_id: int) -> list[GameRow]:
         """Get all games names and id from list of GameModels"""
         return await self._get_repository().get_all_games_by_guild_id(guild_id)
 
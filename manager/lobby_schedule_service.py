@@ -0,0 +1,231 @@
+import asyncio
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from discord.ext import commands
+
+from api.api_exceptions import LobbiesNotFound
+from cog.classes.lobby.lobby_cleaner import LobbyCleaner
+from cog.classes.scheduler_task import SchedulerTask
+from cog.classes.utils import set_logger
+from cog.scheduler import SchedulerCog
+from manager.lobby_service import LobbyManager
+from repository.lobby_schedule_repo import (
+    LobbyScheduleRepository,
+    MemoryLobbyScheduleRepository,
+)
+from repository.table.lobby_schedule_table import LobbyScheduleModel
+
+DEFAULT_CLEANUP_TIME = time(5, 0)
+DEFAULT_TIMEZONE = "Pacific/Auckland"
+# Guilds without a schedule are spread over this window after the default time
+DEFAULT_SPREAD_MINUTES = 60
+# Bounds for how often guilds with an idle threshold are swept
+MIN_IDLE_SWEEP_INTERVAL = timedelta(minutes=5)
+MAX_IDLE_SWEEP_INTERVAL = timedelta(hours=1)
+
+
+class LobbyScheduleManager:
+    """Schedules a daily clean up and an optional idle sweep per guild through the
+    SchedulerCog."""
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        repository: LobbyScheduleRepository | MemoryLobbyScheduleRepository,
+        lobby_manager: LobbyManager,
+        lobby_cleaner: LobbyCleaner,
+    ) -> None:
+        self.bot = bot
+        self.repository = repository
+        self.lobby_manager = lobby_manager
+        self.lobby_cleaner = lobby_cleaner
+        self.logger = set_logger("lobby_schedule_manager")
+        # Scheduler removes tasks by id once they've run, so every occurrence gets a
+        # unique id and the current one is tracked here to allow rescheduling.
+        self._cleanup_tasks: dict[int, SchedulerTask] = {}
+        self._idle_tasks: dict[int, SchedulerTask] = {}
+        self._running: set[asyncio.Task] = set()
+
+    def _get_scheduler(self) -> SchedulerCog:
+        scheduler = self.bot.get_cog("SchedulerCog")
+        if scheduler is None:
+            raise ValueError("SchedulerCog is not active or loaded.")
+        return scheduler  # type: ignore
+
+    @staticmethod
+    def _default_schedule(guild_id: int, guild_name: str) -> LobbyScheduleModel:
+        offset = timedelta(minutes=guild_id % DEFAULT_SPREAD_MINUTES)
+        cleanup_time = (
+            datetime.combine(datetime.min, DEFAULT_CLEANUP_TIME) + offset
+        ).time()
+        return LobbyScheduleModel(
+            id=guild_id,
+            name=guild_name,
+            cleanup_time=cleanup_time,
+            timezone=DEFAULT_TIMEZONE,
+        )
+
+    @staticmethod
+    def next_run_time(schedule: LobbyScheduleModel) -> datetime:
+        """Next occurrence of the schedule as a naive local datetime, the same form
+        the reminders give to the scheduler."""
+        timezone = ZoneInfo(schedule.timezone)
+        now = datetime.now(timezone)
+        next_run = datetime.combine(now.date(), schedule.cleanup_time, tzinfo=timezone)
+        # A minute of slack so an occurrence that fires early is not scheduled twice.
+        if next_run <= now + timedelta(minutes=1):
+            next_run = datetime.combine(
+                now.date() + timedelta(days=1), schedule.cleanup_time, tzinfo=timezone
+            )
+        return next_run.astimezone().replace(tzinfo=None)
+
+    @staticmethod
+    def idle_sweep_interval(idle_minutes: int) -> timedelta:
+        return min(
+            max(timedelta(minutes=idle_minutes) / 2, MIN_IDLE_SWEEP_INTERVAL),
+            MAX_IDLE_SWEEP_INTERVAL,
+        )
+
+    async def get_schedule(self, guild_id: int, guild_name: str) -> LobbyScheduleModel:
+        schedule = await self.repository.get_schedule(guild_id)
+        return schedule or self._default_schedule(guild_id, guild_name)
+
+    async def populate_scheduler(self) -> None:
+        await self.bot.wait_until_ready()
+        stored = await self.repository.get_all_schedules()
+        schedules = {schedule.id: schedule for schedule in stored}
+        self.schedule_guilds(
+            [
+                schedules.get(guild.id)
+                or self._default_schedule(guild.id, guild.name)
+                for guild in self.bot.guilds
+            ]
+        )
+
+    async def set_schedule(
+        self,
+        guild_id: int,
+        guild_name: str,
+        cleanup_time: time,
+        timezone: str,
+        idle_minutes: int | None,
+    ) -> LobbyScheduleModel:
+        schedule = await self.repository.set_schedule(
+            guild_id=guild_id,
+            guild_name=guild_name,
+            cleanup_time=cleanup_time,
+            timezone=timezone,
+            idle_minutes=idle_minutes,
+        )
+        self.schedule_guild(schedule)
+        return schedule
+
+    def schedule_guild(self, schedule: LobbyScheduleModel) -> None:
+        self.schedule_guilds([schedule])
+
+    def schedule_guilds(self, schedules: list[LobbyScheduleModel]) -> None:
+        """Replaces the tasks of every guild, the scheduler is given all new tasks
+        together so it restarts at most once."""
+        tasks: list[SchedulerTask | None] = []
+        for schedule in schedules:
+            tasks.append(
+                self._replace(
+                    self._cleanup_tasks, schedule.id, self._cleanup_task(schedule)
+                )
+            )
+            tasks.append(
+                self._replace(
+                    self._idle_tasks, schedule.id, self._idle_sweep_task(schedule)
+                )
+            )
+        self._get_scheduler().schedule_items(
+            [task for task in tasks if task is not None]
+        )
+
+    def _replace(
+        self, tasks: dict[int, SchedulerTask], guild_id: int, task: SchedulerTask | None
+    ) -> SchedulerTask | None:
+        old_task = tasks.pop(guild_id, None)
+        if old_task is not None:
+            self._get_scheduler().remove_schedule(old_task)
+        if task is not None:
+            tasks[guild_id] = task
+        return task
+
+    def _cleanup_task(self, schedule: LobbyScheduleModel) -> SchedulerTask:
+        expires_at = self.next_run_time(schedule)
+        return SchedulerTask(
+            id=f"lobby_cleanup_{schedule.id}_{int(expires_at.timestamp())}",
+            expires_at=expires_at,
+            task=lambda: self._on_cleanup(schedule),
+        )
+
+    def _idle_sweep_task(self, schedule: LobbyScheduleModel) -> SchedulerTask | None:
+        if schedule.idle_minutes is None:
+            return None
+        expires_at = datetime.now() + self.idle_sweep_interval(schedule.idle_minutes)
+        return SchedulerTask(
+            id=f"lobby_idle_sweep_{schedule.id}_{int(expires_at.timestamp())}",
+            expires_at=expires_at,
+            task=lambda: self._on_idle_sweep(schedule),
+        )
+
+    def _spawn(self, coroutine) -> None:
+        # Run clean ups in the background so the scheduler isn't blocked by them.
+        task = self.bot.loop.create_task(coroutine)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    def _on_cleanup(self, schedule: LobbyScheduleModel) -> None:
+        self._spawn(self.run_cleanup(schedule.id))
+        task = self._cleanup_task(schedule)
+        self._replace(self._cleanup_tasks, schedule.id, task)
+        self._get_scheduler().schedule_item(task)
+
+    def _on_idle_sweep(self, schedule: LobbyScheduleModel) -> None:
+        assert schedule.idle_minutes is not None
+        self._spawn(
+            self.run_cleanup(
+                schedule.id, idle_for=timedelta(minutes=schedule.idle_minutes)
+            )
+        )
+        task = self._idle_sweep_task(schedule)
+        self._replace(self._idle_tasks, schedule.id, task)
+        if task is not None:
+            self._get_scheduler().schedule_item(task)
+
+    async def run_cleanup(
+        self, guild_id: int, idle_for: timedelta | None = None
+    ) -> None:
+        try:
+            lobbies = await self.lobby_manager.get_all_lobbies()
+        except LobbiesNotFound:
+            return
+        plan = self.lobby_cleaner.plan(
+            lobbies or [],
+            guild_id=guild_id,
+            reason="scheduled" if idle_for is None else "idle",
+            idle_for=idle_for,
+        )
+        if len(plan.actions) == 0:
+            return
+        await self.lobby_cleaner.execute(plan)
+
+    def get_status(self) -> str:
+        lines = ["=== Lobby Clean Up Schedule ==="]
+        for guild_id, task in sorted(
+            self._cleanup_tasks.items(), key=lambda item: item[1].expires_at
+        ):
+            idle_task = self._idle_tasks.get(guild_id)
+            idle = (
+                f", next idle sweep {idle_task.expires_at.strftime('%H:%M:%S')}"
+                if idle_task
+                else ""
+            )
+            lines.append(
+                f"Guild {guild_id}: next clean up "
+                f"{task.expires_at.strftime('%Y-%m-%d %H:%M:%S')}{idle}"
+            )
+        lines.append("======")
+        return "\n".join(lines)
@@ -550,7 +550,13 @@ class LobbyManager:
                     "Lobby was not found in cache, unable to delete lobby."
                 )
                 return
+        await self.delete_lobby_model(lobby, reason=reason, clean_up=clean_up)
 
+    async def delete_lobby_model(
+        self, lobby: LobbyModel, reason: str | None = None, clean_up: bool = False
+    ) -> None:
+        """Deletes an already fetched lobby, skipping the lobby lookup."""
+        lobby_id = lobby.id
         original_channel = await self.get_channel(
             lobby.guild_id, lobby.original_channel_id
         )
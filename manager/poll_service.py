@@ -1,12 +1,19 @@
-from collections import Counter
-
 from discord import Colour, Embed, Guild
 from discord.ext import commands
 
-from repository.poll_repo import PollRepository
-from repository.table.poll_table import (PollAnswerModel,
-                                         PollMemberAnswerModel, PollModel,
-                                         VoteType)
+from repository.poll_repo import AnswerResult, PollRepository, PollResult
+from repository.read_model import PollAnswerRow, PollRow
+from repository.table.poll_table import PollModel, VoteType
+from repository.unit_of_work import UnitOfWork
+
+TITLE_LIMIT = 256
+DESCRIPTION_LIMIT = 4096
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+FIELD_COUNT_LIMIT = 25
+# Total characters across title, description, fields and footer
+EMBED_LIMIT = 6000
+OMITTED_NOTE_SIZE = 40
 
 
 class PollManager:
@@ -14,7 +21,7 @@ class PollManager:
         self.bot = bot
         self.repository = repository
 
-    async def get_all_polls_by_guild_id(self, guild_id: int) -> list[PollModel]:
+    async def get_all_polls_by_guild_id(self, guild_id: int) -> list[PollRow]:
         return await self.repository.get_all_polls_by_guild_id(guild_id)
 
     async def get_all_active_polls(self) -> list[PollModel]:
@@ -33,33 +40,37 @@ class PollManager:
         owner_id: int,
         question: str,
         vote_type: VoteType,
+        answers: tuple[str, ...] = (),
     ) -> int:
-        new_guild_id = None
-
-        guild_model = await self.repository.get_guild(guild_id=guild.id)
-
-        if guild_model is None:
-            new_guild_id = await self.repository.add_guild(
-                guild.id, guild_name=guild.name
+        # The guild, poll and its answers are created together or not at all
+        async with UnitOfWork(self.repository.database):
+            guild_model = await self.repository.get_guild(guild_id=guild.id)
+
+            if guild_model is None:
+                await self.repository.add_guild(guild.id, guild_name=guild.name)
+
+            poll_id = await self.repository.create_poll(
+                question=question,
+                owner_id=owner_id,
+                guild_id=guild.id,
+                vote_type=vote_type,
+                colour=colour,
             )
-
-        return await self.repository.create_poll(
-            question=question,
-            owner_id=owner_id,
-            guild_id=new_guild_id or guild.id,
-            vote_type=vote_type,
-            colour=colour,
-        )
+            for answer in answers:
+                await self.repository.add_poll_answer(
+                    answer=answer, poll_id=poll_id, owner_id=owner_id
+                )
+            return poll_id
 
     async def get_owner_id(self, poll_id: int) -> int:
         return await self.repository.get_owner_id(poll_id)
 
-    async def get_answers_by_poll_id(self, poll_id: int) -> list[PollAnswerModel]:
+    async def get_answers_by_poll_id(self, poll_id: int) -> list[PollAnswerRow]:
         return await self.repository.get_answers_by_poll_id(poll_id)
 
     async def get_poll_answer_by_user_id(
         self, poll_id: int, user_id: int
-    ) -> list[PollAnswerModel]:
+    ) -> list[PollAnswerRow]:
         return await self.repository.get_poll_answer_by_user_id(poll_id, user_id)
 
     async def get_poll_answer(self, answer_id: int) -> str:
@@ -76,11 +87,12 @@ class PollManager:
         )
 
     async def remove_answer(self, member_id: int, answer_id: int) -> bool:
-        is_owner = await self.repository.is_owner_of_answer(member_id, answer_id)
-        if is_owner:
-            await self.repository.remove_poll_answer(answer_id)
-            return True
-        return False
+        async with UnitOfWork(self.repository.database):
+            is_owner = await self.repository.is_owner_of_answer(member_id, answer_id)
+            if is_owner:
+                await self.repository.remove_poll_answer(answer_id)
+                return True
+            return False
 
     async def add_url(self, answer_id: int, url: str):
         return await self.repository.add_url(answer_id, url)
@@ -107,40 +119,10 @@ class PollManager:
     ):
         match vote_type:
             case VoteType.SINGLE_VOTE:
-                # Get all votes by user
-                user_votes = await self.repository.get_poll_votes_by_member_id(
-                    poll_id, member_id
-                )
-                # If user has already voted, remove their vote
-                if user_votes == []:
-                    # Add new vote
-                    await self.repository.add_vote(
-                        answer_id,
-                        member_id,
-                    )
-                    return
-                else:
-                    # If vote_types are able to switch, this will remove all previous votes
-                    for vote in user_votes:
-                        await self.repository.remove_vote(
-                            answer_id=vote.id, member_id=vote.member_id
-                        )
-                    await self.repository.add_vote(
-                        answer_id,
-                        member_id,
-                    )
+                # Any previous vote in the poll is moved to this answer
+                await self.repository.switch_vote(poll_id, answer_id, member_id)
             case VoteType.MULTIPLE_VOTE:
-                # Check if user has already voted
-                user_vote = await self.repository.get_member_vote(answer_id, member_id)
-                if user_vote:
-                    await self.repository.remove_vote(
-                        answer_id=user_vote.id, member_id=member_id
-                    )
-                else:
-                    await self.repository.add_vote(
-                        answer_id,
-                        member_id,
-                    )
+                await self.repository.toggle_vote(answer_id, member_id)
             case _:
                 raise NotImplementedError(f"{vote_type} is an invalid vote type")
 
@@ -150,12 +132,6 @@ class PollManager:
     ) -> int:
         return await self.repository.get_vote(answer_id)
 
-    async def get_poll_votes(
-        self,
-        poll_id: int,
-    ) -> list[PollMemberAnswerModel]:
-        return await self.repository.get_poll_votes(poll_id)
-
     async def end_poll(
         self,
         poll_id: int,
@@ -166,40 +142,68 @@ class PollManager:
         self,
         poll_id: int,
     ) -> Embed:
-        poll_votes: list[PollMemberAnswerModel] = await self.get_poll_votes(poll_id)
-        results: dict[int, list[int]] = {}
-        winner: str = ""
-
-        for poll_vote in poll_votes:
-            list_of_voters = results.get(poll_vote.poll_answer_id, [])
-            list_of_voters.append(poll_vote.member_id)
-            results[poll_vote.poll_answer_id] = list_of_voters
-
-        counts: list[tuple[int, int]] = Counter(results).most_common()
-
-        if len(counts) == 1:
-            winner = await self.get_poll_answer(int(counts[0][0]))
-        else:
-            # There has been a tie
-            for i in range(len(counts)):
-                winner += f"{await self.get_poll_answer(int(counts[i][0]))}, "
-
-        embed = Embed(
-            title=f"📖  Poll Results: {(await self.get_poll(poll_id)).question}",
-            description=f" 🥇  Winner(s): {winner}",
-            colour=Colour.green(),
+        return create_poll_result_embed(
+            await self.repository.get_poll_result(poll_id)
         )
-        value_string = "⠀⠀⠀⠀⤷  ✍  Votes:\n"
-        # Print out members who voted for each answer
-        for key, values in results.items():
-            for value in values:
-                value_string += f"⠀⠀⠀⠀⠀⠀⠀⠀⤷   <@{value}>\n"
-            embed.add_field(
-                name=f"Answer  ➡  {await self.get_poll_answer(key)}",
-                value=value_string,
-                inline=False,
-            )
-            value_string = "⠀⠀⠀⠀⤷  ✍  Votes:\n"
 
-        embed.set_footer(text=f"[Poll ID: {poll_id}]")
-        return embed
+
+def truncate(string: str, limit: int) -> str:
+    return string if len(string) <= limit else string[: limit - 1] + "…"
+
+
+def create_poll_result_embed(result: PollResult) -> Embed:
+    """Renders the results, trimmed to fit Discord's embed limits however many
+    answers or votes the poll has."""
+    winners = result.winners
+    if winners:
+        winner = ", ".join(answer.answer for answer in winners)
+        description = f" 🥇  Winner(s): {winner} ({winners[0].vote_count} votes)"
+    else:
+        description = " 🥇  Winner(s): No votes"
+    embed = Embed(
+        title=truncate(f"📖  Poll Results: {result.question}", TITLE_LIMIT),
+        description=truncate(description, DESCRIPTION_LIMIT),
+        colour=Colour.green(),
+    )
+
+    footer = f"[Poll ID: {result.poll_id}] [Total votes: {result.total_votes}]"
+    answers = sorted(result.answers, key=lambda answer: -answer.vote_count)
+    # Room left for fields, less space kept for a note on omitted answers
+    budget = (
+        EMBED_LIMIT
+        - len(embed.title or "")
+        - len(embed.description or "")
+        - len(footer)
+        - OMITTED_NOTE_SIZE
+    )
+    shown = 0
+    for answer in answers[:FIELD_COUNT_LIMIT]:
+        name = truncate(f"Answer  ➡  {answer.answer}", FIELD_NAME_LIMIT)
+        value = voter_list(answer, min(FIELD_VALUE_LIMIT, budget - len(name)))
+        if value is None:
+            break
+        embed.add_field(name=name, value=value, inline=False)
+        budget -= len(name) + len(value)
+        shown += 1
+
+    if shown < len(answers):
+        footer += f" [{len(answers) - shown} more answers not shown]"
+    embed.set_footer(text=footer)
+    return embed
+
+
+def voter_list(answer: AnswerResult, limit: int) -> str | None:
+    """Mentions of the answer's voters within limit characters, None if even the
+    vote count doesn't fit."""
+    value = f"⠀⠀⠀⠀⤷  ✍  Votes: {answer.vote_count}\n"
+    if len(value) > limit:
+        return None
+    for index, voter_id in enumerate(answer.voter_ids):
+        line = f"⠀⠀⠀⠀⠀⠀⠀⠀⤷   <@{voter_id}>\n"
+        remaining = len(answer.voter_ids) - index
+        # Keep room to say how many voters were left out
+        more = f"⠀⠀⠀⠀⠀⠀⠀⠀⤷   …and {remaining} more\n"
+        if len(value) + len(line) + (len(more) if remaining > 1 else 0) > limit:
+            return value + more if len(value) + len(more) <= limit else value
+        value += line
+    return value
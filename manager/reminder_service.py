@@ -8,8 +8,10 @@ from discord.ext import commands
 
 from cog.classes.scheduler_task import SchedulerTask
 from cog.scheduler import SchedulerCog
+from repository.read_model import ReminderRow
 from repository.reminder_repo import ReminderRepository
 from repository.table.reminder_table import ReminderModel
+from repository.unit_of_work import UnitOfWork
 
 
 class ReminderManager:
@@ -57,7 +59,7 @@ class ReminderManager:
 
     async def get_all_active_reminders_by_user_id(
         self, user_id: int
-    ) -> list[ReminderModel]:
+    ) -> list[ReminderRow]:
         return await self.repository.get_all_active_reminders_by_user_id(
             user_id=user_id
         )
@@ -117,12 +119,17 @@ class ReminderManager:
 
     async def delete_reminder(self, interaction: Interaction, reminder_id: int):
         try:
-            reminder_model = await self.repository.get_reminder(reminder_id)
-            if reminder_model.owner_id != interaction.user.id:
+            # Checked and deleted in one transaction, replies are sent after it
+            async with UnitOfWork(self.repository.database):
+                reminder_model = await self.repository.get_reminder(reminder_id)
+                is_owner = reminder_model.owner_id == interaction.user.id
+                if is_owner:
+                    reminder_id = await self.repository.remove_reminder(reminder_id)
+            if not is_owner:
                 await interaction.response.send_message(
                     "Sorry, looks like this reminder doesn't belong to you."
                 )
-            reminder_id = await self.repository.remove_reminder(reminder_id)
+                return
             await interaction.response.send_message(
                 f"The reminder with id {reminder_id} has been deleted!"
             )
@@ -148,24 +155,26 @@ class ReminderManager:
 
     async def populate_scheduler(self):
         await self.bot.wait_until_ready()
-        reminders = await self.repository.get_all_active_reminders()
-        scheduler = self._get_scheduler()
-        for reminder in reminders:
-            channel = self.bot.get_channel(reminder.channel_id)
-            user = self.bot.get_user(reminder.owner_id)
-            if channel is None or user is None:
-                await self.repository.remove_reminder(reminder.id)
-                continue
-            scheduler.schedule_item(
-                SchedulerTask(
-                    id=self._create_id_for_scheduler(id=reminder.id),
-                    expires_at=reminder.expire_at,
-                    task=partial(
-                        self._reminder_callback,
-                        reminder=reminder.reminder,
-                        channel=channel,
-                        user=user,
-                        id=reminder.id,
-                    ),
+        # Stale reminders are removed on the same connection
+        async with UnitOfWork(self.repository.database):
+            reminders = await self.repository.get_all_active_reminders()
+            scheduler = self._get_scheduler()
+            for reminder in reminders:
+                channel = self.bot.get_channel(reminder.channel_id)
+                user = self.bot.get_user(reminder.owner_id)
+                if channel is None or user is None:
+                    await self.repository.remove_reminder(reminder.id)
+                    continue
+                scheduler.schedule_item(
+                    SchedulerTask(
+                        id=self._create_id_for_scheduler(id=reminder.id),
+                        expires_at=reminder.expire_at,
+                        task=partial(
+                            self._reminder_callback,
+                            reminder=reminder.reminder,
+                            channel=channel,
+                            user=user,
+                            id=reminder.id,
+                        ),
+                    )
                 )
-            )
@@ -0,0 +1,177 @@
+import asyncio
+
+import discord
+from discord import CategoryChannel, Guild, TextChannel
+from discord.ext import commands
+
+from cog.classes.soundboard.control_panel import ControlPanelView
+from cog.classes.utils import set_logger
+from manager.soundboard_service import SoundboardManager
+from repository.soundboard_repo import SoundboardRepository
+from repository.table.soundboard_table import SoundboardPageModel
+from view.soundboard.sound_board import SoundBoardView, SoundButton
+
+# Discord allows at most 25 components on a view
+BUTTONS_PER_PAGE = 25
+
+
+def assign_pages(
+    pages: list[list[str]], names: list[str], page_size: int = BUTTONS_PER_PAGE
+) -> list[list[str]]:
+    """Lays the soundbites out on pages, keeping existing soundbites where they
+    are so a change only touches the pages it affects.
+
+    Removed soundbites are dropped in place, new ones go to the first page with
+    room and empty pages are removed.
+    """
+    current = set(names)
+    new_pages = [[name for name in page if name in current] for page in pages]
+    assigned = {name for page in new_pages for name in page}
+
+    for name in names:
+        if name in assigned:
+            continue
+        page = next((page for page in new_pages if len(page) < page_size), None)
+        if page is None:
+            page = []
+            new_pages.append(page)
+        page.append(name)
+
+    return [sorted(page) for page in new_pages if page]
+
+
+class SoundboardPageManager:
+    """Keeps each guild's soundboard channel in sync with the soundbite index by
+    editing only the page messages whose buttons changed."""
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        repository: SoundboardRepository,
+        soundboard_manager: SoundboardManager,
+    ) -> None:
+        self.bot = bot
+        self.repository = repository
+        self.soundboard_manager = soundboard_manager
+        self.logger = set_logger("soundboard_page_manager")
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def create_page_view(self, soundbites: list[str]) -> SoundBoardView:
+        view = SoundBoardView()
+        for name in soundbites:
+            view.add_item(SoundButton(self.bot, name))
+        return view
+
+    async def register_views(self) -> int:
+        """Re-attaches the stored pages' views to their messages so buttons keep
+        working after a restart. Pages changed later are registered when they
+        are sent or edited."""
+        pages = await self.repository.get_all_pages()
+        for page in pages:
+            self.bot.add_view(
+                self.create_page_view(page.soundbites), message_id=page.message_id
+            )
+        return len(pages)
+
+    async def update(self, guild: Guild, rebuild: bool = False) -> None:
+        lock = self._locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            pages = await self.repository.get_pages(guild.id)
+            channel = guild.get_channel(pages[0].channel_id) if pages else None
+            if rebuild or not isinstance(channel, TextChannel):
+                await self._rebuild(guild)
+            else:
+                await self._update_pages(channel, pages)
+
+    async def _update_pages(
+        self, channel: TextChannel, pages: list[SoundboardPageModel]
+    ) -> None:
+        layout = assign_pages(
+            [page.soundbites for page in pages], self.soundboard_manager.get_names()
+        )
+        edited = 0
+        for index, soundbites in enumerate(layout):
+            if index < len(pages) and sorted(pages[index].soundbites) == soundbites:
+                continue
+            view = self.create_page_view(soundbites)
+            if index < len(pages):
+                try:
+                    await channel.get_partial_message(pages[index].message_id).edit(
+                        view=view
+                    )
+                    pages[index].soundbites = soundbites
+                    edited += 1
+                    continue
+                except discord.NotFound:
+                    # Page was deleted by hand, send it again below
+                    pass
+            message = await channel.send(view=view)
+            page = SoundboardPageModel(
+                guild_id=channel.guild.id,
+                page_index=index,
+                channel_id=channel.id,
+                message_id=message.id,
+                soundbites=soundbites,
+            )
+            if index < len(pages):
+                pages[index] = page
+            else:
+                pages.append(page)
+            edited += 1
+
+        for page in pages[len(layout) :]:
+            try:
+                await channel.get_partial_message(page.message_id).delete()
+            except discord.NotFound:
+                pass
+            edited += 1
+
+        if edited:
+            await self.repository.set_pages(channel.guild.id, pages[: len(layout)])
+        self.logger.info(
+            f"Soundboard in guild {channel.guild.id}: {edited} pages changed."
+        )
+
+    async def _rebuild(self, guild: Guild) -> None:
+        """Recreates the soundboard channel from scratch, used on first setup or
+        when the channel has gone missing."""
+        category: CategoryChannel | None = discord.utils.find(  # type: ignore
+            lambda c: c.name == "soundboard" and isinstance(c, CategoryChannel),
+            guild.channels,
+        )
+        if category is None:
+            category = await guild.create_category("soundboard")
+
+        # Clone channel to delete old views
+        channel = discord.utils.find(
+            lambda c: c.name == "page-1" and isinstance(c, TextChannel),
+            guild.channels,
+        )
+        if channel is None:
+            new_channel = await guild.create_text_channel(
+                name="page-1", category=category
+            )
+        else:
+            new_channel = await channel.clone()
+            await channel.delete()
+        assert isinstance(new_channel, TextChannel)
+
+        await new_channel.send(view=ControlPanelView(self.bot))
+
+        pages = []
+        layout = assign_pages([], self.soundboard_manager.get_names())
+        for index, soundbites in enumerate(layout):
+            message = await new_channel.send(view=self.create_page_view(soundbites))
+            pages.append(
+                SoundboardPageModel(
+                    guild_id=guild.id,
+                    page_index=index,
+                    channel_id=new_channel.id,
+                    message_id=message.id,
+                    soundbites=soundbites,
+                )
+            )
+        await self.repository.set_pages(guild.id, pages)
+        self.logger.info(
+            f"Soundboard in guild {guild.id} rebuilt with {len(pages)} pages."
+        )
@@ -0,0 +1,141 @@
+import asyncio
+from bisect import bisect_left, insort
+from pathlib import Path
+
+from cog.classes.soundboard.opus_cache import OpusCache
+from cog.classes.soundboard.transcoder import Transcoder
+from cog.classes.utils import set_logger
+from repository.soundboard_repo import SoundboardRepository
+from repository.table.soundboard_table import SoundbiteModel
+
+SOUNDBITE_DIRECTORY = Path("data/sound_bites")
+# Files probed and inserted together while reconciling the directory on startup
+LOAD_BATCH_SIZE = 100
+
+
+class SoundboardManager:
+    """Soundbite metadata from the database, indexed in memory.
+
+    Names are kept sorted so views are built without sorting and autocomplete is a
+    binary search, neither touches the soundbite directory.
+    """
+
+    def __init__(
+        self,
+        repository: SoundboardRepository,
+        opus_cache: OpusCache,
+        transcoder: Transcoder,
+        directory: Path = SOUNDBITE_DIRECTORY,
+    ) -> None:
+        self.repository = repository
+        self.opus_cache = opus_cache
+        self.transcoder = transcoder
+        self.directory = directory
+        self.logger = set_logger("soundboard_manager")
+        self._soundbites: dict[str, SoundbiteModel] = {}
+        self._names: list[str] = []
+
+    def _index(self, soundbite: SoundbiteModel) -> None:
+        if soundbite.name not in self._soundbites:
+            insort(self._names, soundbite.name)
+        self._soundbites[soundbite.name] = soundbite
+
+    def _unindex(self, name: str) -> None:
+        if self._soundbites.pop(name, None) is not None:
+            self._names.pop(bisect_left(self._names, name))
+
+    async def load(self) -> None:
+        """Loads the index from the database and reconciles it with the directory.
+
+        The directory is only scanned here, once on startup, to pick up files added
+        or removed while the bot was offline.
+        """
+        for soundbite in await self.repository.get_all_soundbites():
+            self._index(soundbite)
+
+        files = {
+            file.stem: file for file in self.directory.iterdir() if file.is_file()
+        }
+        missing = [name for name in self._names if name not in files]
+        if missing:
+            await self.repository.remove_soundbites(missing)
+            for name in missing:
+                self.opus_cache.evict(Path(self._soundbites[name].path))
+                self._unindex(name)
+
+        added = [file for name, file in files.items() if name not in self._soundbites]
+        # Probed a batch at a time, ffprobe runs are further limited by the
+        # transcoder, and each batch is one insert. Playback copies are left to the
+        # background warm up, not startup.
+        for start in range(0, len(added), LOAD_BATCH_SIZE):
+            batch = added[start : start + LOAD_BATCH_SIZE]
+            rows = await asyncio.gather(*(self._probe(file) for file in batch))
+            for soundbite in await self.repository.add_soundbites(list(rows)):
+                self._index(soundbite)
+        self.logger.info(
+            f"Soundboard index loaded with {len(self._names)} soundbites, "
+            f"{len(added)} added and {len(missing)} removed."
+        )
+
+    def get_soundbite(self, name: str) -> SoundbiteModel | None:
+        return self._soundbites.get(name)
+
+    def get_names(self) -> list[str]:
+        """Sorted soundbite names"""
+        return self._names
+
+    def search(self, prefix: str, limit: int = 25) -> list[str]:
+        """Sorted names starting with prefix"""
+        start = bisect_left(self._names, prefix)
+        results = []
+        for name in self._names[start:]:
+            if not name.startswith(prefix) or len(results) == limit:
+                break
+            results.append(name)
+        return results
+
+    async def _probe(self, path: Path) -> dict:
+        """Row for the soundbite table, without duration or loudness if the file
+        couldn't be probed."""
+        try:
+            duration, loudness = await asyncio.gather(
+                self.transcoder.probe_duration(path), self.transcoder.mean_volume(path)
+            )
+        except Exception as e:
+            self.logger.error(f"Could not probe soundbite {path}: {e}")
+            duration, loudness = 0.0, None
+        return {
+            "name": path.stem,
+            "path": str(path),
+            "duration": duration or 0.0,
+            "size": path.stat().st_size,
+            "loudness": loudness,
+        }
+
+    async def add_soundbite(self, path: Path, ingest: bool = True) -> SoundbiteModel:
+        [soundbite] = await self.repository.add_soundbites([await self._probe(path)])
+        self._index(soundbite)
+        if ingest:
+            # Transcode the playback copy now so the first play doesn't pay for it
+            await self.opus_cache.ensure(path)
+        return soundbite
+
+    def get_paths(self) -> list[Path]:
+        return [Path(self._soundbites[name].path) for name in self._names]
+
+    async def remove_soundbite(self, name: str) -> bool:
+        soundbite = self._soundbites.get(name)
+        if soundbite is None:
+            return False
+        Path(soundbite.path).unlink(missing_ok=True)
+        self.opus_cache.evict(Path(soundbite.path))
+        await self.repository.remove_soundbites([name])
+        self._unindex(name)
+        return True
+
+    async def record_play(self, name: str) -> None:
+        soundbite = self._soundbites.get(name)
+        if soundbite is None:
+            return
+        soundbite.play_count += 1
+        await self.repository.increment_play_count(name)
@@ -1,14 +1,33 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from cachetools import LRUCache, TTLCache
 from discord import Guild
 from discord.ext import commands
 import human_readable
-import pytz
 
 from repository.timezone_repo import TimezoneRepository
 from cog.classes.utils import set_logger
+from cog.classes.zone_engine import zone_engine
 
 logger = set_logger("timezone_manager")
 
+USER_CACHE_SIZE = 4096
+ROSTER_CACHE_SIZE = 1024
+# Seconds a guild's roster is kept, registrations invalidate it sooner
+ROSTER_CACHE_TTL = 10 * 60
+
+
+@dataclass
+class TimezoneGroup:
+    """Registered timezones sharing a UTC offset right now."""
+    offset: int
+    # (timezone, member count), most members first
+    timezones: list[tuple[str, int]]
+
+    @property
+    def member_count(self) -> int:
+        return sum(count for _, count in self.timezones)
+
 
 class TimezoneManager:
     def __init__(
@@ -18,51 +37,103 @@ class TimezoneManager:
     ) -> None:
         self.bot = bot
         self.repository = repository
+        # User id to their registered timezone, kept current on register and update
+        self.user_timezones: LRUCache[int, str] = LRUCache(maxsize=USER_CACHE_SIZE)
+        # Guild id to its (timezone, member count) pairs
+        self.rosters: TTLCache[int, list[tuple[str, int]]] = TTLCache(
+            maxsize=ROSTER_CACHE_SIZE, ttl=ROSTER_CACHE_TTL
+        )
 
     async def get_timezone(self, user_id: int) -> str:
-        return await self.repository.get_timezone_of_user(user_id)
+        return (await self.get_timezones([user_id]))[user_id]
+
+    async def get_timezones(self, user_ids: list[int]) -> dict[int, str]:
+        """Timezones of the users, fetching the ones not cached in a single query.
+
+        Raises ValueError if any of them hasn't registered one."""
+        timezones: dict[int, str] = {}
+        missing: list[int] = []
+        for user_id in user_ids:
+            timezone = self.user_timezones.get(user_id)
+            if timezone is None:
+                missing.append(user_id)
+            else:
+                timezones[user_id] = timezone
+
+        if missing:
+            fetched = await self.repository.get_timezones_of_users(missing)
+            self.user_timezones.update(fetched)
+            timezones.update(fetched)
+        for user_id in user_ids:
+            if user_id not in timezones:
+                raise ValueError(
+                    f"User with id: {user_id} does not have a timezone registered.")
+        return timezones
 
     async def register_timezone(self, user_id: int, timezone: str, guild: Guild) -> int:
-        return await self.repository.register_timezone(
+        id = await self.repository.register_timezone(
             user_id=user_id,
             timezone=timezone,
             guild=guild
         )
+        self.user_timezones[user_id] = timezone
+        self.rosters.pop(guild.id, None)
+        return id
     
     async def update_timezone(self, user_id: int, timezone: str) -> tuple[str, str]:
-        return await self.repository.update_timezone(
+        change = await self.repository.update_timezone(
             user_id=user_id,
             timezone=timezone
         )
+        self.user_timezones[user_id] = timezone
+        # Changes are rare and the member's guild isn't known here
+        self.rosters.clear()
+        return change
     
-    async def get_all_registered_timezones(self, guild_id: int) -> list[str]:
-        return await self.repository.get_all_registered_timezones(
-            guild_id=guild_id,
-        )
+    async def get_roster(self, guild_id: int) -> list[TimezoneGroup]:
+        """Registered timezones grouped by their current UTC offset, west to east."""
+        counts = self.rosters.get(guild_id)
+        if counts is None:
+            counts = await self.repository.get_timezone_counts(guild_id)
+            self.rosters[guild_id] = counts
+
+        # Offsets move with daylight saving, so they're grouped on every call
+        offsets = zone_engine.offsets(timezone for timezone, _ in counts)
+        groups: dict[int, list[tuple[str, int]]] = {}
+        for timezone, count in counts:
+            groups.setdefault(offsets[timezone], []).append((timezone, count))
+        return [
+            TimezoneGroup(
+                offset=offset,
+                timezones=sorted(timezones, key=lambda item: (-item[1], item[0])),
+            )
+            for offset, timezones in sorted(groups.items())
+        ]
     
-    async def compare_timezones(self, comparer_id: int, comparee_id: int) -> tuple[str, datetime, str, datetime]:
-        """Return (comparer timezone, comparer datetime, comparee timezone, comparee datetime)"""
-        comparer_tz = await self.repository.get_timezone_of_user(comparer_id)
-        comparee_tz = await self.repository.get_timezone_of_user(comparee_id)
-        datetime_now = datetime.now(pytz.timezone('UTC'))
-        return comparer_tz, self.convert_datetime(datetime_now, comparer_tz), comparee_tz, self.convert_datetime(datetime_now, comparee_tz),
+    async def compare_timezones(
+        self, comparer_id: int, comparee_id: int
+    ) -> tuple[str, datetime, str, datetime]:
+        """Return (comparer timezone, comparer datetime, comparee timezone, comparee
+        datetime)"""
+        timezones = await self.get_timezones([comparer_id, comparee_id])
+        comparer_tz = timezones[comparer_id]
+        comparee_tz = timezones[comparee_id]
+        times = zone_engine.now_in([comparer_tz, comparee_tz])
+        return comparer_tz, times[comparer_tz], comparee_tz, times[comparee_tz],
 
     @staticmethod
-    def get_datetime_difference(comparer_dt: datetime, comparee_dt: datetime) -> tuple[str, timedelta, str]:
+    def get_datetime_difference(
+        comparer_dt: datetime, comparee_dt: datetime
+    ) -> tuple[str, timedelta, str]:
         """Returns formatted timedelta, timedelta and if its ahead or behind"""
 
         logger.info(str(comparer_dt))
         logger.info(str(comparee_dt))
 
-        timezone1 = pytz.timezone(str(comparer_dt.tzinfo))
-        timezone2 = pytz.timezone(str(comparee_dt.tzinfo))
-
-        # Get the current time in each timezone
-        current_time1 = timezone1.localize(datetime.now())
-        current_time2 = timezone2.localize(datetime.now())
-
-        # Calculate the time difference between the two timezones
-        time_difference: timedelta = current_time1.utcoffset() - current_time2.utcoffset()
+        # Calculate the time difference between the two timezones at that instant
+        time_difference: timedelta = zone_engine.difference(
+            str(comparer_dt.tzinfo), str(comparee_dt.tzinfo), comparer_dt.timestamp()
+        )
         formatted_time_difference = human_readable.precise_delta(abs(time_difference))
 
         # if the time difference is negative it's ahead else its behind
@@ -75,6 +146,5 @@ class TimezoneManager:
 
     @staticmethod
     def convert_datetime(datetime: datetime, timezone: str) -> datetime:
-        new_timezone = pytz.timezone(timezone)
-        return datetime.astimezone(new_timezone)
+        return datetime.astimezone(zone_engine.get_zone(timezone))
 
@@ -1,7 +1,6 @@
-from collections.abc import Sequence
-
 from sqlalchemy import Result, delete, insert, select, update
 
+from repository.read_model import GameRow, fetch_rows, select_rows
 from repository.table.game_lobby_tables import GameModel, GuildModel
 
 
@@ -155,14 +154,14 @@ class GamePostgresRepository:
             session.commit()
             return game_role
 
-    async def get_all_games_by_guild_id(self, guild_id: int) -> Sequence[GameModel]:
+    async def get_all_games_by_guild_id(self, guild_id: int) -> list[GameRow]:
         """Get all games name and id from list of GameModels"""
         async with self.database() as session:
-            result: Result = await session.execute(
-                select(GameModel).filter(GameModel.guild_id == guild_id)
+            return await fetch_rows(
+                session,
+                GameRow,
+                select_rows(GameRow, GameModel).filter(GameModel.guild_id == guild_id),
             )
-            game_list = result.scalars().fetchmany()
-            return game_list
 
     async def get_max_size_by_name(self, game_name: str, guild_id: int) -> int | None:
         """Get max size of game by id"""
@@ -0,0 +1,82 @@
+from datetime import time
+
+from sqlalchemy import Result, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from repository.table.lobby_schedule_table import LobbyScheduleModel
+
+
+class LobbyScheduleRepository:
+    def __init__(self, database: async_sessionmaker[AsyncSession]):
+        self.database = database
+
+    async def get_schedule(self, guild_id: int) -> LobbyScheduleModel | None:
+        async with self.database() as session:
+            async with session.begin():
+                return await session.get(LobbyScheduleModel, guild_id)
+
+    async def get_all_schedules(self) -> list[LobbyScheduleModel]:
+        async with self.database() as session:
+            async with session.begin():
+                result: Result = await session.execute(select(LobbyScheduleModel))
+                return list(result.scalars().all())
+
+    async def set_schedule(
+        self,
+        guild_id: int,
+        guild_name: str,
+        cleanup_time: time,
+        timezone: str,
+        idle_minutes: int | None,
+    ) -> LobbyScheduleModel:
+        async with self.database() as session:
+            async with session.begin():
+                schedule = await session.get(LobbyScheduleModel, guild_id)
+                if schedule is None:
+                    schedule = LobbyScheduleModel(
+                        id=guild_id,
+                        name=guild_name,
+                        cleanup_time=cleanup_time,
+                        timezone=timezone,
+                        idle_minutes=idle_minutes,
+                    )
+                    session.add(schedule)
+                else:
+                    schedule.name = guild_name
+                    schedule.cleanup_time = cleanup_time
+                    schedule.timezone = timezone
+                    schedule.idle_minutes = idle_minutes
+                await session.commit()
+                return schedule
+
+
+class MemoryLobbyScheduleRepository:
+    """Keeps schedules in memory for bots without a database configured for the
+    lobby module, schedules set are lost on restart."""
+
+    def __init__(self) -> None:
+        self.schedules: dict[int, LobbyScheduleModel] = {}
+
+    async def get_schedule(self, guild_id: int) -> LobbyScheduleModel | None:
+        return self.schedules.get(guild_id)
+
+    async def get_all_schedules(self) -> list[LobbyScheduleModel]:
+        return list(self.schedules.values())
+
+    async def set_schedule(
+        self,
+        guild_id: int,
+        guild_name: str,
+        cleanup_time: time,
+        timezone: str,
+        idle_minutes: int | None,
+    ) -> LobbyScheduleModel:
+        schedule = LobbyScheduleModel(
+            id=guild_id,
+            name=guild_name,
+            cleanup_time=cleanup_time,
+            timezone=timezone,
+            idle_minutes=idle_minutes,
+        )
+        self.schedules[guild_id] = schedule
+        return schedule
@@ -0,0 +1,214 @@
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import (Connection, Constraint, Index, func, inspect, select,
+                        text)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.schema import AddConstraint
+
+from repository.db_config import Base
+from repository.table.game_lobby_tables import GameModel
+from repository.table.poll_table import (PollAnswerModel,
+                                         PollMemberAnswerModel, PollModel)
+from repository.table.reminder_table import ReminderModel
+from repository.table.timezone_table import TimezoneUserModel
+
+
+class SchemaVersionModel(Base):
+    __tablename__ = "schema_version"
+    # Each cog owns its tables, so versions are tracked per namespace
+    namespace: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False)
+    updated_datetime: Mapped[datetime] = mapped_column(
+        default=func.now(), onupdate=func.now()
+    )
+
+
+@dataclass
+class Migration:
+    version: int
+    description: str
+    # Runs inside the migration transaction on a sync connection
+    upgrade: Callable[[Connection], None]
+
+
+def create_indexes(version: int, description: str, *indexes: Index) -> Migration:
+    """Migration creating indexes declared on the models.
+
+    Fresh databases already get them from create_all, so existing ones are skipped.
+    """
+
+    def upgrade(connection: Connection) -> None:
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+
+    return Migration(version=version, description=description, upgrade=upgrade)
+
+
+def get_index(model: type[Base], name: str) -> Index:
+    for index in model.__table__.indexes:  # type: ignore
+        if index.name == name:
+            return index
+    raise KeyError(f"{model.__tablename__} has no index named {name}")
+
+
+def get_constraint(model: type[Base], name: str) -> Constraint:
+    for constraint in model.__table__.constraints:  # type: ignore
+        if constraint.name == name:
+            return constraint
+    raise KeyError(f"{model.__tablename__} has no constraint named {name}")
+
+
+def unique_poll_votes(connection: Connection) -> None:
+    # Keep the first of any duplicate votes left behind by racing clicks
+    connection.execute(
+        text(
+            "DELETE FROM poll_member_answer AS duplicate "
+            "USING poll_member_answer AS original "
+            "WHERE duplicate.poll_answer_id = original.poll_answer_id "
+            "AND duplicate.member_id = original.member_id "
+            "AND duplicate.id > original.id"
+        )
+    )
+    constraint = get_constraint(PollMemberAnswerModel, "uq_poll_member_answer_vote")
+    existing = {
+        unique["name"]
+        for unique in inspect(connection).get_unique_constraints(
+            PollMemberAnswerModel.__tablename__
+        )
+    }
+    if constraint.name not in existing:
+        connection.execute(AddConstraint(constraint))
+    # Superseded by the index backing the constraint
+    connection.execute(
+        text("DROP INDEX IF EXISTS ix_poll_member_answer_poll_answer_id_member_id")
+    )
+
+
+class MigrationRunner:
+    def __init__(self, namespace: str, migrations: list[Migration]) -> None:
+        versions = [migration.version for migration in migrations]
+        if versions != sorted(set(versions)):
+            raise ValueError(f"Migration versions of {namespace} must be increasing")
+        self.namespace = namespace
+        self.migrations = migrations
+        self.logger = logging.getLogger("migration")
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    async def get_version(self, engine: AsyncEngine) -> int:
+        async with engine.begin() as conn:
+            await conn.run_sync(SchemaVersionModel.__table__.create, checkfirst=True)
+            version = await conn.scalar(
+                select(SchemaVersionModel.version).where(
+                    SchemaVersionModel.namespace == self.namespace
+                )
+            )
+            return version or 0
+
+    async def run(self, engine: AsyncEngine) -> int:
+        """Applies pending migrations in one transaction, returns the new version."""
+        async with engine.begin() as conn:
+            await conn.run_sync(SchemaVersionModel.__table__.create, checkfirst=True)
+            # Another instance starting at the same time waits here instead of
+            # applying the same migrations twice
+            await conn.execute(
+                select(func.pg_advisory_xact_lock(zlib.crc32(self.namespace.encode())))
+            )
+            current = (
+                await conn.scalar(
+                    select(SchemaVersionModel.version).where(
+                        SchemaVersionModel.namespace == self.namespace
+                    )
+                )
+                or 0
+            )
+
+            pending = [
+                migration
+                for migration in self.migrations
+                if migration.version > current
+            ]
+            for migration in pending:
+                self.logger.info(
+                    f"Migrating {self.namespace} to version {migration.version}: "
+                    f"{migration.description}"
+                )
+                await conn.run_sync(migration.upgrade)
+
+            if not pending:
+                return current
+            await conn.execute(
+                insert(SchemaVersionModel)
+                .values(namespace=self.namespace, version=self.latest_version)
+                .on_conflict_do_update(
+                    index_elements=[SchemaVersionModel.namespace],
+                    set_={
+                        "version": self.latest_version,
+                        "updated_datetime": func.now(),
+                    },
+                )
+            )
+            return self.latest_version
+
+
+reminder_migrations = MigrationRunner(
+    "reminder",
+    [
+        create_indexes(
+            1,
+            "Index active reminders by expiry and owner",
+            get_index(ReminderModel, "ix_reminder_active_expire_at"),
+            get_index(ReminderModel, "ix_reminder_active_owner_id"),
+            get_index(ReminderModel, "ix_reminder_guild_id"),
+        ),
+    ],
+)
+
+poll_migrations = MigrationRunner(
+    "poll",
+    [
+        create_indexes(
+            1,
+            "Index polls by guild, answers by poll and votes by answer and member",
+            get_index(PollModel, "ix_poll_guild_id_is_active"),
+            get_index(PollModel, "ix_poll_active"),
+            get_index(PollAnswerModel, "ix_poll_answer_poll_id_owner_id"),
+            get_index(PollMemberAnswerModel, "ix_poll_member_answer_member_id"),
+        ),
+        Migration(
+            version=2,
+            description="Remove duplicate votes and make votes unique per member",
+            upgrade=unique_poll_votes,
+        ),
+    ],
+)
+
+game_migrations = MigrationRunner(
+    "game",
+    [
+        create_indexes(
+            1,
+            "Index games by guild and name",
+            get_index(GameModel, "ix_game_guild_id_name"),
+        ),
+    ],
+)
+
+timezone_migrations = MigrationRunner(
+    "timezone",
+    [
+        create_indexes(
+            1,
+            "Index member timezones by guild",
+            get_index(TimezoneUserModel, "ix_timezone_user_guild_id"),
+        ),
+    ],
+)
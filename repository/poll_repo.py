@@ -1,9 +1,44 @@
-from sqlalchemy import delete, join, select
+from dataclasses import dataclass
+
+from sqlalchemy import BIGINT, delete, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from repository.read_model import (PollAnswerRow, PollRow, fetch_rows,
+                                   select_rows)
 from repository.table.poll_table import (PollAnswerModel, PollGuildModel,
                                          PollMemberAnswerModel, PollModel,
                                          VoteType)
+from repository.unit_of_work import UnitOfWork
+
+
+@dataclass
+class AnswerResult:
+    answer_id: int
+    answer: str
+    url: str | None
+    vote_count: int
+    # In the order the votes were cast
+    voter_ids: list[int]
+
+
+@dataclass
+class PollResult:
+    poll_id: int
+    question: str
+    answers: list[AnswerResult]
+
+    @property
+    def total_votes(self) -> int:
+        return sum(answer.vote_count for answer in self.answers)
+
+    @property
+    def winners(self) -> list[AnswerResult]:
+        """Every answer sharing the highest vote count, none before any votes."""
+        top = max((answer.vote_count for answer in self.answers), default=0)
+        if top == 0:
+            return []
+        return [answer for answer in self.answers if answer.vote_count == top]
 
 
 class PollRepository:
@@ -11,57 +46,53 @@ class PollRepository:
         self.database = database
 
     async def get_guild(self, guild_id: int) -> PollGuildModel | None:
-        async with self.database() as session:
-            async with session.begin():
-                guild = await session.get(PollGuildModel, guild_id)
-                return guild
+        async with UnitOfWork(self.database) as session:
+            guild = await session.get(PollGuildModel, guild_id)
+            return guild
 
     async def add_guild(self, guild_id: int, guild_name: str) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                session.add(
-                    PollGuildModel(
-                        id=guild_id,
-                        name=guild_name,
-                    )
-                )
-                await session.commit()
-                return guild_id
-
-    async def get_all_polls_by_guild_id(self, guild_id: int) -> list[PollModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollModel).where(PollModel.guild_id == guild_id)
+        async with UnitOfWork(self.database) as session:
+            session.add(
+                PollGuildModel(
+                    id=guild_id,
+                    name=guild_name,
                 )
-                return list(result.scalars().all())
+            )
+            # Written before rows referencing it in the same unit of work
+            await session.flush()
+            return guild_id
+
+    async def get_all_polls_by_guild_id(self, guild_id: int) -> list[PollRow]:
+        async with UnitOfWork(self.database) as session:
+            return await fetch_rows(
+                session,
+                PollRow,
+                select_rows(PollRow, PollModel).where(PollModel.guild_id == guild_id),
+            )
 
     async def get_all_active_polls(self) -> list[PollModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollModel).where(PollModel.is_active == True)
-                )
-                return list(result.scalars().all())
+        async with UnitOfWork(self.database) as session:
+            result = await session.execute(
+                select(PollModel).where(PollModel.is_active == True)
+            )
+            return list(result.scalars().all())
 
     async def get_all_active_polls_by_guild_id(self, guild_id: int) -> list[PollModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollModel).where(
-                        PollModel.is_active == True,
-                        PollModel.guild_id == guild_id,
-                    )
+        async with UnitOfWork(self.database) as session:
+            result = await session.execute(
+                select(PollModel).where(
+                    PollModel.is_active == True,
+                    PollModel.guild_id == guild_id,
                 )
-                return list(result.scalars().all())
+            )
+            return list(result.scalars().all())
 
     async def get_poll(self, poll_id: int) -> PollModel:
-        async with self.database() as session:
-            async with session.begin():
-                poll = await session.get(PollModel, poll_id)
-                if poll is None:
-                    raise ValueError(f"Poll with id {poll_id} does not exist")
-                return poll
+        async with UnitOfWork(self.database) as session:
+            poll = await session.get(PollModel, poll_id)
+            if poll is None:
+                raise ValueError(f"Poll with id {poll_id} does not exist")
+            return poll
 
     async def create_poll(
         self,
@@ -71,32 +102,31 @@ class PollRepository:
         question: str,
         vote_type: VoteType,
     ) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                poll = PollModel(
-                    question=question,
-                    owner_id=owner_id,
-                    guild_id=guild_id,
-                    vote_type=vote_type,
-                    colour=colour,
-                )
-                session.add(poll)
-                await session.commit()
-                return poll.id
+        async with UnitOfWork(self.database) as session:
+            poll = PollModel(
+                question=question,
+                owner_id=owner_id,
+                guild_id=guild_id,
+                vote_type=vote_type,
+                colour=colour,
+            )
+            session.add(poll)
+            # Assigns the id
+            await session.flush()
+            return poll.id
 
     async def get_channel_message_id(
         self,
         poll_id: int,
     ) -> tuple[int, int]:
-        async with self.database() as session:
-            async with session.begin():
-                poll = await session.get(PollModel, poll_id)
-                if poll is None:
-                    raise ValueError(f"Poll with id {poll_id} does not exist")
-                return (
-                    poll.message_id,
-                    poll.channel_id,
-                )
+        async with UnitOfWork(self.database) as session:
+            poll = await session.get(PollModel, poll_id)
+            if poll is None:
+                raise ValueError(f"Poll with id {poll_id} does not exist")
+            return (
+                poll.message_id,
+                poll.channel_id,
+            )
 
     async def set_channel_message_id(
         self,
@@ -104,41 +134,39 @@ class PollRepository:
         message_id: int,
         channel_id: int,
     ) -> None:
-        async with self.database() as session:
-            async with session.begin():
-                poll = await session.get(PollModel, poll_id)
-                if poll is None:
-                    raise ValueError(f"Poll with id {poll_id} does not exist")
-                poll.message_id = message_id
-                poll.channel_id = channel_id
-                await session.commit()
+        async with UnitOfWork(self.database) as session:
+            poll = await session.get(PollModel, poll_id)
+            if poll is None:
+                raise ValueError(f"Poll with id {poll_id} does not exist")
+            poll.message_id = message_id
+            poll.channel_id = channel_id
 
     async def get_owner_id(self, poll_id: int) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                poll = await session.get(PollModel, poll_id)
-                if poll is None:
-                    raise ValueError(f"Poll with id {poll_id} does not exist")
-                return poll.owner_id
-
-    async def get_answers_by_poll_id(self, poll_id: int) -> list[PollAnswerModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollAnswerModel).where(PollAnswerModel.poll_id == poll_id)
-                )
-                return list(result.scalars().all())
+        async with UnitOfWork(self.database) as session:
+            poll = await session.get(PollModel, poll_id)
+            if poll is None:
+                raise ValueError(f"Poll with id {poll_id} does not exist")
+            return poll.owner_id
+
+    async def get_answers_by_poll_id(self, poll_id: int) -> list[PollAnswerRow]:
+        async with UnitOfWork(self.database) as session:
+            return await fetch_rows(
+                session,
+                PollAnswerRow,
+                select_rows(PollAnswerRow, PollAnswerModel)
+                .where(PollAnswerModel.poll_id == poll_id)
+                .order_by(PollAnswerModel.id),
+            )
 
     async def is_owner_of_answer(self, member_id: int, answer_id: int) -> bool:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollAnswerModel).where(
-                        PollAnswerModel.owner_id == member_id,
-                        PollAnswerModel.id == answer_id,
-                    )
+        async with UnitOfWork(self.database) as session:
+            result = await session.execute(
+                select(PollAnswerModel).where(
+                    PollAnswerModel.owner_id == member_id,
+                    PollAnswerModel.id == answer_id,
                 )
-                return result.scalar() is not None
+            )
+            return result.scalar() is not None
 
     async def add_poll_answer(
         self,
@@ -146,151 +174,199 @@ class PollRepository:
         poll_id: int,
         owner_id: int,
     ) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                poll_answer = PollAnswerModel(
-                    answer=answer,
-                    owner_id=owner_id,
-                    poll_id=poll_id,
-                )
-                session.add(poll_answer)
-                await session.commit()
-                return poll_answer.id
+        async with UnitOfWork(self.database) as session:
+            poll_answer = PollAnswerModel(
+                answer=answer,
+                owner_id=owner_id,
+                poll_id=poll_id,
+            )
+            session.add(poll_answer)
+            await session.flush()
+            return poll_answer.id
 
     async def remove_poll_answer(
         self,
         answer_id: int,
     ):
-        async with self.database() as session:
-            async with session.begin():
-                poll_answer = await session.get(PollAnswerModel, answer_id)
-                if poll_answer is None:
-                    raise ValueError(f"Poll answer with id {answer_id} does not exist")
-                await session.delete(poll_answer)
-                await session.commit()
+        async with UnitOfWork(self.database) as session:
+            poll_answer = await session.get(PollAnswerModel, answer_id)
+            if poll_answer is None:
+                raise ValueError(f"Poll answer with id {answer_id} does not exist")
+            await session.delete(poll_answer)
 
     async def get_poll_answer(self, answer_id: int) -> str:
-        async with self.database() as session:
-            async with session.begin():
-                poll_answer = await session.get(PollAnswerModel, answer_id)
-                if poll_answer is None:
-                    raise ValueError(f"Poll answer with id {answer_id} does not exist")
-                return poll_answer.answer
+        async with UnitOfWork(self.database) as session:
+            poll_answer = await session.get(PollAnswerModel, answer_id)
+            if poll_answer is None:
+                raise ValueError(f"Poll answer with id {answer_id} does not exist")
+            return poll_answer.answer
 
     async def get_poll_answer_by_user_id(
         self, poll_id: int, user_id: int
-    ) -> list[PollAnswerModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollAnswerModel).where(
-                        PollAnswerModel.poll_id == poll_id,
-                        PollAnswerModel.owner_id == user_id,
-                    )
+    ) -> list[PollAnswerRow]:
+        async with UnitOfWork(self.database) as session:
+            return await fetch_rows(
+                session,
+                PollAnswerRow,
+                select_rows(PollAnswerRow, PollAnswerModel)
+                .where(
+                    PollAnswerModel.poll_id == poll_id,
+                    PollAnswerModel.owner_id == user_id,
                 )
-                return list(result.scalars().all())
+                .order_by(PollAnswerModel.id),
+            )
 
     async def add_url(self, answer_id: int, url: str) -> None:
-        async with self.database() as session:
-            async with session.begin():
-                poll_answer = await session.get(PollAnswerModel, answer_id)
-                if poll_answer is None:
-                    raise ValueError(f"Poll answer with id {answer_id} does not exist")
-                poll_answer.url = url
-                await session.commit()
-
-    async def add_vote(
+        async with UnitOfWork(self.database) as session:
+            poll_answer = await session.get(PollAnswerModel, answer_id)
+            if poll_answer is None:
+                raise ValueError(f"Poll answer with id {answer_id} does not exist")
+            poll_answer.url = url
+
+    def _insert_vote(self, poll_answer_id: int, member_id: int, *conditions):
+        return (
+            insert(PollMemberAnswerModel)
+            .from_select(
+                ["poll_answer_id", "member_id"],
+                select(
+                    literal(poll_answer_id, BIGINT), literal(member_id, BIGINT)
+                ).where(*conditions),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    PollMemberAnswerModel.poll_answer_id,
+                    PollMemberAnswerModel.member_id,
+                ]
+            )
+        )
+
+    async def switch_vote(
         self,
+        poll_id: int,
         poll_answer_id: int,
         member_id: int,
     ) -> None:
-        async with self.database() as session:
-            async with session.begin():
-                session.add(
-                    PollMemberAnswerModel(
-                        poll_answer_id=poll_answer_id,
-                        member_id=member_id,
+        """Moves the member's vote in the poll to the answer."""
+        async with UnitOfWork(self.database) as session:
+            # Clicks on different answers are serialised per member, otherwise
+            # neither would see the vote the other is about to insert
+            await session.execute(
+                select(
+                    func.pg_advisory_xact_lock(
+                        func.hashtextextended(f"poll_vote:{poll_id}:{member_id}", 0)
                     )
                 )
-                await session.commit()
+            )
+            removed = (
+                delete(PollMemberAnswerModel)
+                .where(
+                    PollMemberAnswerModel.member_id == member_id,
+                    PollMemberAnswerModel.poll_answer_id != poll_answer_id,
+                    PollMemberAnswerModel.poll_answer_id.in_(
+                        select(PollAnswerModel.id).where(
+                            PollAnswerModel.poll_id == poll_id
+                        )
+                    ),
+                )
+                .returning(PollMemberAnswerModel.id)
+                .cte("removed")
+            )
+            await session.execute(
+                self._insert_vote(poll_answer_id, member_id).add_cte(removed)
+            )
 
-    async def get_member_vote(
+    async def toggle_vote(
         self,
         poll_answer_id: int,
         member_id: int,
-    ) -> PollMemberAnswerModel | None:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollMemberAnswerModel).where(
-                        PollMemberAnswerModel.poll_answer_id == poll_answer_id,
-                        PollMemberAnswerModel.member_id == member_id,
-                    )
+    ) -> bool:
+        """Removes the member's vote for the answer if there is one, otherwise adds
+        it. Returns whether this call added the vote."""
+        async with UnitOfWork(self.database) as session:
+            removed = (
+                delete(PollMemberAnswerModel)
+                .where(
+                    PollMemberAnswerModel.poll_answer_id == poll_answer_id,
+                    PollMemberAnswerModel.member_id == member_id,
                 )
-                return result.scalars().first()
+                .returning(PollMemberAnswerModel.id)
+                .cte("removed")
+            )
+            result = await session.execute(
+                self._insert_vote(
+                    poll_answer_id, member_id, ~exists(select(removed.c.id))
+                ).returning(PollMemberAnswerModel.id)
+            )
+            inserted = result.scalar() is not None
+            return inserted
 
     async def get_vote(
         self,
         poll_answer_id: int,
     ) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollMemberAnswerModel).where(
-                        PollMemberAnswerModel.poll_answer_id == poll_answer_id
-                    )
+        async with UnitOfWork(self.database) as session:
+            result = await session.execute(
+                select(PollMemberAnswerModel).where(
+                    PollMemberAnswerModel.poll_answer_id == poll_answer_id
                 )
-                return len(result.scalars().all())
-
-    async def get_poll_votes_by_member_id(
-        self, poll_id: int, member_id: int
-    ) -> list[PollMemberAnswerModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollMemberAnswerModel)
-                    .join(PollAnswerModel)
-                    .where(
-                        PollAnswerModel.poll_id == poll_id,
-                        PollMemberAnswerModel.member_id == member_id,
-                    )
-                )
-                return list(result.scalars().all())
+            )
+            return len(result.scalars().all())
 
-    async def remove_vote(
-        self,
-        answer_id: int,
-        member_id: int,
-    ) -> None:
-        async with self.database() as session:
-            async with session.begin():
-                vote = await session.execute(
-                    select(PollMemberAnswerModel).where(
-                        PollMemberAnswerModel.id == answer_id,
-                        PollMemberAnswerModel.member_id == member_id,
-                    )
+    async def get_poll_result(self, poll_id: int) -> PollResult:
+        """Answers with their vote counts and voters, counted by the database in a
+        single grouped query."""
+        async with UnitOfWork(self.database) as session:
+            result = await session.execute(
+                select(
+                    PollModel.question,
+                    PollAnswerModel.id,
+                    PollAnswerModel.answer,
+                    PollAnswerModel.url,
+                    func.count(PollMemberAnswerModel.id),
+                    func.array_remove(
+                        func.array_agg(
+                            aggregate_order_by(
+                                PollMemberAnswerModel.member_id,
+                                PollMemberAnswerModel.answer_datetime,
+                                PollMemberAnswerModel.id,
+                            )
+                        ),
+                        None,
+                    ),
                 )
-                vote = vote.scalars().first()
-                if vote is None:
-                    raise ValueError(f"Vote with id {answer_id} does not exist")
-                await session.delete(vote)
-                await session.commit()
-
-    async def get_poll_votes(self, poll_id: int) -> list[PollMemberAnswerModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result = await session.execute(
-                    select(PollMemberAnswerModel)
-                    .join(PollAnswerModel)
-                    .where(PollAnswerModel.poll_id == poll_id)
+                .select_from(PollModel)
+                .outerjoin(PollAnswerModel, PollAnswerModel.poll_id == PollModel.id)
+                .outerjoin(
+                    PollMemberAnswerModel,
+                    PollMemberAnswerModel.poll_answer_id == PollAnswerModel.id,
                 )
-                return list(result.scalars().all())
+                .where(PollModel.id == poll_id)
+                .group_by(PollModel.id, PollAnswerModel.id)
+                .order_by(PollAnswerModel.id)
+            )
+            rows = result.all()
+            if not rows:
+                raise ValueError(f"Poll with id {poll_id} does not exist")
+            return PollResult(
+                poll_id=poll_id,
+                question=rows[0][0],
+                answers=[
+                    AnswerResult(
+                        answer_id=answer_id,
+                        answer=answer,
+                        url=url,
+                        vote_count=vote_count,
+                        voter_ids=list(voter_ids),
+                    )
+                    for _, answer_id, answer, url, vote_count, voter_ids in rows
+                    # A poll without answers still returns its own row
+                    if answer_id is not None
+                ],
+            )
 
     async def end_poll(self, poll_id: int) -> None:
-        async with self.database() as session:
-            async with session.begin():
-                poll = await session.get(PollModel, poll_id)
-                if poll is None:
-                    raise ValueError(f"Poll with id {poll_id} does not exist")
-                poll.is_active = False
-                await session.commit()
+        async with UnitOfWork(self.database) as session:
+            poll = await session.get(PollModel, poll_id)
+            if poll is None:
+                raise ValueError(f"Poll with id {poll_id} does not exist")
+            poll.is_active = False
@@ -0,0 +1,57 @@
+"""Read models are plain rows for callers that only read a few attributes.
+
+They are loaded with a Core select of just their own columns, so no entity is
+built, tracked in the identity map or refreshed on commit. Field names match the
+attributes of the table model they are read from.
+"""
+
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, TypeVar
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+R = TypeVar("R")
+
+
+@dataclass(slots=True)
+class PollRow:
+    id: int
+    question: str
+
+
+@dataclass(slots=True)
+class PollAnswerRow:
+    id: int
+    answer: str
+    owner_id: int
+    url: str | None
+
+
+@dataclass(slots=True)
+class ReminderRow:
+    id: int
+    reminder: str
+    expire_at: datetime
+
+
+@dataclass(slots=True)
+class GameRow:
+    id: int
+    name: str
+    max_size: int
+
+
+def select_rows(row_type: type, model: Any) -> Select:
+    """Selects the columns of the read model from the table model, in field order."""
+    return select(*(getattr(model, field.name) for field in fields(row_type)))
+
+
+async def fetch_rows(
+    session: AsyncSession, row_type: type[R], statement: Select
+) -> list[R]:
+    # Runs on the session's connection, inside its transaction, skipping the ORM
+    connection = await session.connection()
+    result = await connection.execute(statement)
+    return [row_type(*row) for row in result]
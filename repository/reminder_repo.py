@@ -4,7 +4,9 @@ from typing import Protocol
 from sqlalchemy import Result, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from repository.read_model import ReminderRow, fetch_rows, select_rows
 from repository.table.reminder_table import ReminderGuildModel, ReminderModel
+from repository.unit_of_work import UnitOfWork
 
 
 class Guild(Protocol):
@@ -17,51 +19,50 @@ class ReminderRepository:
         self.database = database
 
     async def get_all_active_reminders(self) -> list[ReminderModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result: Result = await session.execute(
-                    select(ReminderModel).where(ReminderModel.has_triggered == False)
-                )
-                return list(result.scalars().unique().all())
+        async with UnitOfWork(self.database) as session:
+            result: Result = await session.execute(
+                select(ReminderModel).where(ReminderModel.has_triggered == False)
+            )
+            return list(result.scalars().unique().all())
 
     async def get_all_reminders_by_guild_id(self, guild_id: int) -> list[ReminderModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result: Result = await session.execute(
-                    select(ReminderModel).where(ReminderModel.guild_id == guild_id)
-                )
-                return list(result.scalars().unique().all())
+        async with UnitOfWork(self.database) as session:
+            result: Result = await session.execute(
+                select(ReminderModel).where(ReminderModel.guild_id == guild_id)
+            )
+            return list(result.scalars().unique().all())
 
     async def get_all_active_reminders_by_user_id(
         self, user_id: int
-    ) -> list[ReminderModel]:
-        async with self.database() as session:
-            async with session.begin():
-                result: Result = await session.execute(
-                    select(ReminderModel).where(
-                        ReminderModel.owner_id == user_id,
-                        ReminderModel.has_triggered == False,
-                    )
+    ) -> list[ReminderRow]:
+        async with UnitOfWork(self.database) as session:
+            return await fetch_rows(
+                session,
+                ReminderRow,
+                select_rows(ReminderRow, ReminderModel)
+                .where(
+                    ReminderModel.owner_id == user_id,
+                    ReminderModel.has_triggered == False,
                 )
-                return list(result.scalars().unique().all())
+                .order_by(ReminderModel.expire_at),
+            )
 
     async def get_guild(self, guild_id: int) -> ReminderGuildModel | None:
-        async with self.database() as session:
-            async with session.begin():
-                guild = await session.get(ReminderGuildModel, guild_id)
-                return guild
+        async with UnitOfWork(self.database) as session:
+            guild = await session.get(ReminderGuildModel, guild_id)
+            return guild
 
     async def add_guild(self, guild_id: int, guild_name: str) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                session.add(
-                    ReminderGuildModel(
-                        id=guild_id,
-                        name=guild_name,
-                    )
+        async with UnitOfWork(self.database) as session:
+            session.add(
+                ReminderGuildModel(
+                    id=guild_id,
+                    name=guild_name,
                 )
-                await session.commit()
-                return guild_id
+            )
+            # Written before rows referencing it in the same unit of work
+            await session.flush()
+            return guild_id
 
     async def add_reminder(
         self,
@@ -71,55 +72,44 @@ class ReminderRepository:
         guild: Guild,
         expire_at: datetime,
     ) -> int:
-        guild_id = None
-        guild_model = await self.get_guild(guild.id)
-        if guild_model is None:
-            guild_id = await self.add_guild(guild_id=guild.id, guild_name=guild.name)
-
-        async with self.database() as session:
-            async with session.begin():
-                reminder_model = ReminderModel(
-                    owner_id=owner_id,
-                    channel_id=channel_id,
-                    reminder=reminder,
-                    expire_at=expire_at,
-                    guild_id=guild_id or guild_model.id,
-                )
-                session.add(reminder_model)
-                await session.commit()
-                return reminder_model.id
+        async with UnitOfWork(self.database) as session:
+            # The guild lookup and insert join this session
+            if await self.get_guild(guild.id) is None:
+                await self.add_guild(guild_id=guild.id, guild_name=guild.name)
+
+            reminder_model = ReminderModel(
+                owner_id=owner_id,
+                channel_id=channel_id,
+                reminder=reminder,
+                expire_at=expire_at,
+                guild_id=guild.id,
+            )
+            session.add(reminder_model)
+            # Assigns the id
+            await session.flush()
+            return reminder_model.id
 
     async def get_reminder(
         self,
         id: int,
     ) -> ReminderModel:
-        async with self.database() as session:
-            async with session.begin():
-                reminder = await session.get(ReminderModel, id)
-                if reminder is None:
-                    raise ValueError(f"Reminder could not be found with id: {id}")
-                return reminder
+        async with UnitOfWork(self.database) as session:
+            reminder = await session.get(ReminderModel, id)
+            if reminder is None:
+                raise ValueError(f"Reminder could not be found with id: {id}")
+            return reminder
 
     async def remove_reminder(
         self,
         id: int,
     ) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                try:
-                    reminder = await self.get_reminder(id)
-                    await session.delete(reminder)
-                    await session.commit()
-                    return id
-                except ValueError:
-                    raise ValueError(f"Reminder could not be found with id: {id}")
+        async with UnitOfWork(self.database) as session:
+            # Loaded through the same session it's deleted from
+            reminder = await self.get_reminder(id)
+            await session.delete(reminder)
+            return id
 
     async def update_reminder_has_triggered(self, id: int):
-        async with self.database() as session:
-            async with session.begin():
-                try:
-                    reminder = await session.get(ReminderModel, id)
-                    reminder.has_triggered = True
-                    await session.commit()
-                except ValueError:
-                    raise ValueError(f"Reminder could not be found with id: {id}")
+        async with UnitOfWork(self.database):
+            reminder = await self.get_reminder(id)
+            reminder.has_triggered = True
@@ -0,0 +1,105 @@
+from sqlalchemy import Result, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from repository.table.soundboard_table import SoundbiteModel, SoundboardPageModel
+
+
+class SoundboardRepository:
+    def __init__(self, database: async_sessionmaker[AsyncSession]):
+        self.database = database
+
+    async def get_all_soundbites(self) -> list[SoundbiteModel]:
+        async with self.database() as session:
+            async with session.begin():
+                result: Result = await session.execute(
+                    select(SoundbiteModel).order_by(SoundbiteModel.name)
+                )
+                return list(result.scalars().all())
+
+    async def add_soundbites(self, soundbites: list[dict]) -> list[SoundbiteModel]:
+        """Adds the soundbites in one statement, overwriting the metadata of
+        existing ones with the same name while keeping their play count.
+
+        Each soundbite is a dict of name, path, duration, size and loudness.
+        """
+        if len(soundbites) == 0:
+            return []
+        statement = insert(SoundbiteModel).values(soundbites)
+        statement = statement.on_conflict_do_update(
+            index_elements=[SoundbiteModel.name],
+            set_={
+                "path": statement.excluded.path,
+                "duration": statement.excluded.duration,
+                "size": statement.excluded.size,
+                "loudness": statement.excluded.loudness,
+            },
+        ).returning(SoundbiteModel)
+        async with self.database() as session:
+            async with session.begin():
+                result = await session.scalars(
+                    statement, execution_options={"populate_existing": True}
+                )
+                return list(result.all())
+
+    async def remove_soundbites(self, names: list[str]) -> None:
+        async with self.database() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(SoundbiteModel).where(SoundbiteModel.name.in_(names))
+                )
+                await session.commit()
+
+    async def increment_play_count(self, name: str) -> None:
+        async with self.database() as session:
+            async with session.begin():
+                # Incremented in the database so concurrent plays aren't lost
+                await session.execute(
+                    update(SoundbiteModel)
+                    .where(SoundbiteModel.name == name)
+                    .values(play_count=SoundbiteModel.play_count + 1)
+                )
+                await session.commit()
+
+    async def get_pages(self, guild_id: int) -> list[SoundboardPageModel]:
+        async with self.database() as session:
+            async with session.begin():
+                result: Result = await session.execute(
+                    select(SoundboardPageModel)
+                    .where(SoundboardPageModel.guild_id == guild_id)
+                    .order_by(SoundboardPageModel.page_index)
+                )
+                return list(result.scalars().all())
+
+    async def get_all_pages(self) -> list[SoundboardPageModel]:
+        async with self.database() as session:
+            async with session.begin():
+                result: Result = await session.execute(
+                    select(SoundboardPageModel).order_by(
+                        SoundboardPageModel.guild_id, SoundboardPageModel.page_index
+                    )
+                )
+                return list(result.scalars().all())
+
+    async def set_pages(
+        self, guild_id: int, pages: list[SoundboardPageModel]
+    ) -> None:
+        """Replaces the guild's pages in a single transaction."""
+        async with self.database() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(SoundboardPageModel).where(
+                        SoundboardPageModel.guild_id == guild_id
+                    )
+                )
+                session.add_all(
+                    SoundboardPageModel(
+                        guild_id=guild_id,
+                        page_index=page_index,
+                        channel_id=page.channel_id,
+                        message_id=page.message_id,
+                        soundbites=list(page.soundbites),
+                    )
+                    for page_index, page in enumerate(pages)
+                )
+                await session.commit()
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, ForeignKey
+from sqlalchemy import Boolean, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..db_config import Base
@@ -22,6 +22,8 @@ class GameModel(Base):
     role: Mapped[int] = mapped_column(nullable=True, default=None)
     icon_url: Mapped[str] = mapped_column(nullable=True, default=None)
 
+    __table_args__ = (Index("ix_game_guild_id_name", "guild_id", "name"),)
+
 
 class MemberModel(Base):
     __tablename__ = "member"
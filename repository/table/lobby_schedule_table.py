@@ -0,0 +1,20 @@
+from datetime import datetime, time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from repository.db_config import Base
+
+
+class LobbyScheduleModel(Base):
+    __tablename__ = "lobby_cleanup_schedule"
+    # Guild id, each guild has at most one schedule
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]
+    cleanup_time: Mapped[time] = mapped_column(nullable=False)
+    timezone: Mapped[str] = mapped_column(nullable=False)
+    # Lobbies without activity for this many minutes are reclaimed early
+    idle_minutes: Mapped[int | None] = mapped_column(default=None)
+    updated_datetime: Mapped[datetime] = mapped_column(
+        default=func.now(), onupdate=func.now()
+    )
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from repository.db_config import Base
@@ -35,6 +35,12 @@ class PollModel(Base):
     created_datetime: Mapped[datetime] = mapped_column(default=func.now())
     is_active: Mapped[bool] = mapped_column(default=True)
 
+    __table_args__ = (
+        Index("ix_poll_guild_id_is_active", "guild_id", "is_active"),
+        # Active polls are reloaded on startup, concluded ones never are
+        Index("ix_poll_active", "id", postgresql_where=text("is_active = true")),
+    )
+
 
 class PollAnswerModel(Base):
     __tablename__ = "poll_answer"
@@ -45,6 +51,8 @@ class PollAnswerModel(Base):
     url: Mapped[str] = mapped_column(nullable=True, default=None)
     created_datetime: Mapped[datetime] = mapped_column(default=func.now())
 
+    __table_args__ = (Index("ix_poll_answer_poll_id_owner_id", "poll_id", "owner_id"),)
+
 
 class PollMemberAnswerModel(Base):
     __tablename__ = "poll_member_answer"
@@ -54,3 +62,11 @@ class PollMemberAnswerModel(Base):
     )
     member_id: Mapped[int] = mapped_column(nullable=False)
     answer_datetime: Mapped[datetime] = mapped_column(default=func.now())
+
+    __table_args__ = (
+        # A member votes for an answer at most once, votes are upserted against it
+        UniqueConstraint(
+            "poll_answer_id", "member_id", name="uq_poll_member_answer_vote"
+        ),
+        Index("ix_poll_member_answer_member_id", "member_id"),
+    )
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from repository.db_config import Base
@@ -24,3 +24,18 @@ class ReminderModel(Base):
         ForeignKey("reminder_guild.id", ondelete="CASCADE")
     )
     has_triggered: Mapped[bool] = mapped_column(default=False)
+
+    __table_args__ = (
+        # Only reminders still waiting to fire are looked up by time or owner
+        Index(
+            "ix_reminder_active_expire_at",
+            "expire_at",
+            postgresql_where=text("has_triggered = false"),
+        ),
+        Index(
+            "ix_reminder_active_owner_id",
+            "owner_id",
+            postgresql_where=text("has_triggered = false"),
+        ),
+        Index("ix_reminder_guild_id", "guild_id"),
+    )
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import ARRAY, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from repository.db_config import Base
+
+
+class SoundbiteModel(Base):
+    __tablename__ = "soundbite"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    # File stem, also used as the button custom_id
+    name: Mapped[str] = mapped_column(nullable=False, unique=True)
+    path: Mapped[str] = mapped_column(nullable=False)
+    # Seconds
+    duration: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    # Bytes
+    size: Mapped[int] = mapped_column(nullable=False, default=0)
+    # Mean volume in dB, None if it could not be measured
+    loudness: Mapped[float] = mapped_column(nullable=True, default=None)
+    play_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    created_datetime: Mapped[datetime] = mapped_column(default=func.now())
+
+
+class SoundboardPageModel(Base):
+    __tablename__ = "soundboard_page"
+    __table_args__ = (UniqueConstraint("guild_id", "page_index"),)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    guild_id: Mapped[int] = mapped_column(nullable=False)
+    page_index: Mapped[int] = mapped_column(nullable=False)
+    channel_id: Mapped[int] = mapped_column(nullable=False)
+    message_id: Mapped[int] = mapped_column(nullable=False)
+    # Soundbite names on the page's buttons
+    soundbites: Mapped[list[str]] = mapped_column(ARRAY(String), default_factory=list)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from repository.db_config import Base
@@ -21,3 +21,12 @@ class TimezoneUserModel(Base):
     guild_id: Mapped[int] = mapped_column(
         ForeignKey("timezone_guild.id", ondelete="CASCADE")
     )
+
+    __table_args__ = (
+        # Covers the guild's timezone list so it's read from the index alone
+        Index(
+            "ix_timezone_user_guild_id",
+            "guild_id",
+            postgresql_include=["timezone"],
+        ),
+    )
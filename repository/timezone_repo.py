@@ -1,8 +1,9 @@
 from typing import Protocol
-from sqlalchemy import Result, select
+from sqlalchemy import Result, func, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from repository.table.timezone_table import TimezoneGuildModel, TimezoneUserModel
+from repository.unit_of_work import UnitOfWork
 
 
 class Guild(Protocol):
@@ -15,22 +16,21 @@ class TimezoneRepository:
         self.database = database
 
     async def get_guild(self, guild_id: int) -> TimezoneGuildModel | None:
-        async with self.database() as session:
-            async with session.begin():
-                guild = await session.get(TimezoneGuildModel, guild_id)
-                return guild
+        async with UnitOfWork(self.database) as session:
+            guild = await session.get(TimezoneGuildModel, guild_id)
+            return guild
 
     async def add_guild(self, guild_id: int, guild_name: str) -> int:
-        async with self.database() as session:
-            async with session.begin():
-                session.add(
-                    TimezoneGuildModel(
-                        id=guild_id,
-                        name=guild_name,
-                    )
+        async with UnitOfWork(self.database) as session:
+            session.add(
+                TimezoneGuildModel(
+                    id=guild_id,
+                    name=guild_name,
                 )
-                await session.commit()
-                return guild_id
+            )
+            # Written before rows referencing it in the same unit of work
+            await session.flush()
+            return guild_id
 
     async def register_timezone(
         self,
@@ -38,59 +38,56 @@ class TimezoneRepository:
         timezone: str,
         guild: Guild
     ) -> int:
-        guild_id = None
-        guild_model = await self.get_guild(guild.id)
-        if guild_model is None:
-            guild_id = await self.add_guild(guild_id=guild.id, guild_name=guild.name)
+        async with UnitOfWork(self.database) as session:
+            # The guild lookup and insert join this session
+            if await self.get_guild(guild.id) is None:
+                await self.add_guild(guild_id=guild.id, guild_name=guild.name)
 
-        async with self.database() as session:
-            async with session.begin():
-                timezone_user_model = TimezoneUserModel(
-                    id=user_id,
-                    timezone=timezone,
-                    guild_id=guild_id or guild_model.id
-                )
-                session.add(timezone_user_model)
-                await session.commit()
-                return timezone_user_model.id
+            timezone_user_model = TimezoneUserModel(
+                id=user_id,
+                timezone=timezone,
+                guild_id=guild.id
+            )
+            session.add(timezone_user_model)
+            await session.flush()
+            return timezone_user_model.id
 
     async def update_timezone(
         self,
         user_id: int,
         timezone: str
     ) -> tuple[str, str]:
-        async with self.database() as session:
-            async with session.begin():
-                user = await session.get(TimezoneUserModel, user_id)
-                if user is None:
-                    raise ValueError(
-                        f"User with id: {user_id} does not have a timezone registered.")
-                old_timezone = user.timezone
-                user.timezone = timezone
-                await session.commit()
-                return old_timezone, user.timezone,
+        async with UnitOfWork(self.database) as session:
+            user = await session.get(TimezoneUserModel, user_id)
+            if user is None:
+                raise ValueError(
+                    f"User with id: {user_id} does not have a timezone registered.")
+            old_timezone = user.timezone
+            user.timezone = timezone
+            return old_timezone, user.timezone,
 
-    async def get_all_registered_timezones(
+    async def get_timezone_counts(
         self,
         guild_id: int
-    ) -> list[str]:
-        async with self.database() as session:
-            async with session.begin():
-                result: Result = await session.execute(
-                    select(TimezoneUserModel.timezone).where(
-                        TimezoneUserModel.guild_id == guild_id
-                    )
-                )
-                return list(result.scalars().unique().all())
+    ) -> list[tuple[str, int]]:
+        """Registered timezones of the guild with how many members use each."""
+        async with UnitOfWork(self.database) as session:
+            result: Result = await session.execute(
+                select(TimezoneUserModel.timezone, func.count())
+                .where(TimezoneUserModel.guild_id == guild_id)
+                .group_by(TimezoneUserModel.timezone)
+            )
+            return [(timezone, count) for timezone, count in result.all()]
 
-    async def get_timezone_of_user(
+    async def get_timezones_of_users(
         self,
-        user_id: int
-    ) -> str:
-        async with self.database() as session:
-            async with session.begin():
-                user = await session.get(TimezoneUserModel, user_id)
-                if user is None:
-                    raise ValueError(
-                        f"User with id: {user_id} does not have a timezone registered.")
-                return user.timezone
+        user_ids: list[int]
+    ) -> dict[int, str]:
+        """Timezones of the users that have one registered, in one query."""
+        async with UnitOfWork(self.database) as session:
+            result: Result = await session.execute(
+                select(TimezoneUserModel.id, TimezoneUserModel.timezone).where(
+                    TimezoneUserModel.id.in_(user_ids)
+                )
+            )
+            return {user_id: timezone for user_id, timezone in result.all()}
@@ -0,0 +1,57 @@
+import asyncio
+from contextvars import ContextVar, Token
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+# Unit of work in progress for each database
+_current: ContextVar[dict[async_sessionmaker[AsyncSession], "UnitOfWork"]] = (
+    ContextVar("unit_of_work", default={})
+)
+
+
+class UnitOfWork:
+    """One session, connection and transaction shared by every repository call
+    made inside it, committed once at the end or rolled back on error.
+
+    Repositories open one for each method, which joins the unit of work a manager
+    already started on the same database. Only the task that started it joins,
+    tasks spawned inside it inherit the context but get their own session.
+    """
+
+    def __init__(self, database: async_sessionmaker[AsyncSession]) -> None:
+        self.database = database
+        self._session: AsyncSession | None = None
+        self._task: asyncio.Task | None = None
+        self._token: Token | None = None
+
+    def _active_session(self) -> AsyncSession | None:
+        outer = _current.get().get(self.database)
+        if outer is None or outer._task is not asyncio.current_task():
+            return None
+        return outer._session
+
+    async def __aenter__(self) -> AsyncSession:
+        session = self._active_session()
+        if session is not None:
+            # The outer unit of work commits
+            return session
+
+        self._session = self.database()
+        self._task = asyncio.current_task()
+        await self._session.begin()
+        self._token = _current.set({**_current.get(), self.database: self})
+        return self._session
+
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        if self._token is None:
+            return
+        session, token = self._session, self._token
+        self._session = self._task = self._token = None
+        try:
+            if exc_type is None:
+                await session.commit()  # type: ignore
+            else:
+                await session.rollback()  # type: ignore
+        finally:
+            await session.close()  # type: ignore
+            _current.reset(token)
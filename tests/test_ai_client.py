@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from cog.classes.ai_client import AiClient
+
+WORDS = ["Hello", " there", ", general", " Kenobi"]
+
+
+def completion_chunk(text: str) -> bytes:
+    chunk = {
+        "id": "cmpl-test",
+        "object": "text_completion",
+        "created": 0,
+        "model": "fake-model",
+        "choices": [
+            {"text": text, "index": 0, "logprobs": None, "finish_reason": None}
+        ],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+class FakeCompletionServer:
+    """Local stand-in for the completions endpoint, streams WORDS and records how
+    many requests were in flight at once."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def completions(self, request: web.Request) -> web.StreamResponse:
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            for word in WORDS:
+                await asyncio.sleep(self.delay)
+                await response.write(completion_chunk(word))
+            await response.write(b"data: [DONE]\n\n")
+        finally:
+            self.in_flight -= 1
+        return response
+
+
+@pytest_asyncio.fixture()
+async def fake_server():
+    server = FakeCompletionServer()
+    app = web.Application()
+    app.router.add_post("/v1/completions", server.completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    yield server, f"http://127.0.0.1:{port}/v1"
+    await runner.cleanup()
+
+
+class TestAiClient:
+    @pytest.mark.asyncio
+    async def test_streams_partial_responses(self, fake_server):
+        server, base_url = fake_server
+        client = AiClient(api_key="test", base_url=base_url, timeout=5)
+
+        chunks = [chunk async for chunk in client.stream_completion("Hi", 1)]
+        await client.close()
+
+        assert [chunk.text for chunk in chunks] == WORDS
+        assert chunks[-1].model == "fake-model"
+
+    @pytest.mark.asyncio
+    async def test_guild_concurrency_limit(self, fake_server):
+        server, base_url = fake_server
+        client = AiClient(api_key="test", base_url=base_url, timeout=5)
+
+        async def query():
+            return [chunk async for chunk in client.stream_completion("Hi", 1)]
+
+        await asyncio.gather(*(query() for _ in range(3)))
+        await client.close()
+
+        assert server.peak == 1
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_limit(self, fake_server):
+        server, base_url = fake_server
+        client = AiClient(
+            api_key="test", base_url=base_url, timeout=5, max_concurrency=2
+        )
+
+        async def query(guild_id: int):
+            return [chunk async for chunk in client.stream_completion("Hi", guild_id)]
+
+        await asyncio.gather(*(query(guild_id) for guild_id in range(1, 6)))
+        await client.close()
+
+        assert server.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, fake_server):
+        server, base_url = fake_server
+        server.delay = 1
+        client = AiClient(api_key="test", base_url=base_url, timeout=0.2)
+
+        with pytest.raises(Exception):
+            async for _ in client.stream_completion("Hi", 1):
+                pass
+        await client.close()
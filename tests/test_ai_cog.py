@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from cog import ai
+from cog.ai import AiCog
+from cog.classes.ai_client import CompletionChunk
+
+WORDS = ["Hello", " there"]
+
+
+class FakeAiClient:
+    """Test specific: Streams WORDS once `release` is set, or raises `error`"""
+
+    model = "fake-model"
+
+    def __init__(self, error: Exception | None = None) -> None:
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+        self.started = asyncio.Event()
+
+    async def stream_completion(self, query: str, guild_id: int | None):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        for word in WORDS:
+            yield CompletionChunk(text=word, model=self.model)
+
+
+class FakeMessage:
+    def __init__(self, followup: "FakeFollowup") -> None:
+        self.followup = followup
+
+    async def edit(self, embed) -> None:
+        await self.followup.send(embed=embed)
+
+
+class FakeFollowup:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+        # Cleared to hold Discord requests, like a rate limited webhook
+        self.open = asyncio.Event()
+        self.open.set()
+
+    async def send(self, content=None, embed=None, wait=False):
+        await self.open.wait()
+        self.sent.append(embed.description if embed is not None else content)
+        return FakeMessage(self)
+
+
+class FakeResponse:
+    async def defer(self) -> None:
+        pass
+
+
+class FakeInteraction:
+    def __init__(self) -> None:
+        self.guild_id = 1
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+async def ask(cog: AiCog, query: str = "Hi", fresh: bool = False) -> FakeInteraction:
+    interaction = FakeInteraction()
+    await cog.query.callback(cog, interaction, query, fresh)  # type: ignore
+    return interaction
+
+
+def create_cog(client: FakeAiClient) -> AiCog:
+    return AiCog(bot=None, ai_client=client)  # type: ignore
+
+
+class TestQuerySingleFlight:
+    @pytest.mark.asyncio
+    async def test_cache_hit(self):
+        client = FakeAiClient()
+        cog = create_cog(client)
+
+        first = await ask(cog, "Hi")
+        second = await ask(cog, "  hi ")
+
+        assert client.calls == 1
+        assert first.followup.sent[-1] == second.followup.sent[-1] == "Hello there"
+
+    @pytest.mark.asyncio
+    async def test_fresh_asks_again(self):
+        client = FakeAiClient()
+        cog = create_cog(client)
+
+        await ask(cog)
+        await ask(cog, fresh=True)
+        assert client.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_shared_in_flight_answered_before_the_leaders_edits(
+        self, monkeypatch
+    ):
+        # No partial edits, the leader's only Discord request is its final one
+        monkeypatch.setattr(ai, "EDIT_INTERVAL", float("inf"))
+        client = FakeAiClient()
+        client.release.clear()
+        cog = create_cog(client)
+        leader = FakeInteraction()
+        leader.followup.open.clear()
+
+        leading = asyncio.create_task(
+            cog.query.callback(cog, leader, "Hi", False)  # type: ignore
+        )
+        await client.started.wait()
+        following = asyncio.create_task(ask(cog))
+        await asyncio.sleep(0)
+        client.release.set()
+
+        follower = await asyncio.wait_for(following, timeout=1)
+        assert follower.followup.sent == ["Hello there"]
+        assert not leading.done()
+
+        leader.followup.open.set()
+        await leading
+        assert leader.followup.sent == ["Hello there"]
+        assert client.calls == 1
+        assert cog._in_flight == {}
+
+    @pytest.mark.asyncio
+    async def test_leader_failure_reaches_waiting_queries(self):
+        client = FakeAiClient(error=RuntimeError("server down"))
+        client.release.clear()
+        cog = create_cog(client)
+
+        leading = asyncio.create_task(ask(cog))
+        await client.started.wait()
+        following = asyncio.create_task(ask(cog))
+        await asyncio.sleep(0)
+        client.release.set()
+
+        leader, follower = await asyncio.wait_for(
+            asyncio.gather(leading, following), timeout=1
+        )
+        assert leader.followup.sent == follower.followup.sent == ["server down"]
+        assert client.calls == 1
+        assert cog._in_flight == {}
+
+    @pytest.mark.asyncio
+    async def test_leader_cancelled_waiting_query_asks_itself(self):
+        client = FakeAiClient()
+        client.release.clear()
+        cog = create_cog(client)
+
+        leading = asyncio.create_task(ask(cog))
+        await client.started.wait()
+        following = asyncio.create_task(ask(cog))
+        await asyncio.sleep(0)
+        leading.cancel()
+        await asyncio.sleep(0)
+        client.release.set()
+
+        follower = await asyncio.wait_for(following, timeout=1)
+        assert leading.cancelled()
+        assert follower.followup.sent[-1] == "Hello there"
+        assert client.calls == 2
+        assert cog._in_flight == {}
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from cog.classes.debouncer import KeyedDebouncer
+
+WINDOW = 0.05
+
+
+class Recorder:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[int] = []
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, key: int) -> None:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delay)
+        self.calls.append(key)
+        self.running -= 1
+
+
+class TestKeyedDebouncer:
+    @pytest.mark.asyncio
+    async def test_storm_is_coalesced(self):
+        recorder = Recorder()
+        debouncer = KeyedDebouncer(recorder, WINDOW, logging.getLogger("test"))
+
+        started = time.monotonic()
+        for _ in range(1000):
+            debouncer.schedule(1)
+            await asyncio.sleep(WINDOW / 100)
+        elapsed = time.monotonic() - started
+        while debouncer.is_scheduled(1):
+            await asyncio.sleep(WINDOW)
+
+        # At most one call per window, plus the one that flushes the tail
+        assert 1 <= len(recorder.calls) <= elapsed / WINDOW + 1
+
+    @pytest.mark.asyncio
+    async def test_request_during_call_runs_again(self):
+        recorder = Recorder(delay=WINDOW)
+        debouncer = KeyedDebouncer(recorder, WINDOW, logging.getLogger("test"))
+
+        debouncer.schedule(1)
+        await asyncio.sleep(WINDOW * 1.5)
+        # The first call is running now, its result would already be stale
+        debouncer.schedule(1)
+        debouncer.schedule(1)
+        while debouncer.is_scheduled(1):
+            await asyncio.sleep(WINDOW)
+
+        assert recorder.calls == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_keys_run_concurrently(self):
+        recorder = Recorder(delay=WINDOW)
+        debouncer = KeyedDebouncer(recorder, WINDOW, logging.getLogger("test"))
+
+        for key in range(5):
+            debouncer.schedule(key)
+        await asyncio.sleep(WINDOW * 3)
+
+        assert sorted(recorder.calls) == list(range(5))
+        assert recorder.peak == 5
+
+    @pytest.mark.asyncio
+    async def test_failure_does_not_block_key(self):
+        calls = []
+
+        async def callback(key: int) -> None:
+            calls.append(key)
+            if len(calls) == 1:
+                raise RuntimeError("edit failed")
+
+        debouncer = KeyedDebouncer(callback, WINDOW, logging.getLogger("test"))
+        debouncer.schedule(1)
+        await asyncio.sleep(WINDOW * 2)
+        debouncer.schedule(1)
+        await asyncio.sleep(WINDOW * 2)
+
+        assert calls == [1, 1]
+        await debouncer.close()
@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+
+import discord
+import pytest
+from discord.ext import commands
+
+from cog.classes.extension_loader import ExtensionLoader
+
+EXTENSION = """
+import asyncio
+import builtins
+import time
+
+builtins.loader_executions.append(__name__)
+{body}
+
+
+async def setup(bot):
+    {setup}
+"""
+
+
+@pytest.fixture()
+def extensions(tmp_path: Path, monkeypatch):
+    """Test specific: Writes extension modules that record each execution"""
+    executions: list[str] = []
+    monkeypatch.setattr("builtins.loader_executions", executions, raising=False)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    package = tmp_path / "loader_ext"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+
+    def write(name: str, setup: str = "pass", body: str = "") -> str:
+        (package / f"{name}.py").write_text(EXTENSION.format(setup=setup, body=body))
+        return f"loader_ext.{name}"
+
+    yield write, executions
+    for module in [name for name in sys.modules if name.startswith("loader_ext")]:
+        del sys.modules[module]
+
+
+def create_bot() -> commands.Bot:
+    return commands.Bot(command_prefix="/", intents=discord.Intents.none())
+
+
+class TestExtensionLoader:
+    @pytest.mark.asyncio
+    async def test_module_executes_once(self, extensions):
+        write, executions = extensions
+        first, second = write("first"), write("second")
+
+        loader = ExtensionLoader(bot=create_bot(), profile=True)
+        await loader.load([[first], [second]])
+
+        assert executions == [first, second]
+        assert [timing.name for timing in loader.timings] == [first, second]
+        assert first in loader.report()
+
+    @pytest.mark.asyncio
+    async def test_import_and_setup_timed_separately(self, extensions):
+        write, executions = extensions
+        slow_import = write("slow_import", body="time.sleep(0.1)")
+        slow_setup = write("slow_setup", setup="await asyncio.sleep(0.1)")
+
+        bot = create_bot()
+        loader = ExtensionLoader(bot=bot, profile=True)
+        await loader.load([[slow_import, slow_setup]])
+
+        timings = {timing.name: timing for timing in loader.timings}
+        assert timings[slow_import].import_time >= 0.1
+        assert timings[slow_import].setup_time < 0.1
+        assert timings[slow_setup].setup_time >= 0.1
+        assert timings[slow_setup].import_time < 0.1
+        assert executions == [slow_import, slow_setup]
+        # Nothing of the profiling is left on the bot or the modules
+        assert "_load_from_module_spec" not in vars(bot)
+        module = sys.modules[slow_setup]
+        assert type(module.__spec__.loader).__name__ != "TimedLoader"
+        assert type(module.__loader__).__name__ != "TimedLoader"
+        assert module.setup.__name__ == "setup"
+
+    @pytest.mark.asyncio
+    async def test_failed_stage_stops_loading(self, extensions):
+        write, executions = extensions
+        broken = write("broken", setup="raise RuntimeError('broken setup')")
+        later = write("later")
+
+        loader = ExtensionLoader(bot=create_bot())
+        with pytest.raises(commands.ExtensionFailed):
+            await loader.load([[broken], [later]])
+        assert later not in executions
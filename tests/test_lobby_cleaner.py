@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from api.models import LobbyModel, MemberLobbyModel
+from cog.classes.lobby.lobby_cleaner import (DESCRIPTION_LIMIT, CleanupAction,
+                                             CleanupPlan, LobbyCleaner,
+                                             RateLimitBucket)
+
+
+class Clock:
+    """Test specific: Monotonic time that only moves when the bucket sleeps"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+def create_bucket(clock: Clock, capacity: int, per: float) -> RateLimitBucket:
+    return RateLimitBucket(capacity, per, clock=clock.monotonic, sleep=clock.sleep)
+
+
+def create_lobby(
+    lobby_id: int, guild_id: int = 1, created: datetime | None = None
+) -> LobbyModel:
+    return LobbyModel(
+        id=lobby_id,
+        created_datetime=created or datetime.now(UTC),
+        game_id=1,
+        game_size=5,
+        guild_id=guild_id,
+        original_channel_id=1,
+        owner_id=1,
+    )
+
+
+def create_cleaner() -> LobbyCleaner:
+    return LobbyCleaner(
+        lobby_manager=None,  # type: ignore
+        logger=logging.getLogger("test_lobby_cleaner"),
+    )
+
+
+class TestRateLimitBucket:
+    @pytest.mark.asyncio
+    async def test_burst_within_capacity_does_not_wait(self):
+        clock = Clock()
+        bucket = create_bucket(clock, capacity=4, per=2.0)
+        for _ in range(2):
+            await bucket.acquire(2)
+        assert clock.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_waits_for_refill(self):
+        clock = Clock()
+        bucket = create_bucket(clock, capacity=4, per=2.0)
+        await bucket.acquire(4)
+        await bucket.acquire(2)
+        # Two tokens refill in a second
+        assert clock.sleeps == [pytest.approx(1.0)]
+
+    @pytest.mark.asyncio
+    async def test_waiters_drain_at_refill_rate(self):
+        clock = Clock()
+        bucket = create_bucket(clock, capacity=2, per=1.0)
+        await asyncio.gather(*(bucket.acquire(2) for _ in range(5)))
+        assert clock.now == pytest.approx(4.0)
+
+
+class TestCleanupPlan:
+    def test_plan_filters_by_guild(self):
+        lobbies = [create_lobby(1, guild_id=1), create_lobby(2, guild_id=2)]
+        plan = create_cleaner().plan(lobbies, guild_id=2)
+        assert [action.lobby.id for action in plan.actions] == [2]
+
+    def test_plan_keeps_only_idle_lobbies(self):
+        now = datetime.now(UTC)
+        idle = create_lobby(1, created=now - timedelta(hours=3))
+        active = create_lobby(2, created=now - timedelta(hours=3))
+        active.member_lobbies = [
+            MemberLobbyModel(
+                lobby_id=2,
+                member_id=1,
+                has_joined_vc=False,
+                # Stored without the timezone
+                join_datetime=(now - timedelta(minutes=5)).replace(tzinfo=None),
+                ready=False,
+            )
+        ]
+
+        plan = create_cleaner().plan([idle, active], idle_for=timedelta(hours=1))
+        assert [action.lobby.id for action in plan.actions] == [1]
+
+    def test_describe_groups_by_guild(self):
+        plan = CleanupPlan(
+            actions=[
+                CleanupAction(
+                    lobby=create_lobby(lobby_id, guild_id), reason="scheduled"
+                )
+                for lobby_id, guild_id in ((1, 10), (2, 10), (3, 20))
+            ]
+        )
+        assert plan.describe() == (
+            "3 lobbies planned for deletion:\n"
+            "⠀⠀⤷ Guild 10: 1, 2\n"
+            "⠀⠀⤷ Guild 20: 3"
+        )
+        assert CleanupPlan().describe() == "No lobbies to clean up."
+
+    def test_describe_fits_embed_description(self):
+        plan = CleanupPlan(
+            actions=[
+                CleanupAction(
+                    lobby=create_lobby(100_000 + index, guild_id=index % 7),
+                    reason="scheduled",
+                )
+                for index in range(5000)
+            ]
+        )
+        description = plan.describe()
+        assert len(description) <= DESCRIPTION_LIMIT
+        # One id after each guild heading and after each comma
+        shown = description.count(", ") + description.count(": ")
+        assert description.endswith(f"…and {5000 - shown} more")
+        assert len(plan.describe(limit=None)) > DESCRIPTION_LIMIT
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, time, timedelta
+
+import pytest
+import pytest_asyncio
+
+from api.models import LobbyModel
+from cog.classes.lobby.lobby_cleaner import LobbyCleaner
+from cog.classes.scheduler_task import SchedulerTask
+from cog.scheduler import SchedulerCog
+from manager.lobby_schedule_service import (MAX_IDLE_SWEEP_INTERVAL,
+                                            MIN_IDLE_SWEEP_INTERVAL,
+                                            LobbyScheduleManager)
+from repository.lobby_schedule_repo import MemoryLobbyScheduleRepository
+
+
+@dataclass
+class Guild:
+    id: int
+    name: str
+
+
+class CountingLoop:
+    """Test specific: Event loop proxy counting the tasks the scheduler starts"""
+
+    def __init__(self) -> None:
+        self.created = 0
+
+    def create_task(self, coroutine):
+        self.created += 1
+        return asyncio.get_running_loop().create_task(coroutine)
+
+
+@dataclass
+class FakeBot:
+    guilds: list[Guild] = field(default_factory=list)
+    loop: CountingLoop = field(default_factory=CountingLoop)
+    scheduler: SchedulerCog | None = None
+
+    async def wait_until_ready(self) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return False
+
+    def get_cog(self, name: str):
+        return self.scheduler
+
+
+class FakeLobbyManager:
+    def __init__(self, lobbies: list[LobbyModel]) -> None:
+        self.lobbies = lobbies
+        self.deleted: list[int] = []
+
+    async def get_all_lobbies(self) -> list[LobbyModel]:
+        return self.lobbies
+
+    async def delete_lobby_model(self, lobby: LobbyModel, clean_up: bool) -> None:
+        self.deleted.append(lobby.id)
+
+
+def create_lobby(lobby_id: int, guild_id: int, idle_for: timedelta) -> LobbyModel:
+    return LobbyModel(
+        id=lobby_id,
+        created_datetime=datetime.now(UTC) - idle_for,
+        game_id=1,
+        game_size=5,
+        guild_id=guild_id,
+        original_channel_id=1,
+        owner_id=1,
+    )
+
+
+def create_manager(
+    bot: FakeBot, lobbies: list[LobbyModel] | None = None
+) -> tuple[LobbyScheduleManager, FakeLobbyManager]:
+    lobby_manager = FakeLobbyManager(lobbies or [])
+    manager = LobbyScheduleManager(
+        bot=bot,  # type: ignore
+        repository=MemoryLobbyScheduleRepository(),
+        lobby_manager=lobby_manager,  # type: ignore
+        lobby_cleaner=LobbyCleaner(
+            lobby_manager=lobby_manager,  # type: ignore
+            logger=logging.getLogger("test_lobby_schedule"),
+        ),
+    )
+    return manager, lobby_manager
+
+
+@pytest_asyncio.fixture()
+async def scheduler():
+    """Test specific: A scheduler waiting on a task far in the future"""
+    bot = FakeBot()
+    scheduler = SchedulerCog(bot)  # type: ignore
+    bot.scheduler = scheduler
+    far = SchedulerTask(
+        id="far", expires_at=datetime.now() + timedelta(days=30), task=lambda: None
+    )
+    scheduler.schedule_item(far)
+    scheduler.current_schedule = far
+    yield scheduler
+    scheduler.task.cancel()
+
+
+class TestDefaultSchedule:
+    @pytest.mark.parametrize(
+        "guild_id, cleanup_time",
+        [(0, time(5, 0)), (125, time(5, 5)), (59, time(5, 59)), (60, time(5, 0))],
+    )
+    def test_spread_over_an_hour_by_guild_id(self, guild_id, cleanup_time):
+        schedule = LobbyScheduleManager._default_schedule(guild_id, "guild")
+        assert schedule.cleanup_time == cleanup_time
+        assert schedule.timezone == "Pacific/Auckland"
+        assert schedule.idle_minutes is None
+
+    def test_next_run_time_is_within_a_day(self):
+        schedule = LobbyScheduleManager._default_schedule(1, "guild")
+        next_run = LobbyScheduleManager.next_run_time(schedule)
+        assert datetime.now() < next_run <= datetime.now() + timedelta(days=1, hours=1)
+
+    def test_idle_sweep_interval_is_bounded(self):
+        assert LobbyScheduleManager.idle_sweep_interval(1) == MIN_IDLE_SWEEP_INTERVAL
+        assert LobbyScheduleManager.idle_sweep_interval(60) == timedelta(minutes=30)
+        assert LobbyScheduleManager.idle_sweep_interval(10080) == (
+            MAX_IDLE_SWEEP_INTERVAL
+        )
+
+
+class TestIdleSweep:
+    @pytest.mark.asyncio
+    async def test_only_idle_lobbies_of_the_guild_are_deleted(self):
+        lobbies = [
+            create_lobby(1, guild_id=1, idle_for=timedelta(hours=2)),
+            create_lobby(2, guild_id=1, idle_for=timedelta(minutes=5)),
+            create_lobby(3, guild_id=2, idle_for=timedelta(hours=2)),
+        ]
+        manager, lobby_manager = create_manager(FakeBot(), lobbies)
+
+        await manager.run_cleanup(1, idle_for=timedelta(hours=1))
+        assert lobby_manager.deleted == [1]
+
+    @pytest.mark.asyncio
+    async def test_sweep_runs_and_reschedules(self, scheduler):
+        lobbies = [create_lobby(1, guild_id=1, idle_for=timedelta(hours=2))]
+        manager, lobby_manager = create_manager(scheduler.bot, lobbies)
+        schedule = await manager.repository.set_schedule(
+            guild_id=1,
+            guild_name="guild",
+            cleanup_time=time(5, 0),
+            timezone="Pacific/Auckland",
+            idle_minutes=60,
+        )
+        manager.schedule_guild(schedule)
+        first = manager._idle_tasks[1]
+
+        first.task()  # type: ignore
+        await asyncio.gather(*manager._running)
+
+        assert lobby_manager.deleted == [1]
+        assert manager._idle_tasks[1] is not first
+        assert first not in scheduler.schedules
+        assert manager._idle_tasks[1] in scheduler.schedules
+
+
+class TestPopulateScheduler:
+    @pytest.mark.asyncio
+    async def test_every_guild_is_scheduled_with_one_restart(self, scheduler):
+        bot = scheduler.bot
+        bot.guilds = [Guild(id=guild_id, name="guild") for guild_id in range(200)]
+        manager, _ = create_manager(bot)
+        await manager.repository.set_schedule(
+            guild_id=7,
+            guild_name="guild",
+            cleanup_time=time(3, 0),
+            timezone="UTC",
+            idle_minutes=30,
+        )
+        started = bot.loop.created
+
+        await manager.populate_scheduler()
+
+        assert len(manager._cleanup_tasks) == 200
+        assert list(manager._idle_tasks) == [7]
+        # The far task, the guilds' clean ups and one idle sweep
+        assert len(scheduler.schedules) == 1 + 200 + 1
+        assert bot.loop.created - started == 1
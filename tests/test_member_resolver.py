@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import pytest
+
+from cog.classes.member_resolver import MemberResolver
+
+
+@dataclass
+class FakeMember:
+    id: int
+
+
+class FakeGuild:
+    """Guild with a partial member cache, counts the gateway requests made."""
+
+    def __init__(self, id: int, member_ids: range, cached: int = 0):
+        self.id = id
+        self.members = {member_id: FakeMember(member_id) for member_id in member_ids}
+        self.cached = {
+            member_id: self.members[member_id] for member_id in member_ids[:cached]
+        }
+        self.queries: list[list[int]] = []
+
+    def get_member(self, member_id: int):
+        return self.cached.get(member_id)
+
+    async def query_members(self, *, user_ids: list[int], limit: int, cache: bool):
+        self.queries.append(user_ids)
+        await asyncio.sleep(0)
+        return [self.members[id] for id in user_ids if id in self.members]
+
+
+class TestMemberResolver:
+    @pytest.mark.asyncio
+    async def test_cached_member_needs_no_query(self):
+        guild = FakeGuild(1, range(10), cached=10)
+        resolver = MemberResolver(logging.getLogger("test"))
+
+        assert await resolver.get_member(guild, 3) == FakeMember(3)  # type: ignore
+        assert guild.queries == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_are_batched(self):
+        guild = FakeGuild(1, range(250))
+        resolver = MemberResolver(logging.getLogger("test"))
+
+        members = await resolver.get_members(guild, list(range(250)))  # type: ignore
+
+        assert all(members[id] == FakeMember(id) for id in range(250))
+        assert [len(query) for query in guild.queries] == [100, 100, 50]
+
+    @pytest.mark.asyncio
+    async def test_results_and_misses_are_cached(self):
+        guild = FakeGuild(1, range(5))
+        resolver = MemberResolver(logging.getLogger("test"))
+
+        assert await resolver.get_member(guild, 2) == FakeMember(2)  # type: ignore
+        assert await resolver.get_member(guild, 99) is None  # type: ignore
+        assert await resolver.get_member(guild, 2) == FakeMember(2)  # type: ignore
+        assert await resolver.get_member(guild, 99) is None  # type: ignore
+
+        assert guild.queries == [[2], [99]]
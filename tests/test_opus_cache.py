@@ -0,0 +1,60 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from cog.classes.soundboard.opus_cache import OpusCache
+
+
+class FakeTranscoder:
+    """Test specific: Encodes by copying, recording how many run at once"""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+        self.transcoded: list[str] = []
+
+    async def file_to_opus(
+        self, source: Path, output: Path, audio_filter: str | None = None
+    ) -> Path:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        output.write_bytes(source.read_bytes())
+        self.transcoded.append(source.stem)
+        self.running -= 1
+        return output
+
+
+def create_sources(directory: Path, count: int) -> list[Path]:
+    sources = []
+    for index in range(count):
+        source = directory / f"sound{index}.mp3"
+        source.write_bytes(b"mp3")
+        sources.append(source)
+    return sources
+
+
+class TestWarm:
+    @pytest.mark.asyncio
+    async def test_warms_one_soundbite_at_a_time(self, tmp_path):
+        transcoder = FakeTranscoder()
+        cache = OpusCache(transcoder, directory=tmp_path / "opus")  # type: ignore
+        sources = create_sources(tmp_path, 5)
+
+        await cache.warm(sources)
+
+        assert transcoder.peak == 1
+        assert transcoder.transcoded == [source.stem for source in sources]
+        assert all(cache.is_cached(source) for source in sources)
+
+    @pytest.mark.asyncio
+    async def test_cached_soundbites_are_skipped(self, tmp_path):
+        transcoder = FakeTranscoder()
+        cache = OpusCache(transcoder, directory=tmp_path / "opus")  # type: ignore
+        sources = create_sources(tmp_path, 3)
+        await cache.ensure(sources[1])
+
+        await cache.warm(sources)
+
+        assert transcoder.transcoded == ["sound1", "sound0", "sound2"]
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from cog.classes.piper import phrase_cache
+from cog.classes.piper.phrase_cache import PhraseCache
+from cog.classes.soundboard.transcoder import Transcoder, get_transcoder
+
+
+@pytest.fixture()
+def reads(monkeypatch) -> list[str]:
+    """Test specific: Records which thread each phrase file is read in"""
+    threads: list[str] = []
+
+    def read_audio_packets(path):
+        threads.append(threading.current_thread().name)
+        with open(path, "rb") as file:
+            return [file.read()]
+
+    monkeypatch.setattr(phrase_cache, "read_audio_packets", read_audio_packets)
+    return threads
+
+
+class FakeTranscoder:
+    """Test specific: Writes the audio as it is, slowly enough to overlap"""
+
+    def __init__(self) -> None:
+        self.encodes = 0
+
+    async def stream_to_opus(self, chunks, output: Path, audio_filter=None) -> Path:
+        self.encodes += 1
+        data = b"".join([chunk async for chunk in chunks])
+        await asyncio.sleep(0.01)
+        output.write_bytes(data)
+        return output
+
+
+def create_cache(tmp_path, disk_budget: int = 1024) -> PhraseCache:
+    return PhraseCache(
+        Transcoder(temp_directory=tmp_path / "temp"),
+        tmp_path,
+        disk_budget=disk_budget,
+    )
+
+
+class TestPhraseCache:
+    @pytest.mark.asyncio
+    async def test_disk_hit_is_read_off_the_event_loop(self, tmp_path, reads):
+        key = PhraseCache.key("Hello  World", voice="voice")
+        (tmp_path / f"{key}.ogg").write_bytes(b"packet")
+        # Phrases already on disk are picked up on start
+        cache = create_cache(tmp_path)
+
+        assert await cache.get_source(key) is not None
+        assert await cache.get_source(key) is not None
+
+        # Read once in a worker thread, the second play came from memory
+        assert len(reads) == 1
+        assert reads[0] != threading.main_thread().name
+        stats = cache.stats()
+        assert (stats.memory_hits, stats.disk_hits, stats.misses) == (1, 1, 0)
+
+    @pytest.mark.asyncio
+    async def test_missing_phrase_is_a_miss(self, tmp_path, reads):
+        cache = create_cache(tmp_path)
+        assert await cache.get_source(cache.key("hello", voice="voice")) is None
+        assert cache.stats().misses == 1
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_stores_encode_once(self, tmp_path):
+        cache = create_cache(tmp_path)
+        transcoder = cache.transcoder = FakeTranscoder()  # type: ignore
+        key = cache.key("hello", voice="voice")
+
+        await asyncio.gather(*(cache.store(key, [b"ab", b"cd"]) for _ in range(3)))
+
+        assert transcoder.encodes == 1
+        stats = cache.stats()
+        assert (stats.entries, stats.disk_size) == (1, 4)
+
+    @pytest.mark.asyncio
+    async def test_least_recently_played_evicted_first(self, tmp_path, reads):
+        cache = create_cache(tmp_path, disk_budget=10)
+        cache.transcoder = FakeTranscoder()  # type: ignore
+        first, second, third = (
+            cache.key(text, voice="voice") for text in ("one", "two", "three")
+        )
+        await cache.store(first, [b"1" * 4])
+        await cache.store(second, [b"2" * 4])
+        # Played, so the second phrase is now the least recent
+        assert await cache.get_source(first) is not None
+
+        await cache.store(third, [b"3" * 4])
+
+        assert cache.path(first).is_file()
+        assert not cache.path(second).is_file()
+        assert cache.path(third).is_file()
+        assert cache.stats().disk_size == 8
+        assert await cache.get_source(second) is None
+
+
+class TestGetTranscoder:
+    def test_shared_per_bot(self, tmp_path, monkeypatch):
+        # The transcoder creates its temp directory relative to the working one
+        monkeypatch.chdir(tmp_path)
+
+        class Bot:
+            pass
+
+        first, second = Bot(), Bot()
+        transcoder = get_transcoder(first)  # type: ignore
+        assert get_transcoder(first) is transcoder  # type: ignore
+        assert get_transcoder(second) is not transcoder  # type: ignore
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from manager.poll_service import EMBED_LIMIT, create_poll_result_embed
+from repository.poll_repo import PollRepository
+from repository.table.poll_table import (PollAnswerModel,
+                                         PollMemberAnswerModel, VoteType)
+
+
+async def get_votes(
+    database: async_sessionmaker[AsyncSession], poll_id: int, member_id: int
+) -> list[int]:
+    async with database() as session:
+        result = await session.execute(
+            select(PollMemberAnswerModel.poll_answer_id)
+            .join(PollAnswerModel)
+            .where(
+                PollAnswerModel.poll_id == poll_id,
+                PollMemberAnswerModel.member_id == member_id,
+            )
+        )
+        return sorted(result.scalars().all())
+
+
+class TestPollVotes:
+    @pytest.mark.asyncio
+    async def test_switch_vote(self, database, create_poll):
+        repository = PollRepository(database)
+        poll_id, answer_ids = await create_poll(VoteType.SINGLE_VOTE)
+
+        await repository.switch_vote(poll_id, answer_ids[0], 10)
+        await repository.switch_vote(poll_id, answer_ids[1], 10)
+        assert await get_votes(database, poll_id, 10) == [answer_ids[1]]
+
+        # Voting for the same answer again keeps the vote
+        await repository.switch_vote(poll_id, answer_ids[1], 10)
+        assert await get_votes(database, poll_id, 10) == [answer_ids[1]]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_switch_leaves_one_vote(self, database, create_poll):
+        repository = PollRepository(database)
+        poll_id, answer_ids = await create_poll(VoteType.SINGLE_VOTE)
+
+        await asyncio.gather(
+            *(
+                repository.switch_vote(poll_id, answer_id, 20)
+                for answer_id in answer_ids * 3
+            )
+        )
+        assert len(await get_votes(database, poll_id, 20)) == 1
+
+    @pytest.mark.asyncio
+    async def test_toggle_vote(self, database, create_poll):
+        repository = PollRepository(database)
+        poll_id, answer_ids = await create_poll(VoteType.MULTIPLE_VOTE)
+
+        assert await repository.toggle_vote(answer_ids[0], 30)
+        assert await repository.toggle_vote(answer_ids[1], 30)
+        assert await get_votes(database, poll_id, 30) == answer_ids[:2]
+
+        assert not await repository.toggle_vote(answer_ids[0], 30)
+        assert await get_votes(database, poll_id, 30) == [answer_ids[1]]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_double_click_is_consistent(self, database, create_poll):
+        repository = PollRepository(database)
+        poll_id, answer_ids = await create_poll(VoteType.MULTIPLE_VOTE)
+
+        await asyncio.gather(
+            repository.toggle_vote(answer_ids[0], 40),
+            repository.toggle_vote(answer_ids[0], 40),
+        )
+        # Never a duplicate vote, whichever way the clicks interleave
+        assert await get_votes(database, poll_id, 40) in ([], [answer_ids[0]])
+
+
+class TestPollResults:
+    @pytest.mark.asyncio
+    async def test_results_of_large_poll(self, database, create_poll):
+        repository = PollRepository(database)
+        poll_id, answer_ids = await create_poll(VoteType.MULTIPLE_VOTE)
+        # 5000 votes for the first answer, 3000 for the second, 2000 for the third
+        votes = [
+            {"poll_answer_id": answer_ids[0], "member_id": member_id}
+            for member_id in range(5000)
+        ]
+        votes += [
+            {"poll_answer_id": answer_ids[1], "member_id": member_id}
+            for member_id in range(3000)
+        ]
+        votes += [
+            {"poll_answer_id": answer_ids[2], "member_id": member_id}
+            for member_id in range(2000)
+        ]
+        async with database() as session:
+            await session.execute(insert(PollMemberAnswerModel), votes)
+            await session.commit()
+
+        result = await repository.get_poll_result(poll_id)
+
+        assert result.total_votes == 10_000
+        assert [answer.vote_count for answer in result.answers] == [5000, 3000, 2000]
+        assert result.answers[2].voter_ids == list(range(2000))
+        assert [winner.answer_id for winner in result.winners] == [answer_ids[0]]
+
+        embed = create_poll_result_embed(result)
+        assert len(embed) <= EMBED_LIMIT
+        assert "first" in (embed.description or "")
+
+    @pytest.mark.asyncio
+    async def test_tie_and_no_votes(self, database, create_poll):
+        repository = PollRepository(database)
+        poll_id, answer_ids = await create_poll(VoteType.MULTIPLE_VOTE)
+
+        result = await repository.get_poll_result(poll_id)
+        assert result.winners == []
+        assert [answer.voter_ids for answer in result.answers] == [[], [], []]
+
+        await repository.toggle_vote(answer_ids[0], 1)
+        await repository.toggle_vote(answer_ids[2], 2)
+        result = await repository.get_poll_result(poll_id)
+        assert [winner.answer_id for winner in result.winners] == [
+            answer_ids[0],
+            answer_ids[2],
+        ]
@@ -0,0 +1,308 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Iterator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from repository.db_config import Base
+from repository.game_repo import GamePostgresRepository
+from repository.migrations import (SchemaVersionModel, game_migrations,
+                                   poll_migrations, reminder_migrations,
+                                   timezone_migrations)
+from repository.poll_repo import PollRepository
+from repository.reminder_repo import ReminderRepository
+from repository.table.game_lobby_tables import GameModel, GuildModel
+from repository.table.poll_table import (PollAnswerModel, PollGuildModel,
+                                         PollMemberAnswerModel, PollModel,
+                                         VoteType)
+from repository.table.reminder_table import ReminderGuildModel, ReminderModel
+from repository.table.timezone_table import (TimezoneGuildModel,
+                                             TimezoneUserModel)
+from repository.timezone_repo import TimezoneRepository
+
+RUNNERS = [reminder_migrations, poll_migrations, game_migrations, timezone_migrations]
+# Enough rows that the planner prefers an index over a full scan on its own
+SEED_ROWS = 20_000
+SEED_GUILDS = 500
+# Kept clear of the ids other tests use, the seed is deleted by guild afterwards
+SEED_GUILD_ID = 1_000_000
+GUILD_MODELS = [ReminderGuildModel, PollGuildModel, GuildModel, TimezoneGuildModel]
+
+
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def init_database(engine):
+    """Test specific: Create the tables and bring them to the latest version"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    for runner in RUNNERS:
+        await runner.run(engine)
+
+
+@pytest_asyncio.fixture(scope="module")
+async def seed(init_database, engine) -> AsyncIterator[dict[str, int]]:
+    """Test specific: Realistically shaped tables, few active reminders and polls
+    and a handful of rows per guild, owner and poll. Returns ids to query by."""
+
+    def guild_id(index: int) -> int:
+        return SEED_GUILD_ID + index % SEED_GUILDS
+
+    now = datetime.now()
+    async with engine.begin() as conn:
+        for model in GUILD_MODELS:
+            await conn.execute(
+                insert(model),
+                [
+                    {"id": SEED_GUILD_ID + i, "name": f"seed {i}"}
+                    for i in range(SEED_GUILDS)
+                ],
+            )
+        await conn.execute(
+            insert(ReminderModel),
+            [
+                {
+                    "reminder": f"reminder {i}",
+                    "owner_id": i % 5000,
+                    "channel_id": 1,
+                    "expire_at": now + timedelta(minutes=i),
+                    "guild_id": guild_id(i),
+                    "has_triggered": i % 100 != 0,
+                }
+                for i in range(SEED_ROWS)
+            ],
+        )
+        poll_ids = (
+            await conn.execute(
+                insert(PollModel).returning(PollModel.id),
+                [
+                    {
+                        "question": f"poll {i}",
+                        "owner_id": i,
+                        "guild_id": guild_id(i),
+                        "vote_type": VoteType.SINGLE_VOTE,
+                        "colour": "blue",
+                        "is_active": i % 100 == 0,
+                    }
+                    for i in range(SEED_ROWS // 10)
+                ],
+            )
+        ).scalars().all()
+        answer_ids = (
+            await conn.execute(
+                insert(PollAnswerModel).returning(PollAnswerModel.id),
+                [
+                    {
+                        "answer": f"answer {i}",
+                        "poll_id": poll_ids[i % len(poll_ids)],
+                        "owner_id": i % 5000,
+                    }
+                    for i in range(SEED_ROWS)
+                ],
+            )
+        ).scalars().all()
+        await conn.execute(
+            insert(PollMemberAnswerModel),
+            [
+                {"poll_answer_id": answer_ids[i % len(answer_ids)], "member_id": i}
+                for i in range(SEED_ROWS)
+            ],
+        )
+        await conn.execute(
+            insert(GameModel),
+            [
+                {"name": f"game {i}", "max_size": 5, "guild_id": guild_id(i)}
+                for i in range(SEED_ROWS)
+            ],
+        )
+        await conn.execute(
+            insert(TimezoneUserModel),
+            [
+                {"id": SEED_GUILD_ID + i, "timezone": "UTC", "guild_id": guild_id(i)}
+                for i in range(SEED_ROWS)
+            ],
+        )
+        # Plans are priced from the statistics, not the rows themselves
+        for model in [
+            ReminderModel,
+            PollModel,
+            PollAnswerModel,
+            PollMemberAnswerModel,
+            GameModel,
+            TimezoneUserModel,
+        ]:
+            await conn.exec_driver_sql(f"ANALYZE {model.__tablename__}")
+
+    yield {
+        "guild_id": SEED_GUILD_ID,
+        "poll_id": poll_ids[0],
+        "answer_id": answer_ids[0],
+        "other_answer_id": answer_ids[len(poll_ids)],
+    }
+
+    async with engine.begin() as conn:
+        # Everything seeded hangs off the guilds
+        for model in GUILD_MODELS:
+            await conn.execute(delete(model).where(model.id >= SEED_GUILD_ID))
+
+
+@contextmanager
+def capture(engine: AsyncEngine) -> Iterator[list[tuple[str, Any]]]:
+    """Records the statements sent to the database, with their parameters."""
+    statements: list[tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def explain(engine: AsyncEngine, call: Awaitable, pattern: str) -> str:
+    """Runs the repository call and returns the query plan of the statement it
+    sent that matches the pattern, planned with the parameters it was sent with."""
+    with capture(engine) as statements:
+        await call
+    statement, parameters = next(
+        (statement, parameters)
+        for statement, parameters in statements
+        if re.search(pattern, statement)
+    )
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plan = "\n".join(row[0] for row in result)
+        await conn.rollback()
+    return plan
+
+
+class TestMigrations:
+    @pytest.mark.asyncio
+    async def test_version_recorded(self, engine: AsyncEngine):
+        for runner in RUNNERS:
+            assert await runner.get_version(engine) == runner.latest_version
+
+    @pytest.mark.asyncio
+    async def test_rerun_is_noop(self, engine: AsyncEngine):
+        async with engine.connect() as conn:
+            before = (await conn.execute(select(SchemaVersionModel))).all()
+        for runner in RUNNERS:
+            assert await runner.run(engine) == runner.latest_version
+        async with engine.connect() as conn:
+            after = (await conn.execute(select(SchemaVersionModel))).all()
+        assert before == after
+
+
+class TestQueryIndexes:
+    @pytest.mark.asyncio
+    async def test_active_reminders(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            ReminderRepository(database).get_all_active_reminders(),
+            r"FROM reminder\b",
+        )
+        # Either partial index covers exactly the reminders still to fire
+        assert "ix_reminder_active_" in plan
+
+    @pytest.mark.asyncio
+    async def test_active_reminders_by_owner(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            ReminderRepository(database).get_all_active_reminders_by_user_id(100),
+            r"FROM reminder\b",
+        )
+        assert "ix_reminder_active_owner_id" in plan
+
+    @pytest.mark.asyncio
+    async def test_reminders_by_guild(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            ReminderRepository(database).get_all_reminders_by_guild_id(
+                seed["guild_id"]
+            ),
+            r"FROM reminder\b",
+        )
+        assert "ix_reminder_guild_id" in plan
+
+    @pytest.mark.asyncio
+    async def test_active_polls_by_guild(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            PollRepository(database).get_all_active_polls_by_guild_id(
+                seed["guild_id"]
+            ),
+            r"FROM poll\b",
+        )
+        assert "ix_poll_guild_id_is_active" in plan
+
+    @pytest.mark.asyncio
+    async def test_active_polls(self, engine, database, seed):
+        plan = await explain(
+            engine, PollRepository(database).get_all_active_polls(), r"FROM poll\b"
+        )
+        assert "ix_poll_active" in plan
+
+    @pytest.mark.asyncio
+    async def test_answers_by_poll(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            PollRepository(database).get_answers_by_poll_id(seed["poll_id"]),
+            r"FROM poll_answer\b",
+        )
+        assert "ix_poll_answer_poll_id_owner_id" in plan
+
+    @pytest.mark.asyncio
+    async def test_member_answers_in_poll(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            PollRepository(database).get_poll_answer_by_user_id(seed["poll_id"], 0),
+            r"FROM poll_answer\b",
+        )
+        assert "ix_poll_answer_poll_id_owner_id" in plan
+
+    @pytest.mark.asyncio
+    async def test_votes_on_answer(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            PollRepository(database).get_vote(seed["answer_id"]),
+            r"FROM poll_member_answer\b",
+        )
+        assert "uq_poll_member_answer_vote" in plan
+
+    @pytest.mark.asyncio
+    async def test_switch_vote(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            PollRepository(database).switch_vote(
+                seed["poll_id"], seed["other_answer_id"], member_id=0
+            ),
+            r"DELETE FROM poll_member_answer\b",
+        )
+        # The member's other votes in the poll are found without a full scan
+        assert "_poll_member_answer_" in plan
+        assert "Seq Scan on poll_member_answer" not in plan
+        assert "Seq Scan on poll_answer" not in plan
+
+    @pytest.mark.asyncio
+    async def test_game_by_name(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            GamePostgresRepository(database).get_game_id_by_name(
+                "game 0", seed["guild_id"]
+            ),
+            r"FROM game\b",
+        )
+        assert "ix_game_guild_id_name" in plan
+
+    @pytest.mark.asyncio
+    async def test_timezones_by_guild(self, engine, database, seed):
+        plan = await explain(
+            engine,
+            TimezoneRepository(database).get_timezone_counts(seed["guild_id"]),
+            r"FROM timezone_user\b",
+        )
+        assert "ix_timezone_user_guild_id" in plan
@@ -0,0 +1,89 @@
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert, select
+
+from repository.poll_repo import PollRepository
+from repository.read_model import PollAnswerRow
+from repository.table.poll_table import PollAnswerModel, VoteType
+
+ANSWER_COUNT = 20_000
+
+
+@pytest_asyncio.fixture(scope="session")
+async def large_poll(database, create_poll) -> int:
+    """Test specific: A poll with far more answers than a real one"""
+    poll_id, _ = await create_poll(
+        VoteType.MULTIPLE_VOTE, guild_id=200, question="large_poll", answers=()
+    )
+    async with database() as session:
+        await session.execute(
+            insert(PollAnswerModel),
+            [
+                {"answer": f"answer {i}", "owner_id": i, "poll_id": poll_id}
+                for i in range(ANSWER_COUNT)
+            ],
+        )
+        await session.commit()
+    return poll_id
+
+
+async def measure(load: Callable[[], Awaitable[Any]]) -> tuple[float, int]:
+    """Best time of three loads, and the peak memory allocated by one"""
+    await load()  # Warm up statement caches
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        await load()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        await load()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+class TestReadModel:
+    @pytest.mark.asyncio
+    async def test_answers_are_read_models(self, database, large_poll):
+        repository = PollRepository(database)
+        answers = await repository.get_answers_by_poll_id(large_poll)
+
+        assert len(answers) == ANSWER_COUNT
+        assert all(isinstance(answer, PollAnswerRow) for answer in answers)
+        assert answers[0].answer == "answer 0"
+        assert answers[0].url is None
+        assert not hasattr(answers[0], "__dict__")
+
+    @pytest.mark.asyncio
+    async def test_read_model_is_lighter_than_entities(
+        self, database, large_poll, record_property
+    ):
+        repository = PollRepository(database)
+
+        async def load_entities():
+            async with database() as session:
+                result = await session.execute(
+                    select(PollAnswerModel).where(PollAnswerModel.poll_id == large_poll)
+                )
+                return list(result.scalars().all())
+
+        async def load_rows():
+            return await repository.get_answers_by_poll_id(large_poll)
+
+        entity_time, entity_peak = await measure(load_entities)
+        row_time, row_peak = await measure(load_rows)
+        # Timings depend on the machine and the database, they're only reported,
+        # e.g. with --junitxml
+        record_property("entity_load_ms", round(entity_time * 1000, 1))
+        record_property("row_load_ms", round(row_time * 1000, 1))
+        record_property("entity_peak_kib", entity_peak // 1024)
+        record_property("row_peak_kib", row_peak // 1024)
+
+        assert row_peak < entity_peak
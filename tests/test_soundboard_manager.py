@@ -0,0 +1,115 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from manager import soundboard_service
+from manager.soundboard_service import SoundboardManager
+from repository.table.soundboard_table import SoundbiteModel
+
+
+class FakeRepository:
+    def __init__(self, soundbites: list[SoundbiteModel] | None = None) -> None:
+        self.soundbites = {
+            soundbite.name: soundbite for soundbite in soundbites or []
+        }
+        self.inserts: list[int] = []
+        self.removed: list[str] = []
+
+    async def get_all_soundbites(self) -> list[SoundbiteModel]:
+        return sorted(self.soundbites.values(), key=lambda soundbite: soundbite.name)
+
+    async def add_soundbites(self, rows: list[dict]) -> list[SoundbiteModel]:
+        self.inserts.append(len(rows))
+        soundbites = [SoundbiteModel(**row) for row in rows]
+        self.soundbites.update((soundbite.name, soundbite) for soundbite in soundbites)
+        return soundbites
+
+    async def remove_soundbites(self, names: list[str]) -> None:
+        self.removed += names
+
+
+class FakeTranscoder:
+    """Test specific: Probes that take a moment and record how many overlap"""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+
+    async def probe_duration(self, path: Path) -> float:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return 1.5
+
+    async def mean_volume(self, path: Path) -> float | None:
+        return -20.0
+
+
+class FakeOpusCache:
+    def __init__(self) -> None:
+        self.evicted: list[Path] = []
+
+    def evict(self, path: Path) -> None:
+        self.evicted.append(path)
+
+
+def create_soundbite(name: str, directory: Path = Path("data")) -> SoundbiteModel:
+    return SoundbiteModel(name=name, path=str(directory / f"{name}.mp3"))
+
+
+def create_manager(
+    directory: Path, repository: FakeRepository | None = None
+) -> SoundboardManager:
+    return SoundboardManager(
+        repository=repository or FakeRepository(),  # type: ignore
+        opus_cache=FakeOpusCache(),  # type: ignore
+        transcoder=FakeTranscoder(),  # type: ignore
+        directory=directory,
+    )
+
+
+class TestSoundboardIndex:
+    def test_names_stay_sorted(self, tmp_path):
+        manager = create_manager(tmp_path)
+        for name in ("pog", "bruh", "yeet", "airhorn", "bruh"):
+            manager._index(create_soundbite(name))
+        assert manager.get_names() == ["airhorn", "bruh", "pog", "yeet"]
+
+        manager._unindex("pog")
+        manager._unindex("missing")
+        assert manager.get_names() == ["airhorn", "bruh", "yeet"]
+        assert manager.get_soundbite("pog") is None
+
+    def test_search_by_prefix(self, tmp_path):
+        manager = create_manager(tmp_path)
+        for name in ("bruh", "bruh2", "brother", "bread", "cat", "b"):
+            manager._index(create_soundbite(name))
+
+        assert manager.search("br") == ["bread", "brother", "bruh", "bruh2"]
+        assert manager.search("bru") == ["bruh", "bruh2"]
+        assert manager.search("br", limit=2) == ["bread", "brother"]
+        assert manager.search("z") == []
+        assert manager.search("") == manager.get_names()
+
+
+class TestSoundboardLoad:
+    @pytest.mark.asyncio
+    async def test_reconciles_in_bounded_batches(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(soundboard_service, "LOAD_BATCH_SIZE", 4)
+        for index in range(10):
+            (tmp_path / f"new{index}.mp3").write_bytes(b"mp3")
+        (tmp_path / "kept.mp3").write_bytes(b"mp3")
+        repository = FakeRepository(
+            [create_soundbite("kept", tmp_path), create_soundbite("gone", tmp_path)]
+        )
+        manager = create_manager(tmp_path, repository)
+
+        await manager.load()
+
+        assert repository.removed == ["gone"]
+        assert repository.inserts == [4, 4, 2]
+        assert manager.transcoder.peak <= 4  # type: ignore
+        assert manager.get_names() == ["kept"] + [f"new{i}" for i in range(10)]
+        assert manager.get_soundbite("new3").duration == 1.5  # type: ignore
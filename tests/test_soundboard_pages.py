@@ -0,0 +1,78 @@
+import pytest
+
+from manager.soundboard_page_service import SoundboardPageManager, assign_pages
+from repository.table.soundboard_table import SoundboardPageModel
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.views: dict[int, list[str]] = {}
+
+    def add_view(self, view, message_id: int | None = None) -> None:
+        assert message_id is not None
+        self.views[message_id] = [item.custom_id for item in view.children]
+
+
+class FakeRepository:
+    def __init__(self, pages: list[SoundboardPageModel]) -> None:
+        self.pages = pages
+
+    async def get_all_pages(self) -> list[SoundboardPageModel]:
+        return self.pages
+
+
+def create_page(guild_id: int, index: int, soundbites: list[str]):
+    return SoundboardPageModel(
+        guild_id=guild_id,
+        page_index=index,
+        channel_id=guild_id,
+        message_id=guild_id * 100 + index,
+        soundbites=soundbites,
+    )
+
+
+class TestAssignPages:
+    def test_fills_pages_in_order(self):
+        names = [f"s{i:02}" for i in range(7)]
+        assert assign_pages([], names, page_size=3) == [
+            ["s00", "s01", "s02"],
+            ["s03", "s04", "s05"],
+            ["s06"],
+        ]
+        assert assign_pages([], []) == []
+
+    def test_existing_soundbites_stay_on_their_page(self):
+        pages = [["a", "b", "c"], ["d", "e"]]
+        # "b" removed, "aa" and "f" added
+        names = ["a", "aa", "c", "d", "e", "f"]
+        assert assign_pages(pages, names, page_size=3) == [
+            ["a", "aa", "c"],
+            ["d", "e", "f"],
+        ]
+
+    def test_new_page_when_full_and_empty_pages_dropped(self):
+        pages = [["a", "b"], ["c"]]
+        assert assign_pages(pages, ["a", "b", "d"], page_size=2) == [
+            ["a", "b"],
+            ["d"],
+        ]
+        assert assign_pages(pages, ["c"], page_size=2) == [["c"]]
+
+
+class TestRegisterViews:
+    @pytest.mark.asyncio
+    async def test_views_follow_the_stored_pages(self):
+        pages = [
+            create_page(1, 0, ["a", "b"]),
+            create_page(1, 1, ["c"]),
+            create_page(2, 0, ["b", "c"]),
+        ]
+        bot = FakeBot()
+        page_manager = SoundboardPageManager(
+            bot=bot,  # type: ignore
+            repository=FakeRepository(pages),  # type: ignore
+            soundboard_manager=None,  # type: ignore
+        )
+
+        assert await page_manager.register_views() == 3
+        assert bot.views == {100: ["a", "b"], 101: ["c"], 200: ["b", "c"]}
@@ -0,0 +1,58 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from cog.classes.piper.stream_reader import StreamReader
+
+
+async def chunks(*parts: bytes, error: Exception | None = None):
+    for part in parts:
+        yield part
+    if error is not None:
+        raise error
+
+
+class TestStreamReader:
+    @pytest.mark.asyncio
+    async def test_reads_until_end_of_stream(self):
+        reader = StreamReader()
+        await reader.feed_from(chunks(b"ab", b"cd"))
+
+        assert reader.read(3) == b"ab"
+        assert reader.read() == b"cd"
+        assert reader.read() == b""
+        assert reader.error is None
+
+    @pytest.mark.asyncio
+    async def test_failed_producer_ends_the_stream(self):
+        reader = StreamReader()
+        error = aiohttp.ClientPayloadError("connection lost")
+
+        with pytest.raises(aiohttp.ClientPayloadError):
+            await reader.feed_from(chunks(b"ab", error=error))
+
+        assert reader.error is error
+        # What arrived is still played, then the stream ends instead of blocking
+        assert await asyncio.to_thread(reader.read) == b"ab"
+        assert reader.read(10) == b""
+
+    @pytest.mark.asyncio
+    async def test_cancelled_producer_ends_the_stream(self):
+        reader = StreamReader()
+        started = asyncio.Event()
+
+        async def endless():
+            yield b"ab"
+            started.set()
+            await asyncio.Event().wait()
+            yield b"never"
+
+        task = asyncio.create_task(reader.feed_from(endless()))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert isinstance(reader.error, asyncio.CancelledError)
+        assert await asyncio.to_thread(reader.read) == b"ab"
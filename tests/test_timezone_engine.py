@@ -0,0 +1,77 @@
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytz
+
+from cog.classes.zone_engine import ZoneEngine
+
+NOW = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def benchmark(function, rounds: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - started) / rounds
+
+
+class TestZoneEngine:
+    def test_offsets_match_zoneinfo_across_transitions(self):
+        engine = ZoneEngine(horizon_days=90)
+        zones = engine.available_zones()
+
+        # Every three hours through March to May, covering both hemispheres' DST
+        for hours in range(0, 90 * 24, 3):
+            timestamp = (NOW + timedelta(hours=hours, minutes=7)).timestamp()
+            offsets = engine.offsets(zones, timestamp)
+            for zone in zones:
+                expected = datetime.fromtimestamp(timestamp, ZoneInfo(zone))
+                assert offsets[zone] == expected.utcoffset().total_seconds(), zone
+
+    def test_offset_at_transition(self):
+        engine = ZoneEngine()
+        # Clocks in New York go forward at 2024-03-10 07:00 UTC
+        transition = datetime(2024, 3, 10, 7, tzinfo=timezone.utc).timestamp()
+        engine.offset("America/New_York", NOW.timestamp())
+
+        assert engine.offset("America/New_York", transition - 1) == -5 * 3600
+        assert engine.offset("America/New_York", transition) == -4 * 3600
+
+    def test_difference(self):
+        engine = ZoneEngine()
+        assert engine.difference(
+            "Pacific/Auckland", "Asia/Tokyo", NOW.timestamp()
+        ) == timedelta(hours=4)
+
+    def test_now_in_all_zones(self):
+        engine = ZoneEngine()
+        zones = engine.available_zones()
+
+        times = engine.now_in(zones, NOW)
+
+        assert all(times[zone] == NOW for zone in zones)
+        assert str(times["Pacific/Auckland"].tzinfo) == "Pacific/Auckland"
+
+    def test_benchmark_all_zones(self):
+        engine = ZoneEngine()
+        zones = [
+            zone for zone in engine.available_zones() if zone in pytz.all_timezones_set
+        ]
+        timestamp = NOW.timestamp()
+        # Tables are built on first use
+        engine.now_in(zones, NOW)
+        engine.offsets(zones, timestamp)
+
+        per_zone = benchmark(
+            lambda: {zone: NOW.astimezone(pytz.timezone(zone)) for zone in zones}
+        )
+        now_in = benchmark(lambda: engine.now_in(zones, NOW))
+        offsets = benchmark(lambda: engine.offsets(zones, timestamp))
+        print(
+            f"{len(zones)} zones: pytz {per_zone * 1000:.2f}ms, "
+            f"now_in {now_in * 1000:.2f}ms, offsets {offsets * 1000:.2f}ms"
+        )
+
+        assert now_in < per_zone
+        assert offsets < per_zone
@@ -1,9 +1,19 @@
 
+from dataclasses import dataclass
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+import pytest
+
 from manager.timezone_service import TimezoneManager
 
+
+@dataclass
+class Guild:
+    id: int
+    name: str
+
+
 class TestTimezoneService:
 
     def test_positive_difference(self):
@@ -17,4 +27,87 @@ class TestTimezoneService:
         dt2 = datetime.now(tz=ZoneInfo('NZ'))
         _, time_delta, descriptor = TimezoneManager.get_datetime_difference(dt1, dt2)
         print(time_delta)
-        assert time_delta.total_seconds() < 0 and descriptor == "ahead"
\ No newline at end of file
+        assert time_delta.total_seconds() < 0 and descriptor == "ahead"
+
+class FakeRepository:
+    def __init__(self):
+        self.counts = [
+            ("Pacific/Auckland", 3), ("Asia/Tokyo", 1), ("NZ", 5), ("UTC", 2)
+        ]
+        self.users = {1: "NZ", 2: "Asia/Tokyo"}
+        self.queries = 0
+
+    async def get_timezones_of_users(self, user_ids: list[int]) -> dict[int, str]:
+        self.queries += 1
+        return {id: self.users[id] for id in user_ids if id in self.users}
+
+    async def update_timezone(self, user_id: int, timezone: str) -> tuple[str, str]:
+        old_timezone, self.users[user_id] = self.users[user_id], timezone
+        return old_timezone, timezone
+
+    async def get_timezone_counts(self, guild_id: int) -> list[tuple[str, int]]:
+        self.queries += 1
+        return self.counts
+
+    async def register_timezone(self, user_id: int, timezone: str, guild) -> int:
+        self.counts = self.counts + [(timezone, 1)]
+        return user_id
+
+
+class TestTimezoneRoster:
+
+    @pytest.mark.asyncio
+    async def test_grouped_by_offset(self):
+        manager = TimezoneManager(bot=None, repository=FakeRepository())
+        roster = await manager.get_roster(1)
+
+        offsets = [group.offset for group in roster]
+        assert offsets == sorted(offsets)
+        auckland = next(group for group in roster if ("NZ", 5) in group.timezones)
+        assert auckland.timezones == [("NZ", 5), ("Pacific/Auckland", 3)]
+        assert auckland.member_count == 8
+
+    @pytest.mark.asyncio
+    async def test_cached_until_registration(self):
+        repository = FakeRepository()
+        manager = TimezoneManager(bot=None, repository=repository)
+        await manager.get_roster(1)
+        await manager.get_roster(1)
+        assert repository.queries == 1
+
+        await manager.register_timezone(10, "Europe/London", Guild(id=1, name="test"))
+        roster = await manager.get_roster(1)
+        assert repository.queries == 2
+        assert any(("Europe/London", 1) in group.timezones for group in roster)
+
+
+class TestUserTimezoneCache:
+
+    @pytest.mark.asyncio
+    async def test_compare_is_one_query(self):
+        repository = FakeRepository()
+        manager = TimezoneManager(bot=None, repository=repository)
+
+        comparer_tz, _, comparee_tz, _ = await manager.compare_timezones(1, 2)
+        assert (comparer_tz, comparee_tz) == ("NZ", "Asia/Tokyo")
+        assert repository.queries == 1
+
+        await manager.compare_timezones(2, 1)
+        assert await manager.get_timezone(1) == "NZ"
+        assert repository.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_kept_current_on_update(self):
+        repository = FakeRepository()
+        manager = TimezoneManager(bot=None, repository=repository)
+        await manager.get_timezone(1)
+
+        await manager.update_timezone(1, "Europe/London")
+        assert await manager.get_timezone(1) == "Europe/London"
+        assert repository.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_unregistered_user(self):
+        manager = TimezoneManager(bot=None, repository=FakeRepository())
+        with pytest.raises(ValueError):
+            await manager.compare_timezones(1, 3)
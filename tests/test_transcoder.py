@@ -0,0 +1,24 @@
+import pytest
+
+from cog.classes.soundboard.transcoder import limit_size
+from exceptions.soundboard_exceptions import UploadTooLarge
+
+
+async def chunks(*sizes: int):
+    for size in sizes:
+        yield b"x" * size
+
+
+class TestLimitSize:
+    @pytest.mark.asyncio
+    async def test_passes_chunks_within_limit(self):
+        received = [chunk async for chunk in limit_size(chunks(4, 4, 2), 10)]
+        assert [len(chunk) for chunk in received] == [4, 4, 2]
+
+    @pytest.mark.asyncio
+    async def test_stops_once_limit_is_exceeded(self):
+        received = []
+        with pytest.raises(UploadTooLarge):
+            async for chunk in limit_size(chunks(4, 4, 4, 4), 10):
+                received.append(chunk)
+        assert len(received) == 2
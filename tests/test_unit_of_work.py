@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+
+from manager.poll_service import PollManager
+from repository.poll_repo import PollRepository
+from repository.reminder_repo import ReminderRepository
+from repository.table.poll_table import PollAnswerModel, PollModel, VoteType
+from repository.table.reminder_table import ReminderModel
+from repository.unit_of_work import UnitOfWork
+
+
+@dataclass
+class Guild:
+    """Custom guild object, repositories take a protocol instead of discord.py's
+    Guild"""
+
+    id: int
+    name: str
+
+
+@contextmanager
+def count_checkouts(engine):
+    """Counts connections taken from the pool while the block runs"""
+    checkouts = []
+
+    def on_checkout(*args):
+        checkouts.append(args)
+
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    try:
+        yield checkouts
+    finally:
+        event.remove(engine.sync_engine, "checkout", on_checkout)
+
+
+class TestUnitOfWork:
+    @pytest.mark.asyncio
+    async def test_create_poll_uses_one_connection(self, engine, database):
+        poll_manager = PollManager(bot=None, repository=PollRepository(database))  # type: ignore
+
+        with count_checkouts(engine) as checkouts:
+            poll_id = await poll_manager.create_poll(
+                colour="blue",
+                guild=Guild(id=100, name="uow_guild"),  # type: ignore
+                owner_id=1,
+                question="test_question",
+                vote_type=VoteType.SINGLE_VOTE,
+                answers=("first", "second", "third"),
+            )
+        assert len(checkouts) == 1
+
+        async with database() as session:
+            answers = await session.execute(
+                select(PollAnswerModel.answer).where(PollAnswerModel.poll_id == poll_id)
+            )
+            assert sorted(answers.scalars().all()) == ["first", "second", "third"]
+
+    @pytest.mark.asyncio
+    async def test_remove_answer_uses_one_connection(self, engine, database):
+        poll_manager = PollManager(bot=None, repository=PollRepository(database))  # type: ignore
+        poll_id = await poll_manager.create_poll(
+            colour="blue",
+            guild=Guild(id=100, name="uow_guild"),  # type: ignore
+            owner_id=1,
+            question="test_question",
+            vote_type=VoteType.SINGLE_VOTE,
+            answers=("first",),
+        )
+        answer_id = (await poll_manager.get_answers_by_poll_id(poll_id))[0].id
+
+        with count_checkouts(engine) as checkouts:
+            assert await poll_manager.remove_answer(1, answer_id)
+        assert len(checkouts) == 1
+
+    @pytest.mark.asyncio
+    async def test_remove_reminder_uses_one_connection(self, engine, database):
+        repository = ReminderRepository(database)
+        reminder_id = await repository.add_reminder(
+            reminder="test_reminder",
+            owner_id=1,
+            channel_id=1,
+            expire_at=datetime.now() + timedelta(weeks=1),
+            guild=Guild(id=100, name="uow_guild"),  # type: ignore
+        )
+
+        with count_checkouts(engine) as checkouts:
+            await repository.remove_reminder(reminder_id)
+        assert len(checkouts) == 1
+
+        async with database() as session:
+            assert await session.get(ReminderModel, reminder_id) is None
+
+    @pytest.mark.asyncio
+    async def test_rolls_back_everything_on_error(self, database, create_poll_guild):
+        repository = PollRepository(database)
+        # Committed beforehand, only the poll is part of the unit of work
+        guild_id = await create_poll_guild(100, "uow_guild")
+
+        with pytest.raises(RuntimeError):
+            async with UnitOfWork(database):
+                await repository.create_poll(
+                    colour="blue",
+                    guild_id=guild_id,
+                    owner_id=1,
+                    question="rolled_back",
+                    vote_type=VoteType.SINGLE_VOTE,
+                )
+                raise RuntimeError
+
+        async with database() as session:
+            polls = await session.execute(
+                select(PollModel).where(PollModel.question == "rolled_back")
+            )
+            assert polls.scalars().all() == []
@@ -0,0 +1,197 @@
+import asyncio
+
+import discord
+import pytest
+
+from cog.classes.voice_session import (VoiceSessionManager,
+                                       get_voice_session_manager)
+
+
+class FakeSource:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.cleaned_up = False
+
+    def cleanup(self) -> None:
+        self.cleaned_up = True
+
+
+class FakeVoiceClient:
+    def __init__(self, guild: "FakeGuild", channel: "FakeChannel") -> None:
+        self.guild = guild
+        self.channel = channel
+        self.connected = True
+        self.current: FakeSource | None = None
+        self.played: list[str] = []
+        self._after = None
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def is_playing(self) -> bool:
+        return self.current is not None
+
+    def is_paused(self) -> bool:
+        return False
+
+    def play(self, source: FakeSource, after) -> None:
+        self.current = source
+        self.played.append(source.name)
+        self._after = after
+
+    def finish(self) -> None:
+        """Test specific: The player thread reaching the end of the source"""
+        self.current = None
+        self._after(None)  # type: ignore
+
+    def stop(self) -> None:
+        if self.current is not None:
+            self.finish()
+
+    async def move_to(self, channel: "FakeChannel") -> None:
+        self.channel = channel
+
+    async def disconnect(self, force: bool = False) -> None:
+        self.connected = False
+        self.guild.voice_client = None
+
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", channel_id: int, failures: int = 0):
+        self.guild = guild
+        self.id = channel_id
+        self.failures = failures
+        self.connects = 0
+
+    async def connect(self, reconnect: bool) -> FakeVoiceClient:
+        self.connects += 1
+        # Handshakes take a moment so concurrent plays overlap
+        await asyncio.sleep(0)
+        if self.failures:
+            self.failures -= 1
+            raise asyncio.TimeoutError()
+        self.guild.voice_client = FakeVoiceClient(self.guild, self)
+        return self.guild.voice_client
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int = 1) -> None:
+        self.id = guild_id
+        self.voice_client: FakeVoiceClient | None = None
+
+
+async def settle() -> None:
+    """Runs the callbacks the player thread scheduled on the loop"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+class Sleeps(list):
+    """Test specific: Records retry back off and idle waits instead of waiting"""
+
+    async def __call__(self, delay: float) -> None:
+        self.append(delay)
+        await asyncio.sleep(0)
+
+
+class TestVoiceSessionManager:
+    @pytest.mark.asyncio
+    async def test_one_session_per_guild(self):
+        manager = VoiceSessionManager()
+        first, second = FakeGuild(1), FakeGuild(2)
+        assert manager.get_session(first) is manager.get_session(first)  # type: ignore
+        assert manager.get_session(first) is not manager.get_session(second)  # type: ignore
+
+    @pytest.mark.asyncio
+    async def test_concurrent_plays_share_one_connection(self):
+        manager = VoiceSessionManager()
+        guild = FakeGuild()
+        channel = FakeChannel(guild, 10)
+
+        await asyncio.gather(
+            *(
+                manager.play(channel, FakeSource(str(i)), mode="queue")  # type: ignore
+                for i in range(3)
+            )
+        )
+
+        assert channel.connects == 1
+        assert guild.voice_client.played == ["0"]  # type: ignore
+
+    @pytest.mark.asyncio
+    async def test_moves_instead_of_reconnecting(self):
+        manager = VoiceSessionManager()
+        guild = FakeGuild()
+        first, second = FakeChannel(guild, 10), FakeChannel(guild, 20)
+
+        await manager.play(first, FakeSource("a"))  # type: ignore
+        await manager.play(second, FakeSource("b"))  # type: ignore
+
+        assert (first.connects, second.connects) == (1, 0)
+        assert guild.voice_client.channel is second  # type: ignore
+
+    @pytest.mark.asyncio
+    async def test_connect_retries_with_back_off(self):
+        sleeps = Sleeps()
+        manager = VoiceSessionManager(max_attempts=4, base_delay=0.5, sleep=sleeps)
+        guild = FakeGuild()
+        channel = FakeChannel(guild, 10, failures=2)
+
+        await manager.play(channel, FakeSource("a"))  # type: ignore
+
+        assert channel.connects == 3
+        assert sleeps == [0.5, 1.0]
+
+    @pytest.mark.asyncio
+    async def test_connect_gives_up(self):
+        manager = VoiceSessionManager(max_attempts=2, base_delay=0.5, sleep=Sleeps())
+        channel = FakeChannel(FakeGuild(), 10, failures=5)
+
+        with pytest.raises(discord.ClientException):
+            await manager.play(channel, FakeSource("a"))  # type: ignore
+        assert channel.connects == 2
+
+    @pytest.mark.asyncio
+    async def test_interrupt_replaces_queued_sources(self):
+        manager = VoiceSessionManager()
+        guild = FakeGuild()
+        channel = FakeChannel(guild, 10)
+        queued = FakeSource("b")
+
+        await manager.play(channel, FakeSource("a"))  # type: ignore
+        await manager.play(channel, queued, mode="queue")  # type: ignore
+        await manager.play(channel, FakeSource("c"))  # type: ignore
+        await settle()
+
+        assert queued.cleaned_up
+        assert guild.voice_client.played == ["a", "c"]  # type: ignore
+
+    @pytest.mark.asyncio
+    async def test_queue_plays_in_order_then_idles(self):
+        sleeps = Sleeps()
+        manager = VoiceSessionManager(idle_timeout=60, sleep=sleeps)
+        guild = FakeGuild()
+        channel = FakeChannel(guild, 10)
+
+        for name in ("a", "b"):
+            await manager.play(channel, FakeSource(name), mode="queue")  # type: ignore
+        voice_client = guild.voice_client
+        voice_client.finish()  # type: ignore
+        await settle()
+        voice_client.finish()  # type: ignore
+        await settle()
+
+        assert voice_client.played == ["a", "b"]  # type: ignore
+        assert sleeps == [60]
+        assert guild.voice_client is None
+
+
+class TestGetVoiceSessionManager:
+    def test_shared_per_bot(self):
+        class Bot:
+            pass
+
+        first, second = Bot(), Bot()
+        manager = get_voice_session_manager(first)  # type: ignore
+        assert get_voice_session_manager(first) is manager  # type: ignore
+        assert get_voice_session_manager(second) is not manager  # type: ignore
@@ -19,7 +19,7 @@ class SoundButton(Button):
 
     async def callback(self, interaction: Interaction):
         await interaction.response.defer()
-        self.bot.dispatch("play", interaction, self.custom_id)
+        self.bot.dispatch("soundboard_play", interaction, self.custom_id)
 
 
 class SoundBoardView(View):
@@ -1,24 +1,34 @@
-import os
 import time
 from datetime import timedelta
+from pathlib import Path
 
-import aiofiles
 import aiohttp
 from discord import Interaction
 from discord.ext import commands
 from discord.ui import Modal, TextInput
 
-import ffmpeg
+from cog.classes.utils import set_logger
+from exceptions.soundboard_exceptions import TranscodeError
+from manager.soundboard_service import SoundboardManager
+
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class StreamableSubmission(Modal, title="Soundboard Submission"):
-    def __init__(self, bot: commands.Bot, video_url: str, file_name: str):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        video_url: str,
+        file_name: str,
+        soundboard_manager: SoundboardManager,
+    ):
         super().__init__()
         self.bot = bot
+        self.soundboard_manager = soundboard_manager
         self.video_url = video_url
         self.file_name = file_name
         self.bite_file_path = "data/sound_bites/"
-        self.temp_file_path = "data/temp/"
+        self.logger = set_logger("streamable_submission")
 
     name_input: TextInput = TextInput(
         label="File Name:",
@@ -45,9 +55,7 @@ class StreamableSubmission(Modal, title="Soundboard Submission"):
 
     async def on_submit(self, interaction: Interaction):
         name_input = self.name_input.value.lower()
-        output = self.bite_file_path + name_input + ".mp3"
-        temp_output = f"{self.temp_file_path}/{self.file_name}"
-        temp_second = f"{self.temp_file_path}/temp_{self.file_name}.mp3"
+        output = Path(self.bite_file_path) / f"{name_input}.mp3"
 
         try:
             time1 = time.strptime(self.start_trim_input.value, "%M:%S")
@@ -58,14 +66,14 @@ class StreamableSubmission(Modal, title="Soundboard Submission"):
             input2 = timedelta(
                 minutes=time2.tm_min, seconds=time2.tm_sec
             ).total_seconds()
-            print(input1, input2)
         except ValueError:
             await interaction.response.send_message(
                 "Invalid time format. Please try again.", ephemeral=True
             )
             return
 
-        if input1 > input2:
+        # An end of 00:00 keeps the rest of the video
+        if input2 != 0 and input1 > input2:
             await interaction.response.send_message(
                 content="Start time must be less than end time", ephemeral=True
             )
@@ -73,38 +81,30 @@ class StreamableSubmission(Modal, title="Soundboard Submission"):
 
         await interaction.response.defer()
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.video_url) as resp:
-                if resp.status != 200:
-                    return await interaction.response.send_message(
-                        content="Could not download file...", ephemeral=True
+        # The body is piped into ffmpeg as it downloads, which seeks, trims and
+        # encodes in one pass without holding the video in memory.
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.video_url) as resp:
+                    if resp.status != 200:
+                        await interaction.followup.send(
+                            content="Could not download file...", ephemeral=True
+                        )
+                        return
+                    await self.soundboard_manager.transcoder.stream_to_mp3(
+                        resp.content.iter_chunked(STREAM_CHUNK_SIZE),
+                        output,
+                        start=input1,
+                        end=input2 or None,
                     )
-                else:
-                    async with aiofiles.open(temp_output, mode="wb") as file_handler:
-                        data = await resp.read()
-                        await file_handler.write(data)
-
-        def dl_convert():
-            # Turn MP4 file into MP3
-            input_file = ffmpeg.input(temp_output)
-            output_file = ffmpeg.output(input_file, temp_second, vn=None, format="mp3")
-            audio_file = ffmpeg.run(output_file)
-            # Trim MP3 file
-            second_input_file = ffmpeg.input(temp_second)
-            audio_file = second_input_file.filter(
-                "atrim", start=int(input1), end=int(input2)
+        except (aiohttp.ClientError, TranscodeError) as e:
+            self.logger.error(f"Streamable import of {self.video_url} failed: {e}")
+            await interaction.followup.send(
+                content="Could not convert file...", ephemeral=True
             )
-            audio_file.output(output).run()
-            # Clean up directories
-            os.remove(temp_output)
-            os.remove(temp_second)
-
-        if not self.file_name.endswith(".mp3"):
-            # https://stackoverflow.com/questions/46778936/how-to-catch-exceptions-in-a-python-run-in-executor-method-call
-            # If we need to catch exceptions
-            await self.bot.loop.run_in_executor(None, dl_convert)
+            return
 
-        print(ffmpeg.probe(output))  # type: ignore
+        await self.soundboard_manager.add_soundbite(output)
         # Send message
         await interaction.followup.send(
             content=f"File saved as {name_input}!", ephemeral=True
@@ -1,18 +1,36 @@
-import os
+from pathlib import Path
 
+import aiohttp
 import discord
 from discord.ext import commands
 
-import ffmpeg
+from cog.classes.soundboard.transcoder import limit_size
+from cog.classes.utils import set_logger
+from exceptions.soundboard_exceptions import TranscodeError, UploadTooLarge
+from manager.soundboard_service import SoundboardManager
+
+STREAM_CHUNK_SIZE = 64 * 1024
+# Seconds, soundbites are meant to be short
+MAX_SOUNDBITE_DURATION = 60
+# Bytes, overridden with SB_MAX_UPLOAD_MB
+DEFAULT_MAX_UPLOAD_SIZE = 25 * 2**20
 
 
 class UploadSubmission(discord.ui.Modal, title="Soundboard Submission"):
-    def __init__(self, bot: commands.Bot, file: discord.Attachment):
+    def __init__(
+        self,
+        bot: commands.Bot,
+        file: discord.Attachment,
+        soundboard_manager: SoundboardManager,
+        max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+    ):
         super().__init__()
         self.bot = bot
         self.file = file
+        self.soundboard_manager = soundboard_manager
+        self.max_upload_size = max_upload_size
         self.bite_file_path = "data/sound_bites/"
-        self.temp_file_path = "data/temp/"
+        self.logger = set_logger("upload_submission")
         self.name_input.default = self.file.filename[:15]
 
     name_input: discord.ui.TextInput = discord.ui.TextInput(
@@ -24,24 +42,74 @@ class UploadSubmission(discord.ui.Modal, title="Soundboard Submission"):
 
     async def on_submit(self, interaction: discord.Interaction):
         name_input = self.name_input.value.lower()
-        output = self.bite_file_path + name_input + ".mp3"
-        temp_output = f"{self.temp_file_path} + {self.file.filename}"
-
-        def convert():
-            stream = ffmpeg.input(temp_output, vn=None)
-            stream = ffmpeg.output(stream, output, vn=None)
-            ffmpeg.run(stream)
-            os.remove(temp_output)
-
-        if not self.file.filename.endswith(".mp3"):
-            await self.file.save(temp_output)  # type: ignore
-            await self.bot.loop.run_in_executor(None, convert)
-        else:
-            await self.file.save(output)  # type: ignore
-
-        print(ffmpeg.probe(output))  # type: ignore
+        output = Path(self.bite_file_path) / f"{name_input}.mp3"
+
+        await interaction.response.defer(ephemeral=True)
+
+        if self.file.size > self.max_upload_size:
+            await interaction.followup.send(
+                content=f"File is larger than {self.max_upload_size // 2**20}mb.",
+                ephemeral=True,
+            )
+            return
+
+        transcoder = self.soundboard_manager.transcoder
+        try:
+            # ffprobe reads only the headers it needs from the url
+            duration = await transcoder.probe_duration(self.file.url)
+        except TranscodeError as e:
+            self.logger.error(f"Could not probe upload {self.file.filename}: {e}")
+            await interaction.followup.send(
+                content="File is not a supported audio or video file.", ephemeral=True
+            )
+            return
+
+        if duration is None:
+            # Without a duration the limit below can't be checked up front
+            await interaction.followup.send(
+                content="Could not read the length of the file.", ephemeral=True
+            )
+            return
+
+        if duration > MAX_SOUNDBITE_DURATION:
+            await interaction.followup.send(
+                content=f"Soundbites can be at most {MAX_SOUNDBITE_DURATION} seconds.",
+                ephemeral=True,
+            )
+            return
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.file.url) as resp:
+                    resp.raise_for_status()
+                    # The attachment size is only what Discord reported, the
+                    # download itself is cut off at the limit too, and ffmpeg stops
+                    # at the longest a soundbite can be.
+                    await transcoder.stream_to_mp3(
+                        limit_size(
+                            resp.content.iter_chunked(STREAM_CHUNK_SIZE),
+                            self.max_upload_size,
+                        ),
+                        output,
+                        end=MAX_SOUNDBITE_DURATION,
+                    )
+        except UploadTooLarge as e:
+            self.logger.error(f"Upload of {self.file.filename} stopped: {e}")
+            await interaction.followup.send(
+                content=f"File is larger than {self.max_upload_size // 2**20}mb.",
+                ephemeral=True,
+            )
+            return
+        except (aiohttp.ClientError, TranscodeError) as e:
+            self.logger.error(f"Upload of {self.file.filename} failed: {e}")
+            await interaction.followup.send(
+                content="Could not convert file...", ephemeral=True
+            )
+            return
+
+        await self.soundboard_manager.add_soundbite(output)
         # Send message
-        await interaction.response.send_message(
+        await interaction.followup.send(
             content=f"File saved as {name_input}!", ephemeral=True
         )
         self.bot.dispatch("soundboard_update", interaction)